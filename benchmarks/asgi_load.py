@@ -0,0 +1,201 @@
+"""
+Load test comparing the sync DRF views with their native async twins under
+uvicorn.
+
+Starts ``uvicorn core.asgi:application`` against the configured database,
+then hammers each endpoint pair for a fixed time with keep-alive connections
+and reports requests/sec and latency percentiles per path::
+
+    python -m benchmarks.asgi_load --concurrency 64 --duration 20
+
+Requests are authenticated so that neither path is answered from the
+anonymous response cache. Requires uvicorn; fill the database first for
+meaningful numbers.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    import django
+
+    django.setup()
+
+
+def access_token(username):
+    from django.contrib.auth import get_user_model
+
+    from game_catalog.authentication import CatalogRefreshToken
+
+    user, _ = get_user_model().objects.get_or_create(username=username)
+    return str(CatalogRefreshToken.for_user(user).access_token)
+
+
+def endpoints():
+    """Pairs of (name, sync path, async path) to compare."""
+    from game_catalog.models import Comment, Game
+
+    game_id = (
+        Comment.objects.values_list("game_id", flat=True).first()
+        or Game.objects.values_list("id", flat=True).first()
+    )
+    pairs = [
+        ("genres", "/api/genres/", "/api/async/genres/"),
+        ("studios", "/api/studios/", "/api/async/studios/"),
+        ("games", "/api/games/", "/api/async/games/"),
+    ]
+    if game_id is not None:
+        pairs += [
+            ("game", f"/api/games/{game_id}/", f"/api/async/games/{game_id}/"),
+            (
+                "comments",
+                f"/api/games/{game_id}/comments/",
+                f"/api/async/games/{game_id}/comments/",
+            ),
+        ]
+    return pairs
+
+
+def start_server(port, workers):
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "core.asgi:application",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        env={**os.environ},
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return server
+        except OSError:
+            if server.poll() is not None:
+                raise SystemExit("uvicorn exited during startup")
+            time.sleep(0.2)
+    server.terminate()
+    raise SystemExit("uvicorn did not start within 30 seconds")
+
+
+def load(port, path, headers, concurrency, duration, warmup):
+    """Run ``concurrency`` keep-alive clients on ``path`` for ``duration`` s."""
+    start = time.monotonic() + warmup
+    stop = start + duration
+    lock = threading.Lock()
+    latencies, errors, sizes = [], [0], []
+
+    def client():
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        mine, failed, size = [], 0, 0
+        while True:
+            began = time.monotonic()
+            if began >= stop:
+                break
+            try:
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                size = len(response.read())
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                ok = False
+            if began >= start:
+                if ok:
+                    mine.append(time.monotonic() - began)
+                else:
+                    failed += 1
+        connection.close()
+        with lock:
+            latencies.extend(mine)
+            errors[0] += failed
+            sizes.append(size)
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(client)
+    return summarize(latencies, errors[0], duration, bytes=max(sizes, default=0))
+
+
+def summarize(latencies, errors, duration, **extra):
+    if len(latencies) < 2:
+        return {"requests": len(latencies), "errors": errors, "rps": 0.0, **extra}
+    cuts = statistics.quantiles(latencies, n=100)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / duration, 1),
+        "p50_ms": round(cuts[49] * 1000, 2),
+        "p95_ms": round(cuts[94] * 1000, 2),
+        "p99_ms": round(cuts[98] * 1000, 2),
+        **extra,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--username", default="benchmark")
+    parser.add_argument("--only", action="append", help="Endpoint name to run.")
+    parser.add_argument("--output", help="Write the results as JSON here.")
+    args = parser.parse_args(argv)
+
+    setup_django()
+    headers = {"Authorization": f"Bearer {access_token(args.username)}"}
+    pairs = [pair for pair in endpoints() if not args.only or pair[0] in args.only]
+
+    server = start_server(args.port, args.workers)
+    results = []
+    try:
+        for name, sync_path, async_path in pairs:
+            for mode, path in (("sync", sync_path), ("async", async_path)):
+                result = load(
+                    args.port,
+                    path,
+                    headers,
+                    args.concurrency,
+                    args.duration,
+                    args.warmup,
+                )
+                results.append({"endpoint": name, "mode": mode, **result})
+                print(
+                    f"{name:10} {mode:5} {result['rps']:>9} req/s  "
+                    f"p50 {result.get('p50_ms', '-'):>8} ms  "
+                    f"p99 {result.get('p99_ms', '-'):>8} ms  "
+                    f"errors {result['errors']}"
+                )
+    finally:
+        server.terminate()
+        server.wait()
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Compare two ``benchmarks.run`` result files and flag regressions.
+
+A scenario regresses when its p95 latency grows, or its throughput drops, by
+more than the threshold, or when it runs more SQL queries or returns a
+larger response than before. Exits with status 1 when anything regressed::
+
+    python -m benchmarks.compare base.json head.json --threshold 10
+"""
+
+import argparse
+import json
+
+# Latency changes below this are noise, whatever the relative change.
+MIN_LATENCY_DELTA_MS = 1.0
+
+
+def load(path):
+    with open(path) as results:
+        return json.load(results)
+
+
+def compare(base, head, threshold):
+    """Yield (key, metric, base value, head value, regressed) per change."""
+    before = {(r["scenario"], r["mode"]): r for r in base["results"]}
+    limit = threshold / 100
+    for result in head["results"]:
+        key = (result["scenario"], result["mode"])
+        old = before.get(key)
+        if old is None:
+            continue
+        if "p95_ms" in old and "p95_ms" in result:
+            grown = result["p95_ms"] - old["p95_ms"]
+            yield key, "p95_ms", old["p95_ms"], result["p95_ms"], (
+                grown > old["p95_ms"] * limit and grown > MIN_LATENCY_DELTA_MS
+            )
+        if old["rps"]:
+            yield key, "rps", old["rps"], result["rps"], (
+                result["rps"] < old["rps"] * (1 - limit)
+            )
+        for metric in ("queries", "bytes"):
+            if metric in old and metric in result:
+                yield key, metric, old[metric], result[metric], (
+                    result[metric] > old[metric]
+                )
+        if result["errors"] > old["errors"]:
+            yield key, "errors", old["errors"], result["errors"], True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="Allowed relative change of latency and throughput, in percent.",
+    )
+    args = parser.parse_args(argv)
+
+    base, head = load(args.base), load(args.head)
+    if base["meta"]["dataset"] != head["meta"]["dataset"]:
+        print("Warning: the runs used different datasets.")
+    print(f"{base['meta']['commit']} -> {head['meta']['commit']}")
+
+    regressions = 0
+    for (scenario, mode), metric, old, new, regressed in compare(
+        base, head, args.threshold
+    ):
+        if regressed:
+            regressions += 1
+            print(f"{scenario:24} {mode:6} {metric:8} {old:>10} -> {new}")
+    print(f"{regressions} regression(s).")
+    if regressions:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
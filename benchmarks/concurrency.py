@@ -0,0 +1,240 @@
+"""
+Write throughput and "database is locked" errors under concurrent writers.
+
+Request threads toggle favorites and post comments through the test client
+against a fresh SQLite database, in three configurations:
+
+* ``plain``: the SQLite defaults (SQLITE_TUNING=0, no write queue), as before
+  the concurrency mode existed.
+* ``tuned``: WAL, pragmas, IMMEDIATE transactions and the busy timeout.
+* ``queued``: tuned, with the writes going through game_catalog.writes.
+
+Each configuration runs in its own process, since the database options are
+read when Django starts. With ``--processes N`` the writers are spread over N
+worker processes sharing the database file, like several server workers:
+the write queue then only serializes each process's own writes, and the
+processes still compete for the SQLite lock::
+
+    python -m benchmarks.concurrency --threads 16 --seconds 10
+    python -m benchmarks.concurrency --threads 4 --processes 4
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+MODES = {
+    "plain": {"SQLITE_TUNING": "0", "SQLITE_WRITE_QUEUE": "0"},
+    "tuned": {"SQLITE_TUNING": "1", "SQLITE_WRITE_QUEUE": "0"},
+    "queued": {"SQLITE_TUNING": "1", "SQLITE_WRITE_QUEUE": "1"},
+}
+DATASET = {
+    "genres": 5,
+    "studios": 5,
+    "games": 200,
+    "users": 0,
+    "favorites": 0,
+    "comments": 0,
+}
+
+
+def writer(user, games, seconds, seed, count):
+    """Alternate favorite toggles and comments for ``seconds``."""
+    import random
+
+    from django.db import connection
+    from rest_framework.test import APIClient
+
+    rng = random.Random(seed)
+    client = APIClient(raise_request_exception=False)
+    client.force_authenticate(user)
+    deadline = time.perf_counter() + seconds
+    n = 0
+    while time.perf_counter() < deadline:
+        game = rng.choice(games)
+        if n % 2:
+            response = client.post(
+                "/api/comments/", {"game": game, "text": f"Comment {n}"}
+            )
+        else:
+            response = client.post(f"/api/games/{game}/toggle_favorite/")
+        count("ok" if response.status_code < 400 else "failed")
+        n += 1
+    connection.close()
+
+
+def measure(threads, seconds, processes):
+    """Create the database, run the writers and return the results."""
+    import logging
+
+    from .generate import generate, setup_django
+
+    setup_django()
+    from django.core.management import call_command
+    from django.db import connection
+
+    from game_catalog.models import CustomUser
+
+    logging.disable(logging.CRITICAL)
+    call_command("migrate", run_syncdb=True, verbosity=0)
+    generate(DATASET, seed=0)
+    CustomUser.objects.bulk_create(
+        CustomUser(username=f"writer{n}") for n in range(threads * processes)
+    )
+
+    if processes == 1:
+        counts = write(threads, seconds, first=0)
+    else:
+        connection.close()
+        workers = [
+            subprocess.Popen(
+                [
+                    sys.executable,
+                    "-m",
+                    "benchmarks.concurrency",
+                    "--write",
+                    str(index * threads),
+                    "--threads",
+                    str(threads),
+                    "--seconds",
+                    str(seconds),
+                ],
+                stdout=subprocess.PIPE,
+                text=True,
+            )
+            for index in range(processes)
+        ]
+        results = [json.loads(worker.communicate()[0]) for worker in workers]
+        counts = {key: sum(result[key] for result in results) for key in results[0]}
+        # The workers ran side by side.
+        counts["elapsed"] = max(result["elapsed"] for result in results)
+
+    total = counts["ok"] + counts["failed"]
+    return {
+        "processes": processes,
+        "threads": threads * processes,
+        "requests": total,
+        "writes_per_second": round(counts["ok"] / counts["elapsed"], 1),
+        "failed": counts["failed"],
+        "lock_errors": counts["locked"],
+        "lock_error_rate": round(counts["locked"] / total, 4) if total else 0,
+    }
+
+
+def write(threads, seconds, first):
+    """Run ``threads`` writers as the users from ``writer{first}`` on; count them."""
+    import logging
+
+    from .generate import setup_django
+
+    setup_django()
+    logging.disable(logging.CRITICAL)
+    from django.core.signals import got_request_exception
+    from django.db import OperationalError
+
+    from game_catalog import writes
+    from game_catalog.models import CustomUser, Game
+
+    games = list(Game.objects.values_list("pk", flat=True))
+    users = [
+        CustomUser.objects.get(username=f"writer{n}")
+        for n in range(first, first + threads)
+    ]
+
+    counts = {"ok": 0, "failed": 0, "locked": 0}
+    lock = threading.Lock()
+
+    def count(outcome):
+        with lock:
+            counts[outcome] += 1
+
+    def failed(sender, **kwargs):
+        error = sys.exc_info()[1]
+        if isinstance(error, OperationalError) and "locked" in str(error):
+            count("locked")
+
+    got_request_exception.connect(failed)
+    workers = [
+        threading.Thread(
+            target=writer, args=(user, games, seconds, first + n, count)
+        )
+        for n, user in enumerate(users)
+    ]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    counts["elapsed"] = time.perf_counter() - started
+    writes.shutdown()
+    got_request_exception.disconnect(failed)
+    return counts
+
+
+def run_mode(mode, threads, seconds, processes):
+    """Measure one configuration in a child process with its own database."""
+    with tempfile.TemporaryDirectory() as directory:
+        env = {
+            **os.environ,
+            **MODES[mode],
+            "BENCH_DATABASE": os.path.join(directory, "concurrency.sqlite3"),
+        }
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.concurrency",
+                "--measure",
+                "--threads",
+                str(threads),
+                "--seconds",
+                str(seconds),
+                "--processes",
+                str(processes),
+            ],
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+    return {"mode": mode, **json.loads(output)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--threads", type=int, default=8, help="Writer threads per process."
+    )
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--output", help="Write the results as JSON here.")
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--write", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.measure:
+        print(json.dumps(measure(args.threads, args.seconds, args.processes)))
+        return
+    if args.write is not None:
+        print(json.dumps(write(args.threads, args.seconds, first=args.write)))
+        return
+
+    results = []
+    for mode in args.modes:
+        result = run_mode(mode, args.threads, args.seconds, args.processes)
+        results.append(result)
+        print("  ".join(f"{key} {value}" for key, value in result.items()))
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
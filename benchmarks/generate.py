@@ -0,0 +1,237 @@
+"""
+Fill the benchmark database with a synthetic catalog.
+
+Rows are written with bulk inserts in batches, then the derived data
+(favorites counts, search index, statistics rollups and leaderboards) is
+rebuilt once at the end. The default sizes describe a large catalog; scale
+them all down for a quick run::
+
+    python -m benchmarks.generate --scale 0.01
+    python -m benchmarks.generate --games 200000 --comments 0
+
+Popularity is skewed: a few games collect most favorites and comments, as in
+a real catalog. The same seed always produces the same dataset.
+"""
+
+import argparse
+import datetime
+import os
+import random
+import time
+from contextlib import contextmanager
+
+DEFAULTS = {
+    "genres": 200,
+    "studios": 10_000,
+    "games": 1_000_000,
+    "users": 100_000,
+    # Random (user, game) pairs; repeated pairs are dropped.
+    "favorites": 5_000_000,
+    "comments": 20_000_000,
+}
+BATCH_SIZE = 5000
+TWO_YEARS = 2 * 365 * 86400
+PASSWORD = "benchmark-password"
+WORDS = (
+    "ancient arcade battle castle crystal dark dragon dungeon empire forest "
+    "galaxy hero island kingdom legend machine night ocean planet quest racer "
+    "rogue shadow sky soul space storm tactics tower void war wild world"
+).split()
+COUNTRIES = ["USA", "Japan", "Poland", "Canada", "France", "Sweden", "Ukraine"]
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+    import django
+
+    django.setup()
+
+
+def skewed(rng, ids):
+    """Pick from ``ids``, favoring the first ones."""
+    return ids[int(len(ids) * rng.random() ** 3)]
+
+
+def phrase(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+@contextmanager
+def explicit_dates(model, name):
+    """Let bulk inserts set an ``auto_now_add`` field."""
+    field = model._meta.get_field(name)
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def insert(model, rows, report):
+    """Bulk insert the objects from ``rows`` in batches, ignoring duplicates."""
+    from game_catalog.bulk import batches
+
+    written = 0
+    for batch in batches(rows, BATCH_SIZE):
+        model.objects.bulk_create(batch, ignore_conflicts=True)
+        written += len(batch)
+        report(model, written)
+    return written
+
+
+def generate(counts, seed=0, report=lambda model, written: None):
+    """Write a catalog of the given sizes into an empty database."""
+    from django.contrib.auth.hashers import make_password
+    from django.db import transaction
+
+    from game_catalog import actions, leaderboards, search, stats
+    from game_catalog.models import Comment, CustomUser, Game, Genre, Studio
+
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    now = datetime.datetime.now(datetime.timezone.utc)
+
+    with transaction.atomic():
+        insert(
+            Genre,
+            (
+                Genre(name=f"Genre {n}", description=phrase(rng, 12))
+                for n in range(counts["genres"])
+            ),
+            report,
+        )
+        insert(
+            Studio,
+            (
+                Studio(
+                    name=f"{phrase(rng, 2)} Studio {n}",
+                    founded_date=today - datetime.timedelta(days=rng.randrange(20000)),
+                    description=phrase(rng, 20),
+                    country=rng.choice(COUNTRIES),
+                )
+                for n in range(counts["studios"])
+            ),
+            report,
+        )
+        genre_ids = list(Genre.objects.values_list("id", flat=True))
+        studio_ids = list(Studio.objects.values_list("id", flat=True))
+        insert(
+            Game,
+            (
+                Game(
+                    name=phrase(rng, 3),
+                    description=phrase(rng, 40),
+                    release_date=today - datetime.timedelta(days=rng.randrange(15000)),
+                    studio_id=skewed(rng, studio_ids),
+                )
+                for _ in range(counts["games"])
+            ),
+            report,
+        )
+        game_ids = list(Game.objects.values_list("id", flat=True))
+        GameGenre = Game.genre.through
+        insert(
+            GameGenre,
+            (
+                GameGenre(game_id=game_id, genre_id=genre_id)
+                for game_id in game_ids
+                for genre_id in rng.sample(
+                    genre_ids, min(len(genre_ids), rng.randint(1, 3))
+                )
+            ),
+            report,
+        )
+
+        # Hashing is the slow part of creating users; they all share one.
+        password = make_password(PASSWORD)
+        insert(
+            CustomUser,
+            (
+                CustomUser(
+                    username=f"user{n}", email=f"user{n}@example.com", password=password
+                )
+                for n in range(counts["users"])
+            ),
+            report,
+        )
+        user_ids = list(CustomUser.objects.values_list("id", flat=True))
+        if user_ids and game_ids:
+            Favorite = CustomUser.favorite_games.through
+            insert(
+                Favorite,
+                (
+                    Favorite(
+                        customuser_id=rng.choice(user_ids),
+                        game_id=skewed(rng, game_ids),
+                    )
+                    for _ in range(counts["favorites"])
+                ),
+                report,
+            )
+            with explicit_dates(Comment, "post_date"):
+                insert(
+                    Comment,
+                    (
+                        Comment(
+                            user_id=rng.choice(user_ids),
+                            game_id=skewed(rng, game_ids),
+                            text=phrase(rng, rng.randint(5, 30)),
+                            post_date=now
+                            - datetime.timedelta(seconds=rng.randrange(TWO_YEARS)),
+                        )
+                        for _ in range(counts["comments"])
+                    ),
+                    report,
+                )
+
+    actions.rebuild_favorites_count()
+    search.rebuild()
+    stats.rebuild()
+    leaderboards.refresh(full=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    for name, default in DEFAULTS.items():
+        parser.add_argument(f"--{name}", type=int, help=f"Default: {default:,}.")
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="Multiply the default sizes."
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--reset", action="store_true", help="Empty the database first."
+    )
+    args = parser.parse_args(argv)
+    counts = {
+        name: getattr(args, name)
+        if getattr(args, name) is not None
+        else max(1, int(default * args.scale))
+        for name, default in DEFAULTS.items()
+    }
+
+    setup_django()
+    from django.core.management import call_command
+
+    from game_catalog.models import Game
+
+    call_command("migrate", run_syncdb=True, verbosity=0)
+    if args.reset:
+        call_command("flush", interactive=False, verbosity=0)
+    elif Game.objects.exists():
+        raise SystemExit("The benchmark database is not empty; pass --reset.")
+
+    started = time.monotonic()
+    last = [started]
+
+    def report(model, written):
+        if time.monotonic() - last[0] >= 5:
+            last[0] = time.monotonic()
+            print(f"  {model._meta.object_name}: {written:,} rows", flush=True)
+
+    print("Generating " + ", ".join(f"{n:,} {name}" for name, n in counts.items()))
+    generate(counts, seed=args.seed, report=report)
+    print(f"Done in {time.monotonic() - started:.0f} s.")
+
+
+if __name__ == "__main__":
+    main()
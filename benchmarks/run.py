@@ -0,0 +1,223 @@
+"""
+Benchmark every route of the API and write the results as JSON.
+
+Each scenario from ``benchmarks.scenarios`` runs in two modes:
+
+* ``client``: in process through the Django test client, one request at a
+  time. Measures latency, response size and SQL query count. Writes run in
+  a rolled-back transaction, so the database does not change.
+* ``server``: against ``uvicorn core.asgi:application`` with concurrent
+  keep-alive clients (see ``benchmarks.asgi_load``). Measures throughput and
+  latency under load. Only read scenarios run here.
+
+Typical use, against the database filled by ``benchmarks.generate``::
+
+    python -m benchmarks.run --output results/head.json
+    python -m benchmarks.compare results/base.json results/head.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+    import django
+
+    django.setup()
+
+
+def tokens(ctx):
+    from game_catalog.authentication import CatalogRefreshToken
+
+    return {
+        role: str(CatalogRefreshToken.for_user(ctx[role]).access_token)
+        for role in ("user", "admin")
+    }
+
+
+def run_client(scenario, headers, iterations, warmup):
+    """Time ``iterations`` requests of a scenario through the test client."""
+    from django.db import transaction
+    from rest_framework.test import APIClient
+
+    from game_catalog import metrics
+
+    from .asgi_load import summarize
+
+    client = APIClient(raise_request_exception=False)
+    send = getattr(client, scenario.method.lower())
+    queries, latencies, errors, size = [], [], 0, 0
+
+    def measured(sender, measurement, **kwargs):
+        queries.append(measurement["queries"])
+
+    metrics.request_measured.connect(measured)
+    try:
+        for iteration in range(warmup + iterations):
+            began = time.perf_counter()
+            with transaction.atomic():
+                if scenario.write:
+                    response = send(
+                        scenario.path, scenario.body, format="json", headers=headers
+                    )
+                else:
+                    response = send(scenario.path, headers=headers)
+                body = (
+                    b"".join(response.streaming_content)
+                    if response.streaming
+                    else response.content
+                )
+                transaction.set_rollback(True)
+            took = time.perf_counter() - began
+            if iteration < warmup:
+                continue
+            if response.status_code == scenario.status:
+                latencies.append(took)
+                size = len(body)
+            else:
+                errors += 1
+    finally:
+        metrics.request_measured.disconnect(measured)
+    return summarize(
+        latencies,
+        errors,
+        sum(latencies),
+        bytes=size,
+        # Warmup requests may fill in-process caches; leave them out.
+        queries=max(queries[warmup:], default=0),
+    )
+
+
+def run_server(scenarios, headers, args):
+    from . import asgi_load
+
+    server = asgi_load.start_server(args.port, args.workers)
+    try:
+        for scenario in scenarios:
+            if scenario.write:
+                continue
+            result = asgi_load.load(
+                args.port,
+                scenario.path,
+                headers[scenario.user],
+                args.concurrency,
+                args.duration,
+                args.warmup,
+            )
+            yield scenario, result
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def metadata():
+    import django
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+
+    from game_catalog.models import Comment, Game, Genre, Studio
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    User = get_user_model()
+    return {
+        "commit": commit,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "dataset": {
+            "genres": Genre.objects.count(),
+            "studios": Studio.objects.count(),
+            "games": Game.objects.count(),
+            "users": User.objects.count(),
+            "favorites": User.favorite_games.through.objects.count(),
+            "comments": Comment.objects.count(),
+        },
+    }
+
+
+def record(scenario, mode, result):
+    print(
+        f"{scenario.name:24} {mode:6} {result['rps']:>9} req/s  "
+        f"p50 {result.get('p50_ms', '-'):>8} ms  "
+        f"p95 {result.get('p95_ms', '-'):>8} ms  "
+        f"{result.get('bytes', 0):>9} B  "
+        f"{result.get('queries', '-'):>3} queries  "
+        f"errors {result['errors']}",
+        flush=True,
+    )
+    return {
+        "scenario": scenario.name,
+        "route": scenario.route,
+        "method": scenario.method,
+        "mode": mode,
+        **result,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--mode", choices=["client", "server", "both"], default="both")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--client-warmup", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--warmup", type=float, default=1.0)
+    parser.add_argument("--only", action="append", help="Scenario name to run.")
+    parser.add_argument("--output", help="Write the results as JSON here.")
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from .scenarios import context, scenarios, uncovered
+
+    ctx = context()
+    selected = scenarios(ctx)
+    missing = uncovered(selected)
+    if missing:
+        print("Routes without a scenario:", file=sys.stderr)
+        for route, method in missing:
+            print(f"  {method} {route}", file=sys.stderr)
+    if args.only:
+        selected = [scenario for scenario in selected if scenario.name in args.only]
+
+    access = tokens(ctx)
+    headers = {
+        role: {"Authorization": f"Bearer {access[role]}"} if role else {}
+        for role in ("user", "admin", None)
+    }
+
+    results = []
+    if args.mode in ("client", "both"):
+        for scenario in selected:
+            result = run_client(
+                scenario, headers[scenario.user], args.iterations, args.client_warmup
+            )
+            results.append(record(scenario, "client", result))
+    if args.mode in ("server", "both"):
+        for scenario, result in run_server(selected, headers, args):
+            results.append(record(scenario, "server", result))
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as output:
+            json.dump({"meta": metadata(), "results": results}, output, indent=2)
+    if missing:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,407 @@
+"""
+The requests benchmarked for each route of the project.
+
+Every (URL name, method) pair served by ``core.urls`` must have at least one
+scenario; ``uncovered()`` lists the ones that do not, so new routes cannot
+slip out of the benchmark. Write scenarios run in a transaction that is
+rolled back, which makes them repeatable.
+"""
+
+import json
+from base64 import b64encode
+from datetime import date
+from typing import Any, NamedTuple
+from urllib.parse import urlencode
+
+from django.urls import get_resolver, reverse
+from django.urls.resolvers import URLResolver
+
+from .generate import PASSWORD
+
+# Not part of the API.
+IGNORED_NAMESPACES = {"admin"}
+
+
+class Scenario(NamedTuple):
+    name: str
+    route: str
+    method: str = "GET"
+    kwargs: dict = {}
+    params: dict = {}
+    body: Any = None
+    # "user", "admin" or None for anonymous requests.
+    user: str | None = "user"
+    status: int = 200
+
+    @property
+    def write(self):
+        return self.method != "GET"
+
+    @property
+    def path(self):
+        path = reverse(self.route, kwargs=self.kwargs)
+        return f"{path}?{urlencode(self.params)}" if self.params else path
+
+
+def context():
+    """Ids of existing rows the scenarios point at, picked from the database."""
+    from django.contrib.auth import get_user_model
+    from django.db.models import Max
+
+    from game_catalog.authentication import CatalogRefreshToken
+    from game_catalog.models import Comment, Game, Genre, Studio
+
+    User = get_user_model()
+    user, created = User.objects.get_or_create(username="benchmark")
+    if created:
+        user.set_password(PASSWORD)
+        user.save()
+    admin, _ = User.objects.get_or_create(
+        username="benchmark-admin", defaults={"is_staff": True}
+    )
+    # The most favorited game has the most comments and favorites to show.
+    game = Game.objects.order_by("-favorites_count", "id").first()
+    if game is None:
+        raise SystemExit("The database is empty; run benchmarks.generate first.")
+    comment = Comment.objects.filter(game=game).order_by("-id").first()
+    last_game_id = Game.objects.aggregate(last=Max("id"))["last"]
+    # Deep pages sit halfway through their listing.
+    games_depth = Game.objects.count() // 2
+    comments_depth = Comment.objects.count() // 2
+    return {
+        "user": user,
+        "admin": admin,
+        "refresh": str(CatalogRefreshToken.for_user(user)),
+        "other_user": User.objects.exclude(pk__in=[user.pk, admin.pk]).first(),
+        "game": game.pk,
+        "studio": game.studio_id,
+        "genre": game.genre.values_list("pk", flat=True).first(),
+        "comment": comment.pk if comment else None,
+        "games": _first_ids(Game),
+        "studios": _first_ids(Studio),
+        "genres": _first_ids(Genre),
+        # Exports stream from here, so they stay a fixed size as the catalog grows.
+        "export_after": max(last_game_id - 1000, 0),
+        "games_cursor": _cursor(Game.objects, ("release_date", "id"), games_depth),
+        "games_by_name_cursor": _cursor(Game.objects, ("name", "id"), games_depth),
+        "comments_cursor": _cursor(
+            Comment.objects, ("post_date", "id"), comments_depth
+        ),
+        "game_comments_cursor": _cursor(
+            Comment.objects.filter(game=game),
+            ("-post_date", "-id"),
+            game.comments.count() // 2,
+        ),
+    }
+
+
+def scenarios(ctx):
+    game = {"pk": ctx["game"]}
+    studio = {"pk": ctx["studio"]}
+    genre = {"pk": ctx["genre"]}
+    comment = {"pk": ctx["comment"] or 0}
+    other_user = {"pk": ctx["other_user"].pk if ctx["other_user"] else 0}
+    genre_body = {"name": "Benchmark genre", "description": "Generated."}
+    studio_body = {
+        "name": "Benchmark studio",
+        "founded_date": "2001-01-01",
+        "description": "Generated.",
+        "country": "Poland",
+    }
+    game_body = {
+        "name": "Benchmark game",
+        "description": "Generated.",
+        "release_date": "2020-01-01",
+        "studio": ctx["studio"],
+        "genre": [ctx["genre"]],
+    }
+
+    def bulk(prefix, body, ids):
+        return [
+            Scenario(
+                f"{prefix} bulk create",
+                f"{prefix}-bulk",
+                "POST",
+                body=[{**body, "name": f"{body['name']} {n}"} for n in range(100)],
+                user="admin",
+                status=201,
+            ),
+            Scenario(
+                f"{prefix} bulk update",
+                f"{prefix}-bulk",
+                "PATCH",
+                body=[{"id": pk, "description": "Updated."} for pk in ids],
+                user="admin",
+            ),
+            Scenario(
+                f"{prefix} bulk delete",
+                f"{prefix}-bulk",
+                "DELETE",
+                body={"ids": ids},
+                user="admin",
+            ),
+        ]
+
+    def crud(prefix, body, detail):
+        return [
+            Scenario(
+                f"{prefix} create",
+                f"{prefix}-list",
+                "POST",
+                body=body,
+                user="admin",
+                status=201,
+            ),
+            Scenario(
+                f"{prefix} replace",
+                f"{prefix}-detail",
+                "PUT",
+                detail,
+                body=body,
+                user="admin",
+            ),
+            Scenario(
+                f"{prefix} update",
+                f"{prefix}-detail",
+                "PATCH",
+                detail,
+                body={"description": "Updated."},
+                user="admin",
+            ),
+            Scenario(
+                f"{prefix} delete",
+                f"{prefix}-detail",
+                "DELETE",
+                detail,
+                user="admin",
+                status=204,
+            ),
+        ]
+
+    return [
+        Scenario("api root", "api-root"),
+        Scenario("schema", "schema"),
+        Scenario("docs", "swagger-ui"),
+        Scenario("metrics", "metrics", user=None),
+        Scenario("cache stats", "cache-stats", user="admin"),
+        Scenario(
+            "register",
+            "register",
+            "POST",
+            body={"username": "benchmark-new", "password": PASSWORD},
+            user=None,
+            status=201,
+        ),
+        Scenario(
+            "token",
+            "token_obtain_pair",
+            "POST",
+            body={"username": ctx["user"].username, "password": PASSWORD},
+            user=None,
+        ),
+        Scenario(
+            "token refresh",
+            "token_refresh",
+            "POST",
+            body={"refresh": ctx["refresh"]},
+            user=None,
+        ),
+        # Catalog reads.
+        Scenario("genres anonymous", "genre-list", user=None),
+        Scenario("genres", "genre-list"),
+        Scenario("genre", "genre-detail", kwargs=genre),
+        Scenario("studios anonymous", "studio-list", user=None),
+        Scenario("studios", "studio-list"),
+        Scenario("studio", "studio-detail", kwargs=studio),
+        Scenario("studio stats", "studio-stats", kwargs=studio),
+        Scenario("games anonymous", "game-list", user=None),
+        Scenario("games", "game-list"),
+        Scenario("games page 100", "game-list", params={"page_size": 100}),
+        Scenario("games by name", "game-list", params={"ordering": "name"}),
+        Scenario(
+            "games filtered",
+            "game-list",
+            params={"genre": ctx["genre"], "country": "Poland"},
+        ),
+        Scenario("games expanded", "game-list", params={"expand": "studio,genre"}),
+        Scenario("games deep", "game-list", params=_deep(ctx["games_cursor"])),
+        Scenario(
+            "games by name deep",
+            "game-list",
+            params=_deep(ctx["games_by_name_cursor"], ordering="name"),
+        ),
+        Scenario(
+            "games page 200 full",
+            "game-list",
+            params={
+                "page_size": 200,
+                "fields": "id,name,description,release_date,genre,studio,"
+                "in_favorites,is_favorited",
+                "expand": "studio,genre",
+            },
+        ),
+        Scenario("game", "game-detail", kwargs=game),
+        Scenario("game stats", "game-stats", kwargs=game),
+        Scenario("game comments", "game-comments", kwargs=game),
+        Scenario(
+            "game comments deep",
+            "game-comments",
+            kwargs=game,
+            params=_deep(ctx["game_comments_cursor"]),
+        ),
+        Scenario("search", "game-search", params={"q": "dragon quest"}),
+        Scenario("leaderboard", "game-leaderboard"),
+        Scenario(
+            "leaderboard genre 7d",
+            "game-leaderboard",
+            params={"board": "comments_7d", "genre": ctx["genre"]},
+        ),
+        Scenario(
+            "export ndjson", "game-export", params={"after_id": ctx["export_after"]}
+        ),
+        Scenario(
+            "export csv",
+            "game-export",
+            params={"output": "csv", "after_id": ctx["export_after"]},
+        ),
+        Scenario("export full", "game-export"),
+        Scenario("comments", "comment-list-create"),
+        Scenario(
+            "comments deep",
+            "comment-list-create",
+            params=_deep(ctx["comments_cursor"]),
+        ),
+        Scenario(
+            "comments page 200", "comment-list-create", params={"page_size": 200}
+        ),
+        Scenario("comment", "comment-detail", kwargs=comment),
+        Scenario("users", "customuser-list"),
+        Scenario("users admin", "customuser-list", user="admin"),
+        Scenario("user", "customuser-detail", kwargs=other_user),
+        Scenario("user favorites", "customuser-favorites", kwargs=other_user),
+        Scenario("me", "customuser-me"),
+        Scenario("async genres", "async-genre-list"),
+        Scenario("async studios", "async-studio-list"),
+        Scenario("async games", "async-game-list"),
+        Scenario(
+            "async games deep", "async-game-list", params=_deep(ctx["games_cursor"])
+        ),
+        Scenario("async game", "async-game-detail", kwargs=game),
+        Scenario("async game comments", "async-game-comments", kwargs=game),
+        # Writes.
+        *crud("genre", genre_body, genre),
+        *crud("studio", studio_body, studio),
+        *crud("game", game_body, game),
+        *bulk("genre", genre_body, ctx["genres"]),
+        *bulk("studio", studio_body, ctx["studios"]),
+        *bulk("game", game_body, ctx["games"]),
+        Scenario("favorite add", "game-favorite", "PUT", game),
+        Scenario("favorite remove", "game-favorite", "DELETE", game),
+        Scenario("favorite toggle", "game-toggle-favorite", "POST", game),
+        Scenario(
+            "comment create",
+            "comment-list-create",
+            "POST",
+            body={"game": ctx["game"], "text": "Benchmark comment."},
+            status=201,
+        ),
+        Scenario(
+            "comment delete",
+            "comment-detail",
+            "DELETE",
+            comment,
+            user="admin",
+            status=204,
+        ),
+        Scenario(
+            "user create",
+            "customuser-list",
+            "POST",
+            body={"username": "benchmark-created"},
+            user="admin",
+            status=201,
+        ),
+        Scenario(
+            "user replace",
+            "customuser-detail",
+            "PUT",
+            other_user,
+            body={"username": "benchmark-renamed"},
+            user="admin",
+        ),
+        Scenario(
+            "user update",
+            "customuser-detail",
+            "PATCH",
+            other_user,
+            body={"first_name": "Bench"},
+            user="admin",
+        ),
+        Scenario(
+            "user delete",
+            "customuser-detail",
+            "DELETE",
+            other_user,
+            user="admin",
+            status=204,
+        ),
+    ]
+
+
+def routes():
+    """(URL name, method) of every API route of the project."""
+    found = set()
+
+    def walk(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                if pattern.namespace not in IGNORED_NAMESPACES:
+                    walk(pattern.url_patterns)
+            elif pattern.name:
+                found.update((pattern.name, method) for method in _methods(pattern))
+
+    walk(get_resolver().url_patterns)
+    return found
+
+
+def uncovered(scenarios):
+    covered = {(scenario.route, scenario.method) for scenario in scenarios}
+    return sorted(routes() - covered)
+
+
+def _cursor(queryset, ordering, depth):
+    """
+    The ``next`` cursor reached by following the pages of ``queryset`` in
+    ``ordering`` for ``depth`` rows, or None if it has no more rows than that.
+    """
+    names = [field.lstrip("-") for field in ordering]
+    rows = list(queryset.order_by(*ordering).values_list(*names)[depth : depth + 1])
+    if not depth or not rows:
+        return None
+    position = [
+        value.isoformat() if isinstance(value, date) else value for value in rows[0]
+    ]
+    payload = json.dumps({"p": position}, separators=(",", ":"))
+    return b64encode(payload.encode("ascii")).decode("ascii")
+
+
+def _deep(cursor, **params):
+    """``params`` with ``cursor`` added, for a page deep into a listing."""
+    return {**params, "cursor": cursor} if cursor else params
+
+
+def _first_ids(model, count=100):
+    return list(model.objects.order_by("pk").values_list("pk", flat=True)[:count])
+
+
+def _methods(pattern):
+    callback = pattern.callback
+    view_class = getattr(callback, "view_class", None)
+    if getattr(callback, "actions", None):
+        methods = callback.actions
+    elif view_class is not None:
+        methods = [m for m in view_class.http_method_names if hasattr(view_class, m)]
+    else:
+        methods = ["get"]
+    # Served by the GET handler, or generic.
+    return [method.upper() for method in methods if method not in ("head", "options")]
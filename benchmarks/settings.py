@@ -0,0 +1,29 @@
+"""
+Settings for benchmark runs: the project settings against a separate SQLite
+database (``BENCH_DATABASE``, default ``bench.sqlite3``) and without DEBUG,
+which would otherwise keep every query in memory.
+"""
+
+from core.settings import *  # noqa: F401,F403
+from core.settings import BASE_DIR, INSTALLED_APPS, SQLITE_OPTIONS, os
+
+DEBUG = False
+ALLOWED_HOSTS = ["127.0.0.1", "localhost", "testserver"]
+INSTRUMENTATION_HEADERS = False
+# The metrics scenario scrapes /metrics/ from the test client's address.
+METRICS_ALLOWED_IPS = ["127.0.0.1"]
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ.get("BENCH_DATABASE", BASE_DIR / "bench.sqlite3"),
+        "OPTIONS": SQLITE_OPTIONS,
+    }
+}
+DATABASE_READ_REPLICAS = []
+# Benchmarks run with the write queue unless SQLITE_WRITE_QUEUE=0.
+SQLITE_WRITE_QUEUE = os.environ.get("SQLITE_WRITE_QUEUE", "1") != "0"
+
+# The schema is created straight from the models (migrate --run-syncdb), the
+# way the test runner does it.
+MIGRATION_MODULES = {app.rsplit(".", 1)[-1]: None for app in INSTALLED_APPS}
@@ -0,0 +1,108 @@
+"""
+Signups per second per core, for each password hasher.
+
+For every hasher, measures hashing alone and complete registrations through
+``/register/`` (rolled back), both on one core. With ``--workers`` it also
+measures hashing through the process pool, as configured by
+PASSWORD_HASHING_WORKERS::
+
+    python -m benchmarks.signup --seconds 5 --workers 4
+
+Argon2 is skipped when argon2-cffi is not installed.
+"""
+
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .generate import PASSWORD, setup_django
+
+
+def rate(seconds, operation):
+    """Operations per second over about ``seconds``, run one at a time."""
+    done = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        operation(done)
+        done += 1
+    return done / (time.perf_counter() - started)
+
+
+def signup(client, n):
+    from django.db import transaction
+
+    with transaction.atomic():
+        response = client.post(
+            "/register/", {"username": f"signup{n}", "password": PASSWORD}
+        )
+        transaction.set_rollback(True)
+    assert response.status_code == 201, response.content
+
+
+def pooled_rate(seconds, workers):
+    """Hashes per second with ``workers`` request threads feeding the pool."""
+    from game_catalog import passwords
+
+    passwords.make_password(PASSWORD)  # Start the pool.
+    with ThreadPoolExecutor(workers) as threads:
+        rates = threads.map(
+            lambda _: rate(seconds, lambda n: passwords.make_password(PASSWORD)),
+            range(workers),
+        )
+        return sum(rates)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--output", help="Write the results as JSON here.")
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from django.conf import settings
+    from django.contrib.auth.hashers import get_hasher
+    from django.core.management import call_command
+    from django.test import override_settings
+    from rest_framework.test import APIClient
+
+    from game_catalog import passwords
+
+    call_command("migrate", run_syncdb=True, verbosity=0)
+    client = APIClient()
+    results = []
+    for name, path in settings.PASSWORD_HASHER_CLASSES.items():
+        with override_settings(PASSWORD_HASHERS=[path], PASSWORD_HASHING_WORKERS=0):
+            try:
+                get_hasher().encode(PASSWORD, "benchmarksalt")
+            except ValueError as error:
+                print(f"{name:8} skipped: {error}")
+                continue
+            result = {
+                "hasher": name,
+                "hashes_per_core": round(
+                    rate(args.seconds, lambda n: passwords.make_password(PASSWORD)), 1
+                ),
+                "signups_per_core": round(
+                    rate(args.seconds, lambda n: signup(client, n)), 1
+                ),
+            }
+        if args.workers:
+            with override_settings(
+                PASSWORD_HASHERS=[path], PASSWORD_HASHING_WORKERS=args.workers
+            ):
+                pooled = pooled_rate(args.seconds, args.workers)
+                passwords.shutdown()
+            result["pooled_hashes"] = round(pooled, 1)
+            result["pooled_hashes_per_core"] = round(pooled / args.workers, 1)
+        results.append(result)
+        print("  ".join(f"{key} {value}" for key, value in result.items()))
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,21 @@
 import pytest
 from django.contrib.auth import get_user_model
-from rest_framework_simplejwt.tokens import AccessToken
+from django.core.cache import caches
 
+from game_catalog.authentication import CatalogAccessToken
 from game_catalog.models import Game, Genre, Studio
 
 User = get_user_model()
 
+pytest_plugins = ["game_catalog.tests.budgets"]
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    yield
+    for cache in caches.all():
+        cache.clear()
+
 
 @pytest.fixture
 def user():
@@ -24,7 +34,7 @@ def access_token(user):
     """
     def _get_access_token(user_instance=None):
         user_instance = user_instance or user
-        token = AccessToken.for_user(user_instance)
+        token = CatalogAccessToken.for_user(user_instance)
         return str(token)
 
     return _get_access_token
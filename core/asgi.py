@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
 application = get_asgi_application()
+
+# Load the genres and studios kept in memory before the first request.
+from game_catalog import reference  # noqa: E402
+
+reference.warm()
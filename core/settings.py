@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,6 +44,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so the measurements cover the rest of the stack.
+    "game_catalog.middleware.InstrumentationMiddleware",
+    "game_catalog.middleware.ReplicaMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -76,11 +80,115 @@ WSGI_APPLICATION = "core.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# SQLite concurrency mode, on unless SQLITE_TUNING=0. WAL lets readers run
+# alongside the writer; transactions take the write lock when they begin
+# (IMMEDIATE), since a deferred one that later upgrades fails at once with
+# "database is locked"; and a connection waits up to SQLITE_TIMEOUT seconds
+# for the lock. SQLITE_WRITE_QUEUE=1 also sends the write paths of the catalog
+# views through one writer thread per process (game_catalog.writes).
+SQLITE_OPTIONS = {}
+if os.environ.get("SQLITE_TUNING", "1") != "0":
+    SQLITE_OPTIONS = {
+        "init_command": (
+            "PRAGMA journal_mode=WAL;"
+            "PRAGMA synchronous=NORMAL;"
+            "PRAGMA cache_size=-65536;"
+            "PRAGMA mmap_size=268435456;"
+            "PRAGMA temp_store=MEMORY"
+        ),
+        "transaction_mode": "IMMEDIATE",
+        "timeout": int(os.environ.get("SQLITE_TIMEOUT", 20)),
+    }
+SQLITE_WRITE_QUEUE = os.environ.get("SQLITE_WRITE_QUEUE", "0") == "1"
+# Most queued writes committed together in one transaction.
+SQLITE_WRITE_BATCH = int(os.environ.get("SQLITE_WRITE_BATCH", 64))
+
+# Write-behind comment creation (game_catalog.comment_buffer): comment POSTs
+# return 202 at once and are inserted in batches, every COMMENT_FLUSH_INTERVAL
+# milliseconds or COMMENT_FLUSH_SIZE comments, whichever comes first.
+COMMENT_WRITE_BEHIND = os.environ.get("COMMENT_WRITE_BEHIND", "0") == "1"
+COMMENT_FLUSH_INTERVAL = int(os.environ.get("COMMENT_FLUSH_INTERVAL", 200))
+COMMENT_FLUSH_SIZE = int(os.environ.get("COMMENT_FLUSH_SIZE", 500))
+
+# DATABASE_ENGINE=postgresql selects the production profile, configured by
+# the POSTGRES_* variables. Connections persist for DATABASE_CONN_MAX_AGE
+# seconds, or come from a psycopg pool of up to DATABASE_POOL_SIZE
+# connections per process when that is set. DATABASE_REPLICA_HOSTS lists
+# read replicas, used by the views that opt in (game_catalog.replicas).
+if os.environ.get("DATABASE_ENGINE") == "postgresql":
+    PRIMARY_DATABASE = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": os.environ.get("POSTGRES_DB", "catalog"),
+        "USER": os.environ.get("POSTGRES_USER", "catalog"),
+        "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
+        "HOST": os.environ.get("POSTGRES_HOST", "localhost"),
+        "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+        "CONN_MAX_AGE": int(os.environ.get("DATABASE_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {},
     }
+    if int(os.environ.get("DATABASE_POOL_SIZE", 0)):
+        # The pool replaces persistent connections; Django requires this.
+        PRIMARY_DATABASE["CONN_MAX_AGE"] = 0
+        PRIMARY_DATABASE["OPTIONS"]["pool"] = {
+            "min_size": 1,
+            "max_size": int(os.environ["DATABASE_POOL_SIZE"]),
+            "timeout": int(os.environ.get("DATABASE_POOL_TIMEOUT", 10)),
+        }
+    DATABASES = {"default": PRIMARY_DATABASE}
+    for index, host in enumerate(
+        host for host in os.environ.get("DATABASE_REPLICA_HOSTS", "").split(",") if host
+    ):
+        DATABASES[f"replica_{index}"] = {
+            **PRIMARY_DATABASE,
+            "HOST": host,
+            "TEST": {"MIRROR": "default"},
+        }
+    DATABASE_READ_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+    SQLITE_WRITE_QUEUE = False
+else:
+    # "replica" is a second file standing in for a read replica in development
+    # and tests. Nothing copies data to it; it is only read from when listed in
+    # DATABASE_READ_REPLICAS.
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "db.sqlite3",
+            "OPTIONS": SQLITE_OPTIONS,
+        },
+        "replica": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "replica.sqlite3",
+            "OPTIONS": SQLITE_OPTIONS,
+        },
+    }
+    DATABASE_READ_REPLICAS = [
+        alias for alias in os.environ.get("DATABASE_READ_REPLICAS", "").split(",") if alias
+    ]
+
+DATABASE_ROUTERS = ["game_catalog.replicas.ReplicaRouter"]
+# Seconds a client's reads stay on the primary after it wrote.
+DATABASE_REPLICA_STICKINESS = int(os.environ.get("DATABASE_REPLICA_STICKINESS", 10))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CATALOG_CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "catalog": {
+        "BACKEND": CATALOG_CACHE_BACKENDS[os.environ.get("CATALOG_CACHE_BACKEND", "locmem")],
+        "LOCATION": os.environ.get("CATALOG_CACHE_LOCATION", "catalog"),
+        "TIMEOUT": int(os.environ.get("CATALOG_CACHE_TIMEOUT", 300)),
+    },
 }
 
 
@@ -103,6 +211,30 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password storage (game_catalog.passwords). New passwords are hashed with
+# PASSWORD_HASHER; the other hashers still verify existing hashes.
+PASSWORD_HASHER_CLASSES = {
+    "pbkdf2": "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "scrypt": "game_catalog.passwords.ScryptPasswordHasher",
+    # Requires argon2-cffi.
+    "argon2": "game_catalog.passwords.Argon2PasswordHasher",
+}
+PASSWORD_HASHER = os.environ.get("PASSWORD_HASHER", "pbkdf2")
+PASSWORD_HASHERS = [PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    path for name, path in PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER
+]
+PASSWORD_HASHER_PARAMS = {
+    # 16 MiB per hash.
+    "scrypt": {"work_factor": 2**14, "block_size": 8, "parallelism": 1},
+    # 19 MiB per hash, single lane: one core per hash, as workers are sized.
+    "argon2": {"time_cost": 2, "memory_cost": 19456, "parallelism": 1},
+}
+# Hash in a pool of this many processes (0: on the request thread), with at
+# most PASSWORD_HASHING_QUEUE hashes pending before signups get a 503.
+PASSWORD_HASHING_WORKERS = int(os.environ.get("PASSWORD_HASHING_WORKERS", 0))
+PASSWORD_HASHING_QUEUE = int(os.environ.get("PASSWORD_HASHING_QUEUE", 64))
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
 
@@ -125,9 +257,26 @@ STATIC_URL = "static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Request instrumentation: per-request query count and timings are exported
+# at /metrics/ and, when enabled, sent back in X-Query-Count / Server-Timing
+# response headers. /metrics/ only answers the client addresses listed in
+# METRICS_ALLOWED_IPS: loopback under DEBUG, nobody otherwise. Behind a proxy
+# on the same host every request comes from loopback, so list the scraper's
+# address only where it reaches the app directly.
+INSTRUMENTATION_HEADERS = os.environ.get(
+    "INSTRUMENTATION_HEADERS", str(DEBUG)
+).lower() in ("1", "true")
+METRICS_ALLOWED_IPS = [
+    ip
+    for ip in os.environ.get(
+        "METRICS_ALLOWED_IPS", "127.0.0.1,::1" if DEBUG else ""
+    ).split(",")
+    if ip
+]
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "game_catalog.authentication.ClaimsJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
@@ -135,6 +284,19 @@ REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
+SIMPLE_JWT = {
+    # Adds the username and is_staff claims read by ClaimsJWTAuthentication.
+    "TOKEN_OBTAIN_SERIALIZER": "game_catalog.serializers.ClaimsTokenObtainPairSerializer",
+}
+
+# Seconds for which a process trusts its cached is_active / is_staff of an
+# authenticated user (game_catalog.authentication).
+AUTH_USER_STATE_TTL = int(os.environ.get("AUTH_USER_STATE_TTL", 60))
+
+# Seconds a process keeps its in-memory genres and studios before reloading
+# them, for writes made by other processes (game_catalog.reference).
+REFERENCE_DATA_MAX_AGE = int(os.environ.get("REFERENCE_DATA_MAX_AGE", 5))
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Video Game Catalog API",
     "DESCRIPTION": "API documentation for managing games, users, and comments in the video game catalog.",
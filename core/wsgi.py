@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
 application = get_wsgi_application()
+
+# Load the genres and studios kept in memory before the first request.
+from game_catalog import reference  # noqa: E402
+
+reference.warm()
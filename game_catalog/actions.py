@@ -1,5 +1,117 @@
-def toggle_favorite(user, instance):
-    if user.favorited(instance):
-        user.favorite_games.remove(instance)
-    else:
-        user.favorite_games.add(instance)
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import cache, stats
+from .models import CustomUser, Game
+
+Favorite = CustomUser.favorite_games.through
+
+
+def toggle_favorite(user, game_id):
+    """Flip the favorite flag and return the new state."""
+    with transaction.atomic():
+        if _remove_favorite(user, game_id):
+            return False
+        _add_favorite(user, game_id)
+        return True
+
+
+def set_favorite(user, game_id, favorite):
+    """Idempotently put the favorite flag into the requested state."""
+    with transaction.atomic():
+        changed = (
+            _add_favorite(user, game_id) if favorite else _remove_favorite(user, game_id)
+        )
+    if not changed and not Game.objects.filter(pk=game_id).exists():
+        raise Game.DoesNotExist
+    return favorite
+
+
+def favorite_game_ids(user, games):
+    """Return which of ``games`` the user has favorited, in a single query."""
+    if not user.is_authenticated:
+        return set()
+    return set(
+        Favorite.objects.filter(
+            customuser_id=user.pk, game_id__in=[game.pk for game in games]
+        ).values_list("game_id", flat=True)
+    )
+
+
+async def afavorite_game_ids(user, games):
+    """Async version of favorite_game_ids()."""
+    if not user.is_authenticated:
+        return set()
+    favorites = Favorite.objects.filter(
+        customuser_id=user.pk, game_id__in=[game.pk for game in games]
+    ).values_list("game_id", flat=True)
+    return {game_id async for game_id in favorites}
+
+
+def _add_favorite(user, game_id):
+    # The counter update doubles as the existence check for the game, and the
+    # through-table unique constraint resolves concurrent double clicks.
+    try:
+        with transaction.atomic():
+            _bump_favorites_count(game_id, 1)
+            Favorite.objects.create(customuser_id=user.pk, game_id=game_id)
+    except IntegrityError:
+        return False
+    bump_user_favorites([user.pk], 1)
+    return True
+
+
+def _remove_favorite(user, game_id):
+    deleted, _ = Favorite.objects.filter(
+        customuser_id=user.pk, game_id=game_id
+    ).delete()
+    if deleted:
+        _bump_favorites_count(game_id, -1)
+        bump_user_favorites([user.pk], -1)
+    return bool(deleted)
+
+
+def _bump_favorites_count(game_id, delta):
+    updated = Game.objects.filter(pk=game_id).update(
+        favorites_count=F("favorites_count") + delta, updated_at=timezone.now()
+    )
+    if not updated:
+        raise Game.DoesNotExist
+    stats.favorites_changed(Game.objects.filter(pk=game_id), delta)
+    cache.invalidate("games")
+
+
+def bump_user_favorites(user_ids, delta):
+    """Follow a change of ``delta`` to the favorites of each of ``user_ids``."""
+    if delta and user_ids:
+        CustomUser.objects.filter(pk__in=user_ids).update(
+            favorites_count=F("favorites_count") + delta
+        )
+        cache.invalidate_users(user_ids)
+
+
+def rebuild_favorites_count():
+    favorites = (
+        Favorite.objects.filter(game_id=OuterRef("pk"))
+        .order_by()
+        .values("game_id")
+        .annotate(total=Count("*"))
+        .values("total")
+    )
+    updated = Game.objects.update(
+        favorites_count=Coalesce(Subquery(favorites), 0), updated_at=timezone.now()
+    )
+    stats.refresh_studio_favorites()
+    cache.invalidate("games")
+    user_favorites = (
+        Favorite.objects.filter(customuser_id=OuterRef("pk"))
+        .order_by()
+        .values("customuser_id")
+        .annotate(total=Count("*"))
+        .values("total")
+    )
+    CustomUser.objects.update(favorites_count=Coalesce(Subquery(user_favorites), 0))
+    cache.invalidate_users()
+    return updated
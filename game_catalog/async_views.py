@@ -0,0 +1,160 @@
+"""
+Native async views for the read-heavy catalog endpoints.
+
+DRF views are synchronous, so under ASGI every request to them borrows a
+thread. These views mirror the GET side of the corresponding viewsets
+(filters, ordering, keyset pagination and serializers) but run on the event
+loop, using the async ORM for queries. Serializers only run on data that is
+already loaded, so they are called directly.
+
+Authentication goes through the configured DRF authentication classes. The
+anonymous response cache and conditional GET of the sync views are not
+applied here.
+"""
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import actions, comment_buffer
+from .models import Comment, Game, Genre, Studio
+from .pagination import GameCommentPagination
+from .serializers import (
+    CommentSerializer,
+    GameListSerializer,
+    GameSerializer,
+    GenreSerializer,
+    StudioSerializer,
+)
+from .views import GameViewSet
+
+
+class AsyncAPIView(View):
+    """
+    Base class: wraps the request for DRF parsing and authentication, then
+    answers with the data returned by the subclass's
+    ``async def aget(self, request, *args, **kwargs)``.
+    """
+
+    authentication_required = False
+    # Read-only catalog views; see game_catalog.replicas.
+    replica_reads = True
+
+    async def get(self, request, *args, **kwargs):
+        request = Request(
+            request,
+            authenticators=[
+                auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+            ],
+        )
+        try:
+            # Token authentication may look the user up in the database.
+            user = await sync_to_async(lambda: request.user)()
+            if self.authentication_required and not user.is_authenticated:
+                raise exceptions.NotAuthenticated()
+            return self.respond(await self.aget(request, *args, **kwargs))
+        except exceptions.APIException as exc:
+            # Same body shape as DRF's exception handler.
+            detail = exc.detail
+            if not isinstance(detail, (list, dict)):
+                detail = {"detail": detail}
+            return self.respond(detail, status=exc.status_code)
+
+    def respond(self, data, status=200):
+        return JsonResponse(data, status=status, safe=False, encoder=JSONEncoder)
+
+
+class AsyncListView(AsyncAPIView):
+    queryset = None
+    serializer_class = None
+    pagination_class = None
+    filter_backends = ()
+
+    def get_queryset(self, request):
+        return self.queryset.all()
+
+    def filter_queryset(self, request, queryset):
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(request, queryset, self)
+        return queryset
+
+    async def aget(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(request, self.get_queryset(request))
+        if self.pagination_class is None:
+            rows = [row async for row in queryset]
+        else:
+            paginator = self.pagination_class()
+            rows = await paginator.apaginate_queryset(queryset, request, self)
+        context = await self.aget_serializer_context(request, rows)
+        data = self.serializer_class(rows, many=True, context=context).data
+        if self.pagination_class is None:
+            return data
+        return paginator.get_paginated_data(data)
+
+    async def aget_serializer_context(self, request, rows):
+        return {"request": request}
+
+
+class AsyncGenreListView(AsyncListView):
+    queryset = Genre.objects.all()
+    serializer_class = GenreSerializer
+
+
+class AsyncStudioListView(AsyncListView):
+    queryset = Studio.objects.all()
+    serializer_class = StudioSerializer
+
+
+class AsyncGameListView(AsyncListView):
+    queryset = GameViewSet.queryset
+    serializer_class = GameListSerializer
+    pagination_class = GameViewSet.pagination_class
+    filter_backends = GameViewSet.filter_backends
+    ordering_fields = GameViewSet.ordering_fields
+    ordering = GameViewSet.ordering
+
+    def get_queryset(self, request):
+        serializer = self.serializer_class(context={"request": request})
+        return serializer.optimize_queryset(self.queryset.all())
+
+    async def aget_serializer_context(self, request, rows):
+        serializer = self.serializer_class(context={"request": request})
+        await sync_to_async(serializer.attach_related)(rows)
+        return {
+            "request": request,
+            "favorite_ids": await actions.afavorite_game_ids(request.user, rows),
+        }
+
+
+class AsyncGameDetailView(AsyncAPIView):
+    async def aget(self, request, pk):
+        try:
+            game = await GameViewSet.queryset.aget(pk=pk)
+        except Game.DoesNotExist:
+            raise exceptions.NotFound("No Game matches the given query.")
+        context = {
+            "request": request,
+            "favorite_ids": await actions.afavorite_game_ids(request.user, [game]),
+        }
+        return GameSerializer(game, context=context).data
+
+
+class AsyncGameCommentListView(AsyncAPIView):
+    authentication_required = True
+
+    async def aget(self, request, pk):
+        paginator = GameCommentPagination()
+        page = await paginator.apaginate_queryset(
+            Comment.objects.filter(game_id=pk), request, self
+        )
+        if not page and not await Game.objects.filter(pk=pk).aexists():
+            raise exceptions.NotFound()
+        if not paginator.has_previous:
+            page = comment_buffer.overlay(
+                page, request.user, game_id=pk, newest_first=True
+            )
+        return paginator.get_paginated_data(CommentSerializer(page, many=True).data)
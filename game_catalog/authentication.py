@@ -0,0 +1,132 @@
+"""
+JWT authentication that does not load the user row on every request.
+
+Access tokens issued by the catalog carry ``username`` and ``is_staff``
+claims next to the user id, for clients to display. ClaimsJWTAuthentication
+returns a lazy user that answers ``pk``, ``is_staff`` and the authentication
+flags without a query and loads the CustomUser row only when a view touches
+any other attribute. ``username`` is one of those: the claim goes stale when
+the user is renamed, so responses take it from the row.
+
+Whether the user still exists and is active is checked against a small
+in-process cache, refreshed every ``AUTH_USER_STATE_TTL`` seconds. Saving or
+deleting a user drops its entry in the process that did it; other processes
+see the change once the entry expires. ``is_staff`` also comes from that
+cache rather than from the token, so demotions apply without waiting for
+the token to expire.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.functional import SimpleLazyObject
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+# Beyond this many users, expired entries are dropped before adding another.
+MAX_CACHED_USERS = 10000
+
+_lock = threading.Lock()
+_states = {}
+
+
+class ClaimsMixin:
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token["username"] = user.get_username()
+        token["is_staff"] = user.is_staff
+        return token
+
+
+class CatalogRefreshToken(ClaimsMixin, RefreshToken):
+    """Refresh token whose access tokens carry the user claims."""
+
+
+class CatalogAccessToken(ClaimsMixin, AccessToken):
+    pass
+
+
+class ClaimsUser(SimpleLazyObject):
+    """
+    The authenticated user, backed by its id and cached state. Anything else
+    loads the user from the database, once.
+    """
+
+    is_active = True
+    is_anonymous = False
+    is_authenticated = True
+
+    def __init__(self, user_id, token, state):
+        super().__init__(lambda: _load_user(user_id))
+        # Set through __dict__: LazyObject forwards attribute writes.
+        self.__dict__.update(
+            id=user_id, pk=user_id, is_staff=state["is_staff"], token=token
+        )
+
+    def __bool__(self):
+        # Permission classes test ``request.user and ...``.
+        return True
+
+    def __repr__(self):
+        return f"<ClaimsUser: {self.pk}>"
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            claim = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        user_id = get_user_model()._meta.pk.to_python(claim)
+
+        state = user_state(user_id)
+        if state is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if not state["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return ClaimsUser(user_id, validated_token, state)
+
+
+def user_state(user_id):
+    """``is_active`` and ``is_staff`` of a user, or None if it does not exist."""
+    now = time.monotonic()
+    with _lock:
+        cached = _states.get(user_id)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+
+    state = (
+        get_user_model()
+        .objects.filter(pk=user_id)
+        .values("is_active", "is_staff")
+        .first()
+    )
+    ttl = getattr(settings, "AUTH_USER_STATE_TTL", 60)
+    if ttl > 0:
+        with _lock:
+            if len(_states) >= MAX_CACHED_USERS:
+                expired = [key for key, entry in _states.items() if entry[0] <= now]
+                for key in expired:
+                    del _states[key]
+                if len(_states) >= MAX_CACHED_USERS:
+                    _states.clear()
+            _states[user_id] = (now + ttl, state)
+    return state
+
+
+def forget_user(user_id):
+    with _lock:
+        _states.pop(user_id, None)
+
+
+def _load_user(user_id):
+    try:
+        return get_user_model().objects.get(pk=user_id)
+    except get_user_model().DoesNotExist:
+        raise AuthenticationFailed(_("User not found"), code="user_not_found")
@@ -0,0 +1,118 @@
+from django.db import transaction
+from django.utils import timezone
+
+from . import cache, search, stats
+from .models import Game, Genre, Studio
+from .signals import CACHED_RESOURCES, touch_games
+
+BATCH_SIZE = 1000
+
+
+def create_objects(model, validated_data):
+    """Insert validated rows with bulk_create and link their m2m fields."""
+    links = _pop_links(model, validated_data)
+    objs = model.objects.bulk_create(
+        [model(**attrs) for attrs in validated_data], batch_size=BATCH_SIZE
+    )
+    _link(model, objs, links, replace=False)
+    after_write(model, [obj.pk for obj in objs], created=True)
+    return objs
+
+
+def update_objects(model, objs, validated_data):
+    """Apply validated changes to ``objs`` with one bulk_update per batch."""
+    links = _pop_links(model, validated_data)
+    # Games that move studio or change genres alter the stats of their old
+    # and new studio.
+    regrouped = [
+        obj
+        for obj, attrs, link in zip(objs, validated_data, links)
+        if model is Game and ("studio" in attrs or link)
+    ]
+    studio_ids = {obj.studio_id for obj in regrouped}
+    fields = set()
+    for obj, attrs in zip(objs, validated_data):
+        for name, value in attrs.items():
+            setattr(obj, name, value)
+        fields.update(attrs)
+    if fields and any(field.name == "updated_at" for field in model._meta.fields):
+        # bulk_update does not run auto_now.
+        now = timezone.now()
+        for obj in objs:
+            obj.updated_at = now
+        fields.add("updated_at")
+    if fields:
+        model.objects.bulk_update(objs, fields, batch_size=BATCH_SIZE)
+    _link(model, objs, links, replace=True)
+    studio_ids.update(obj.studio_id for obj in regrouped)
+    after_write(model, [obj.pk for obj in objs], created=False, studio_ids=studio_ids)
+    return objs
+
+
+def delete_objects(model, pks):
+    """Delete the rows that exist and report the ids that did not."""
+    with transaction.atomic():
+        found = set(model.objects.filter(pk__in=pks).values_list("pk", flat=True))
+        model.objects.filter(pk__in=found).delete()
+    return sorted(found), sorted(set(pks) - found)
+
+
+def batches(items, size=BATCH_SIZE):
+    """Split an iterable into lists of at most ``size`` items."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def after_write(model, pks, created, studio_ids=()):
+    # bulk_create/bulk_update send no model signals, so do their work here.
+    cache.invalidate(CACHED_RESOURCES[model])
+    if model is Game:
+        search.index_games(pks)
+        if created:
+            stats.games_added(pks)
+        else:
+            stats.refresh_studios(studio_ids)
+    elif not created and model is Studio:
+        touch_games(Game.objects.filter(studio__in=pks))
+    elif not created and model is Genre:
+        touch_games(Game.objects.filter(genre__in=pks))
+
+
+def _many_to_many_names(model):
+    return [field.name for field in model._meta.many_to_many]
+
+
+def _pop_links(model, validated_data):
+    names = _many_to_many_names(model)
+    return [
+        {name: attrs.pop(name) for name in names if name in attrs}
+        for attrs in validated_data
+    ]
+
+
+def _link(model, objs, links, replace):
+    for name in _many_to_many_names(model):
+        field = model._meta.get_field(name)
+        through = field.remote_field.through
+        source, target = field.m2m_field_name(), field.m2m_reverse_field_name()
+        linked = [(obj, link[name]) for obj, link in zip(objs, links) if name in link]
+        if not linked:
+            continue
+        if replace:
+            through.objects.filter(
+                **{f"{source}__in": [obj.pk for obj, _ in linked]}
+            ).delete()
+        through.objects.bulk_create(
+            [
+                through(**{f"{source}_id": obj.pk, f"{target}_id": pk})
+                for obj, related in linked
+                for pk in {item.pk for item in related}
+            ],
+            batch_size=BATCH_SIZE,
+        )
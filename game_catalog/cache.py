@@ -0,0 +1,151 @@
+import hashlib
+import time
+
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from . import replicas
+
+CACHE_ALIAS = "catalog"
+
+# Rendered games embed their studio and genres, so those bump games as well.
+DEPENDENT_RESOURCES = {
+    "games": ("games",),
+    "genres": ("genres", "games"),
+    "studios": ("studios", "games"),
+}
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def get_version(resource):
+    cache = get_cache()
+    key = f"catalog:version:{resource}"
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted counter never falls back to a
+        # version that still has entries cached under it.
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate(resource):
+    for name in DEPENDENT_RESOURCES[resource]:
+        _bump_version(name)
+
+
+def user_key(user_id):
+    """Key of a user's cached profile, which changes with invalidate_users()."""
+    versions = (get_version("users"), get_version(f"user:{user_id}"))
+    return f"catalog:user:{user_id}:{versions[0]}:{versions[1]}"
+
+
+def invalidate_users(user_ids=None):
+    """Drop the cached profiles of the given users, or of everyone."""
+    if user_ids is None:
+        _bump_version("users")
+    for user_id in user_ids or ():
+        _bump_version(f"user:{user_id}")
+
+
+def _bump_version(name):
+    # Only once the write is visible: bumping earlier would let a concurrent
+    # read cache the old rows under the new version.
+    transaction.on_commit(lambda: _incr_version(name))
+
+
+def _incr_version(name):
+    cache = get_cache()
+    key = f"catalog:version:{name}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def response_key(resource, request, kind="response"):
+    digest = hashlib.sha256(request.get_full_path().encode()).hexdigest()
+    return f"catalog:{kind}:{resource}:{get_version(resource)}:{digest}"
+
+
+def cached_value(resource, request, kind, compute):
+    """
+    Memoize ``compute()`` for the current version of ``resource``.
+
+    While reads go to a replica the cache is bypassed: a value computed there
+    may predate the current version, and a cached one may be newer than the
+    rows the rest of the request reads.
+    """
+    if replicas.reading_from_replica():
+        return compute()
+    key = response_key(resource, request, kind)
+    value = get_cache().get(key)
+    if value is None:
+        value = compute()
+        get_cache().set(key, value)
+    return value
+
+
+def record(resource, hit):
+    cache = get_cache()
+    key = f"catalog:stats:{resource}:{'hits' if hit else 'misses'}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def stats():
+    cache = get_cache()
+    result = {}
+    for resource in DEPENDENT_RESOURCES:
+        hits = cache.get(f"catalog:stats:{resource}:hits", 0)
+        misses = cache.get(f"catalog:stats:{resource}:misses", 0)
+        total = hits + misses
+        result[resource] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / total if total else None,
+        }
+    return result
+
+
+class CachedResponseMixin:
+    """
+    Serves anonymous list/retrieve responses from the catalog cache.
+
+    Entries are keyed by resource version and full path, so writes invalidate
+    them by bumping the version instead of deleting keys. They are always
+    rendered from the primary, since a lagging replica could store old rows
+    under the current version.
+    """
+
+    cache_resource = None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+
+        key = response_key(self.cache_resource, request)
+        cached = get_cache().get(key)
+        record(self.cache_resource, hit=cached is not None)
+        if cached is not None:
+            data, status = cached
+            return Response(data, status=status)
+
+        with replicas.replica_reads(False):
+            response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            get_cache().set(key, (response.data, response.status_code))
+        return response
@@ -0,0 +1,195 @@
+"""
+Write-behind buffer for new comments.
+
+With ``COMMENT_WRITE_BEHIND`` on, a comment POST is validated, accepted
+into this process's buffer and answered with 202 and the comment's ``uuid``.
+A background thread inserts the buffered comments with one bulk_create
+every ``COMMENT_FLUSH_INTERVAL`` milliseconds, or as soon as
+``COMMENT_FLUSH_SIZE`` of them are waiting. It then updates the comment
+rollups that the post_save signal would have updated. ``post_date`` is the
+time of the insert, so that neither the comment feeds, paged by post_date,
+nor the leaderboard window skip a comment; until then it is null, like the
+``id``.
+
+Until a comment is inserted, its author sees it in their feeds through
+overlay(). On a graceful shutdown the buffer is flushed before the process
+exits, with a few attempts; comments that still could not be inserted are
+logged in full so that they can be recovered. A failed flush puts its
+comments back into the buffer to be retried. Comments whose game or author
+was deleted in the meantime are dropped.
+"""
+
+import atexit
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from . import stats, writes
+from .models import Comment, Game
+
+logger = logging.getLogger(__name__)
+
+# Flushes tried at shutdown before the remaining comments are given up on.
+SHUTDOWN_ATTEMPTS = 3
+SHUTDOWN_RETRY_DELAY = 0.5
+
+_lock = threading.Condition()
+_flush_lock = threading.Lock()
+_pending = []
+_inserting = []
+_flusher = None
+_stopping = False
+
+
+def enabled():
+    return getattr(settings, "COMMENT_WRITE_BEHIND", False)
+
+
+def add(comment):
+    """Accept an unsaved comment for a later insert and return it."""
+    with _lock:
+        _pending.append(comment)
+        if len(_pending) >= getattr(settings, "COMMENT_FLUSH_SIZE", 500):
+            _lock.notify()
+    _start()
+    return comment
+
+
+def pending(user_id, game_id=None):
+    """The user's comments that are not inserted yet, oldest first."""
+    with _lock:
+        return [
+            comment
+            for comment in (*_inserting, *_pending)
+            if comment.user_id == user_id
+            and (game_id is None or comment.game_id == int(game_id))
+        ]
+
+
+def overlay(page, user, game_id=None, newest_first=False):
+    """
+    Add the user's pending comments to a page of their feed: before the rows
+    when it is ordered newest first, after them otherwise.
+    """
+    if not user.is_authenticated or not (_pending or _inserting):
+        return page
+    shown = {comment.uuid for comment in page}
+    extra = [
+        comment
+        for comment in pending(user.pk, game_id)
+        if comment.uuid not in shown
+    ]
+    if newest_first:
+        return extra[::-1] + list(page)
+    return list(page) + extra
+
+
+def flush():
+    """Insert the buffered comments now and return how many were written."""
+    with _flush_lock:
+        with _lock:
+            _inserting[:] = _pending
+            _pending.clear()
+        if not _inserting:
+            return 0
+        try:
+            return writes.run(_insert, list(_inserting))
+        except Exception:
+            with _lock:
+                _pending[:0] = _inserting
+            raise
+        finally:
+            with _lock:
+                _inserting.clear()
+
+
+def _insert(comments):
+    games = set(
+        Game.objects.filter(
+            pk__in={comment.game_id for comment in comments}
+        ).values_list("pk", flat=True)
+    )
+    users = set(
+        get_user_model()
+        .objects.filter(pk__in={comment.user_id for comment in comments})
+        .values_list("pk", flat=True)
+    )
+    comments = [
+        comment
+        for comment in comments
+        if comment.game_id in games and comment.user_id in users
+    ]
+    with transaction.atomic():
+        Comment.objects.bulk_create(comments)
+        if comments:
+            stats.comments_added(comments)
+    return len(comments)
+
+
+def _start():
+    global _flusher
+    with _lock:
+        if _flusher is None and not _stopping:
+            _flusher = threading.Thread(
+                target=_flush_periodically, name="comment-flusher", daemon=True
+            )
+            _flusher.start()
+
+
+def _flush_periodically():
+    while True:
+        with _lock:
+            _lock.wait_for(
+                lambda: _stopping
+                or len(_pending) >= getattr(settings, "COMMENT_FLUSH_SIZE", 500),
+                timeout=getattr(settings, "COMMENT_FLUSH_INTERVAL", 200) / 1000,
+            )
+            if _stopping:
+                return
+        try:
+            flush()
+        except Exception:
+            logger.exception("Inserting buffered comments failed, will retry")
+
+
+@atexit.register
+def shutdown():
+    """Stop the background thread and insert what is left in the buffer."""
+    global _flusher, _stopping
+    with _lock:
+        _stopping = True
+        flusher, _flusher = _flusher, None
+        _lock.notify_all()
+    if flusher is not None:
+        flusher.join()
+    try:
+        for attempt in range(SHUTDOWN_ATTEMPTS):
+            if attempt:
+                time.sleep(SHUTDOWN_RETRY_DELAY)
+            try:
+                flush()
+                return
+            except Exception:
+                logger.exception("Inserting buffered comments at shutdown failed")
+        with _lock:
+            lost, _pending[:] = list(_pending), []
+        for comment in lost:
+            logger.error(
+                "Buffered comment not inserted: %s",
+                json.dumps(
+                    {
+                        "uuid": str(comment.uuid),
+                        "user": comment.user_id,
+                        "game": comment.game_id,
+                        "text": comment.text,
+                    }
+                ),
+            )
+    finally:
+        with _lock:
+            _stopping = False
@@ -0,0 +1,81 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from . import cache
+
+
+class ConditionalGetMixin:
+    """
+    Answers If-None-Match / If-Modified-Since on list and retrieve.
+
+    Validators come from an aggregate over ``updated_at`` (and the row count, so
+    deletions change the ETag) instead of the rendered body, which lets a
+    matching request return 304 without running the serializer. With a
+    ``cache_resource`` the aggregate itself is memoized per resource version.
+
+    Lists get an ETag only: deleting a row other than the newest leaves their
+    latest ``updated_at`` unchanged, so a Last-Modified date would answer
+    If-Modified-Since with 304 after a deletion.
+    """
+
+    def list(self, request, *args, **kwargs):
+        def compute():
+            state = (
+                self.filter_queryset(self.get_queryset())
+                .order_by()
+                .aggregate(last_modified=Max("updated_at"), count=Count("pk"))
+            )
+            return state["last_modified"], state["count"]
+
+        return self.conditional_response(
+            compute, super().list, request, *args, dated=False, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        def compute():
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            last_modified = (
+                self.get_queryset()
+                .prefetch_related(None)
+                .filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+                .values_list("updated_at", flat=True)
+                .first()
+            )
+            return last_modified, int(last_modified is not None)
+
+        return self.conditional_response(
+            compute, super().retrieve, request, *args, **kwargs
+        )
+
+    def conditional_response(
+        self, compute, handler, request, *args, dated=True, **kwargs
+    ):
+        resource = getattr(self, "cache_resource", None)
+        if resource is None:
+            last_modified, count = compute()
+        else:
+            last_modified, count = cache.cached_value(
+                resource, request, "validators", compute
+            )
+        if not count:
+            return handler(request, *args, **kwargs)
+
+        # Representations can depend on the user (e.g. is_favorited).
+        fingerprint = "|".join(
+            map(str, (request.get_full_path(), request.user.pk, last_modified, count))
+        )
+        etag = quote_etag(hashlib.md5(fingerprint.encode()).hexdigest())
+        timestamp = int(last_modified.timestamp()) if dated else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response.headers["ETag"] = etag
+            if dated:
+                response.headers["Last-Modified"] = http_date(timestamp)
+            patch_vary_headers(response, ["Authorization"])
+        return response
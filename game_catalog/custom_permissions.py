@@ -17,4 +17,5 @@ class IsAuthenticatedOrReadOnly(BasePermission):
 
 class IsOwnerOrAdmin(BasePermission):
     def has_object_permission(self, request, view, obj):
-        return request.user == obj.user or request.user.is_staff
+        # Ids, so that neither user needs loading.
+        return obj.user_id == request.user.pk or request.user.is_staff
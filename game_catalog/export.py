@@ -0,0 +1,119 @@
+import csv
+import io
+import json
+import zlib
+
+from django.db.models import Prefetch
+
+from .models import Game, Genre
+
+DEFAULT_CHUNK_SIZE = 2000
+BUFFER_SIZE = 64 * 1024
+
+CSV_COLUMNS = [
+    "id",
+    "name",
+    "description",
+    "release_date",
+    "studio_id",
+    "studio_name",
+    "studio_country",
+    "studio_founded_date",
+    "genres",
+]
+CONTENT_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def iter_games(after_id=0, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Games in id order after ``after_id``, read chunk by chunk.
+
+    ``iterator()`` uses a server-side cursor where the database supports it
+    and runs the genre prefetch once per chunk, so memory stays flat.
+    """
+    genres = Genre.objects.only("id", "name")
+    return (
+        Game.objects.filter(pk__gt=after_id)
+        .order_by("pk")
+        .select_related("studio")
+        .prefetch_related(Prefetch("genre", queryset=genres))
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def game_record(game):
+    studio = game.studio
+    return {
+        "id": game.pk,
+        "name": game.name,
+        "description": game.description,
+        "release_date": game.release_date.isoformat(),
+        "studio": {
+            "id": studio.pk,
+            "name": studio.name,
+            "country": studio.country,
+            "founded_date": studio.founded_date.isoformat(),
+        },
+        "genres": [genre.name for genre in game.genre.all()],
+    }
+
+
+def ndjson_lines(games):
+    for game in games:
+        yield json.dumps(game_record(game), separators=(",", ":")) + "\n"
+
+
+def csv_lines(games):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for game in games:
+        record = game_record(game)
+        studio = record["studio"]
+        writer.writerow(
+            [
+                record["id"],
+                record["name"],
+                record["description"],
+                record["release_date"],
+                studio["id"],
+                studio["name"],
+                studio["country"],
+                studio["founded_date"],
+                "|".join(record["genres"]),
+            ]
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+WRITERS = {"ndjson": ndjson_lines, "csv": csv_lines}
+
+
+def stream(export_format, after_id=0, chunk_size=DEFAULT_CHUNK_SIZE, compress=False):
+    """Yield the export as byte blocks, gzip-compressed on the fly if asked."""
+    lines = WRITERS[export_format](iter_games(after_id, chunk_size))
+    blocks = _buffered(line.encode() for line in lines)
+    return _gzip(blocks) if compress else blocks
+
+
+def _buffered(chunks):
+    pending, size = [], 0
+    for chunk in chunks:
+        pending.append(chunk)
+        size += len(chunk)
+        if size >= BUFFER_SIZE:
+            yield b"".join(pending)
+            pending, size = [], 0
+    if pending:
+        yield b"".join(pending)
+
+
+def _gzip(blocks):
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for block in blocks:
+        data = compressor.compress(block)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,216 @@
+import csv
+import gzip
+import io
+import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.db import DatabaseError, transaction
+from rest_framework import serializers
+
+from . import bulk, export
+from .models import Game, Genre, Studio
+
+DEFAULT_BATCH_SIZE = 1000
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+class StudioRecordSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=100)
+    country = serializers.CharField(max_length=100)
+    founded_date = serializers.DateField()
+
+
+class GameRecordSerializer(serializers.Serializer):
+    """
+    One exported game. Validation does not touch the database, so it can run
+    in worker processes.
+    """
+
+    name = serializers.CharField(max_length=100)
+    description = serializers.CharField(allow_blank=True, default="")
+    release_date = serializers.DateField()
+    studio = StudioRecordSerializer()
+    genres = serializers.ListField(
+        child=serializers.CharField(max_length=100), default=list
+    )
+
+
+def detect_format(path):
+    name = path.lower().removesuffix(".gz")
+    return "csv" if name.endswith(".csv") else "ndjson"
+
+
+def open_text(path):
+    """Open ``path`` for streaming text reads, gunzipping it if needed."""
+    raw = open(path, "rb")
+    if raw.peek(2)[:2] == GZIP_MAGIC:
+        raw = gzip.GzipFile(fileobj=raw)
+    return io.TextIOWrapper(raw, encoding="utf-8", newline="")
+
+
+def read_rows(stream, import_format):
+    """Yield ``(line_number, raw_row)`` without parsing the rows yet."""
+    if import_format == "csv":
+        reader = csv.reader(stream)
+        if next(reader, None) != export.CSV_COLUMNS:
+            raise ValueError(
+                f"Expected the CSV header {','.join(export.CSV_COLUMNS)}."
+            )
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_number, line in enumerate(stream, start=1):
+            if line.strip():
+                yield line_number, line
+
+
+def parse_batch(import_format, rows):
+    """
+    Decode and validate raw rows; returns ``(records, errors)`` where errors
+    are ``(line_number, detail)`` pairs.
+    """
+    records, errors = [], []
+    for line_number, raw in rows:
+        try:
+            data = _csv_record(raw) if import_format == "csv" else json.loads(raw)
+        except ValueError as exc:
+            errors.append((line_number, {"non_field_errors": [str(exc)]}))
+            continue
+        serializer = GameRecordSerializer(data=data)
+        if serializer.is_valid():
+            records.append((line_number, serializer.validated_data))
+        else:
+            errors.append((line_number, serializer.errors))
+    return records, errors
+
+
+def _csv_record(values):
+    if len(values) != len(export.CSV_COLUMNS):
+        raise ValueError("Row does not match the CSV header.")
+    row = dict(zip(export.CSV_COLUMNS, values))
+    return {
+        "name": row["name"],
+        "description": row["description"],
+        "release_date": row["release_date"],
+        "studio": {
+            "name": row["studio_name"],
+            "country": row["studio_country"],
+            "founded_date": row["studio_founded_date"],
+        },
+        "genres": [name for name in row["genres"].split("|") if name],
+    }
+
+
+def write_batch(records):
+    """
+    Upsert the studios and genres of ``records`` by name and create their
+    games, all in one transaction. Returns the number of games created.
+    """
+    if not records:
+        return 0
+    with transaction.atomic():
+        studios = _upsert_studios(attrs["studio"] for _, attrs in records)
+        genres = _upsert_genres(
+            name for _, attrs in records for name in attrs["genres"]
+        )
+        games = bulk.create_objects(
+            Game,
+            [
+                {
+                    "name": attrs["name"],
+                    "description": attrs["description"],
+                    "release_date": attrs["release_date"],
+                    "studio": studios[attrs["studio"]["name"]],
+                    "genre": [genres[name] for name in attrs["genres"]],
+                }
+                for _, attrs in records
+            ],
+        )
+    return len(games)
+
+
+def _upsert_studios(rows):
+    wanted = {row["name"]: row for row in rows}
+    studios = {}
+    # Studio names are not unique; the oldest studio of a name owns it.
+    for studio in Studio.objects.filter(name__in=wanted).order_by("-pk"):
+        studios[studio.name] = studio
+
+    changed = [
+        studio
+        for name, studio in studios.items()
+        if (studio.country, studio.founded_date)
+        != (wanted[name]["country"], wanted[name]["founded_date"])
+    ]
+    if changed:
+        bulk.update_objects(
+            Studio,
+            changed,
+            [
+                {
+                    "country": wanted[studio.name]["country"],
+                    "founded_date": wanted[studio.name]["founded_date"],
+                }
+                for studio in changed
+            ],
+        )
+
+    missing = [
+        {"description": "", **row}
+        for name, row in wanted.items()
+        if name not in studios
+    ]
+    if missing:
+        for studio in bulk.create_objects(Studio, missing):
+            studios[studio.name] = studio
+    return studios
+
+
+def _upsert_genres(names):
+    names = set(names)
+    if not names:
+        return {}
+    genres = Genre.objects.in_bulk(names, field_name="name")
+    missing = [{"name": name, "description": ""} for name in names - genres.keys()]
+    if missing:
+        for genre in bulk.create_objects(Genre, missing):
+            genres[genre.name] = genre
+    return genres
+
+
+def run(rows, import_format, batch_size=DEFAULT_BATCH_SIZE, workers=0):
+    """
+    Parse and write ``rows`` batch by batch, yielding ``(created, errors)``
+    per batch in input order.
+
+    With ``workers`` the parsing runs in a process pool. At most two batches
+    per worker are in flight, so memory stays bounded however long the input.
+    """
+    chunks = bulk.batches(rows, batch_size)
+    if not workers:
+        for chunk in chunks:
+            yield _write(*parse_batch(import_format, chunk))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(parse_batch, import_format, chunk))
+            if len(pending) >= workers * 2:
+                yield _write(*pending.popleft().result())
+        while pending:
+            yield _write(*pending.popleft().result())
+
+
+def _write(records, errors):
+    try:
+        created = write_batch(records)
+    except DatabaseError as exc:
+        created = 0
+        errors = errors + [
+            (line_number, {"non_field_errors": [str(exc)]})
+            for line_number, _ in records
+        ]
+    return created, errors
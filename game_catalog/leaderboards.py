@@ -0,0 +1,143 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .bulk import BATCH_SIZE, batches
+from .models import Comment, Game, LeaderboardEntry, LeaderboardRefresh
+
+GameGenre = Game.genre.through
+
+BOARDS = [choice for choice, _ in LeaderboardEntry.BOARD_CHOICES]
+WINDOWS = {
+    LeaderboardEntry.COMMENTS_7D: timedelta(days=7),
+    LeaderboardEntry.COMMENTS_30D: timedelta(days=30),
+}
+# Incremental refreshes re-read a little before the watermark so rows that
+# committed late with an older timestamp are still seen; rescoring is
+# idempotent, so the overlap only costs a few extra rows.
+OVERLAP = timedelta(minutes=5)
+
+
+def refresh(boards=None, full=False):
+    """
+    Bring the leaderboards up to date and return how many games were
+    rescored per board.
+
+    All-time boards only rescore games touched since the last refresh:
+    games whose ``updated_at`` moved (favorites and genre changes touch it)
+    and games with new comments. Deleted comments are only reconciled by a
+    full refresh. Rolling windows are rebuilt from the comments inside the
+    window, which the post_date index reads as one range.
+    """
+    now = timezone.now()
+    rescored = {}
+    for board in boards or BOARDS:
+        with transaction.atomic():
+            watermark = (
+                LeaderboardRefresh.objects.select_for_update()
+                .filter(board=board)
+                .values_list("refreshed_at", flat=True)
+                .first()
+            )
+            since = None if full or watermark is None else watermark - OVERLAP
+            if board in WINDOWS:
+                rescored[board] = _refresh_window(board, now - WINDOWS[board])
+            elif board == LeaderboardEntry.FAVORITES:
+                rescored[board] = _refresh_favorites(since)
+            else:
+                rescored[board] = _refresh_comments(since)
+            LeaderboardRefresh.objects.update_or_create(
+                board=board, defaults={"refreshed_at": now}
+            )
+    return rescored
+
+
+def _refresh_favorites(since):
+    if since is None:
+        scores = Game.objects.filter(favorites_count__gt=0)
+        return _store(LeaderboardEntry.FAVORITES, _scores(scores), replace=True)
+    games = Game.objects.filter(updated_at__gte=since)
+    return _store(LeaderboardEntry.FAVORITES, _scores(games), replace=False)
+
+
+def _scores(games):
+    rows = games.values_list("id", "favorites_count").iterator(chunk_size=BATCH_SIZE)
+    return (dict(chunk) for chunk in batches(rows))
+
+
+def _refresh_comments(since):
+    if since is None:
+        counts = Comment.objects.values_list("game").annotate(score=Count("id"))
+        return _store(
+            LeaderboardEntry.COMMENTS,
+            (dict(chunk) for chunk in batches(counts.order_by().iterator())),
+            replace=True,
+        )
+
+    commented = Comment.objects.filter(post_date__gte=since).values_list(
+        "game_id", flat=True
+    )
+    updated = Game.objects.filter(updated_at__gte=since).values_list("id", flat=True)
+    game_ids = set(commented) | set(updated)
+    return _store(
+        LeaderboardEntry.COMMENTS,
+        (_comment_counts(chunk) for chunk in batches(sorted(game_ids))),
+        replace=False,
+    )
+
+
+def _comment_counts(game_ids):
+    counts = dict.fromkeys(game_ids, 0)
+    counts.update(
+        Comment.objects.filter(game_id__in=game_ids)
+        .values_list("game")
+        .annotate(score=Count("id"))
+        .order_by()
+    )
+    return counts
+
+
+def _refresh_window(board, start):
+    counts = (
+        Comment.objects.filter(post_date__gte=start)
+        .values_list("game")
+        .annotate(score=Count("id"))
+        .order_by()
+    )
+    return _store(
+        board, (dict(chunk) for chunk in batches(counts.iterator())), replace=True
+    )
+
+
+def _store(board, chunks, replace):
+    """
+    Write ``{game_id: score}`` chunks to ``board``, once for all games and
+    once per genre of each game. With ``replace`` the board is emptied first;
+    otherwise only the entries of the games in each chunk are replaced.
+    """
+    entries = LeaderboardEntry.objects.filter(board=board)
+    if replace:
+        entries.delete()
+    total = 0
+    for scores in chunks:
+        if not replace:
+            entries.filter(game_id__in=list(scores)).delete()
+        ranked = {game_id: score for game_id, score in scores.items() if score > 0}
+        genres = GameGenre.objects.filter(game_id__in=list(ranked)).values_list(
+            "game_id", "genre_id"
+        )
+        rows = [
+            LeaderboardEntry(board=board, game_id=game_id, score=score)
+            for game_id, score in ranked.items()
+        ]
+        rows.extend(
+            LeaderboardEntry(
+                board=board, genre_id=genre_id, game_id=game_id, score=ranked[game_id]
+            )
+            for game_id, genre_id in genres
+        )
+        LeaderboardEntry.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        total += len(scores)
+    return total
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from game_catalog import stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the statistics rollups with the catalog tables and report rows "
+        "that drifted. Exits with an error if any did."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit", type=int, default=20, help="Rows to show per table."
+        )
+
+    def handle(self, *args, **options):
+        problems = stats.check()
+        for table, rows in problems.items():
+            self.stdout.write(f"{table}: {len(rows)} rows differ")
+            for key, expected, stored in rows[: options["limit"]]:
+                self.stdout.write(f"  {key}: expected {expected}, stored {stored}")
+        if problems:
+            raise CommandError("Statistics rollups drifted; run rebuild_stats.")
+        self.stdout.write(self.style.SUCCESS("Statistics rollups are consistent."))
@@ -0,0 +1,46 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from game_catalog import export
+
+
+class Command(BaseCommand):
+    help = "Stream every game with its studio and genres as NDJSON or CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "output", nargs="?", default="-", help="Output file, - for stdout."
+        )
+        parser.add_argument(
+            "--format", choices=sorted(export.WRITERS), default="ndjson"
+        )
+        parser.add_argument("--gzip", action="store_true", help="Gzip the output.")
+        parser.add_argument(
+            "--after-id", type=int, default=0, help="Resume after this game id."
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=export.DEFAULT_CHUNK_SIZE
+        )
+
+    def handle(self, *args, **options):
+        blocks = export.stream(
+            options["format"],
+            after_id=options["after_id"],
+            chunk_size=options["chunk_size"],
+            compress=options["gzip"],
+        )
+        if options["output"] != "-":
+            with open(options["output"], "wb") as output:
+                for block in blocks:
+                    output.write(block)
+            self.stderr.write(self.style.SUCCESS(f"Exported to {options['output']}."))
+        elif options["gzip"]:
+            if sys.stdout.isatty():
+                raise CommandError("Refusing to write gzip data to a terminal.")
+            for block in blocks:
+                sys.stdout.buffer.write(block)
+            sys.stdout.buffer.flush()
+        else:
+            for block in blocks:
+                self.stdout.write(block.decode(), ending="")
@@ -0,0 +1,87 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from game_catalog import importer
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream games with their studio and genres from an NDJSON or CSV file "
+        "(optionally gzipped), upserting studios and genres by name."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help="File written by export_catalog.")
+        parser.add_argument(
+            "--format",
+            choices=["ndjson", "csv"],
+            help="Input format; guessed from the file name by default.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=importer.DEFAULT_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=0,
+            help="Processes parsing and validating rows; 0 parses in-process.",
+        )
+        parser.add_argument(
+            "--errors", help="Write rejected rows as NDJSON here instead of stderr."
+        )
+        parser.add_argument(
+            "--report-every",
+            type=int,
+            default=50000,
+            help="Print progress after about this many rows.",
+        )
+
+    def handle(self, *args, **options):
+        import_format = options["format"] or importer.detect_format(options["input"])
+        try:
+            stream = importer.open_text(options["input"])
+        except OSError as exc:
+            raise CommandError(exc)
+        error_log = open(options["errors"], "w") if options["errors"] else None
+
+        started = time.monotonic()
+        created = failed = reported = 0
+        try:
+            rows = importer.read_rows(stream, import_format)
+            batches = importer.run(
+                rows,
+                import_format,
+                batch_size=options["batch_size"],
+                workers=options["workers"],
+            )
+            for batch_created, errors in batches:
+                created += batch_created
+                failed += len(errors)
+                for line_number, detail in errors:
+                    line = json.dumps({"line": line_number, "errors": detail})
+                    if error_log:
+                        error_log.write(line + "\n")
+                    else:
+                        self.stderr.write(line)
+                if created + failed - reported >= options["report_every"]:
+                    reported = created + failed
+                    self.stdout.write(self._progress(created, failed, started))
+        except ValueError as exc:
+            raise CommandError(exc)
+        finally:
+            stream.close()
+            if error_log:
+                error_log.close()
+
+        self.stdout.write(self.style.SUCCESS(self._progress(created, failed, started)))
+
+    def _progress(self, created, failed, started):
+        elapsed = max(time.monotonic() - started, sys.float_info.epsilon)
+        rate = (created + failed) / elapsed
+        return (
+            f"Imported {created} games, rejected {failed} rows "
+            f"in {elapsed:.1f}s ({rate:.0f} rows/s)."
+        )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from game_catalog import actions
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Game.favorites_count and CustomUser.favorites_count from the "
+        "favorites through-table."
+    )
+
+    def handle(self, *args, **options):
+        updated = actions.rebuild_favorites_count()
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt favorites count for {updated} games.")
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from game_catalog import search
+
+
+class Command(BaseCommand):
+    help = "Recreate the game full-text search index from the catalog tables."
+
+    def handle(self, *args, **options):
+        indexed = search.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} games."))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from game_catalog import stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the game and studio statistics rollups from scratch."
+
+    def handle(self, *args, **options):
+        written = stats.rebuild()
+        for table, rows in written.items():
+            self.stdout.write(self.style.SUCCESS(f"{table}: {rows} rows."))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from game_catalog import leaderboards
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh the precomputed game leaderboards from favorites and comments. "
+        "Run it on a schedule; pass --full now and then to reconcile deleted "
+        "comments."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--board",
+            action="append",
+            choices=leaderboards.BOARDS,
+            help="Refresh only this board; may be repeated.",
+        )
+        parser.add_argument(
+            "--full", action="store_true", help="Rebuild instead of catching up."
+        )
+
+    def handle(self, *args, **options):
+        rescored = leaderboards.refresh(options["board"], full=options["full"])
+        for board, count in rescored.items():
+            self.stdout.write(self.style.SUCCESS(f"{board}: rescored {count} games."))
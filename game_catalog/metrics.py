@@ -0,0 +1,122 @@
+"""
+In-process request metrics, fed by InstrumentationMiddleware and exposed in
+the Prometheus text format.
+
+Series are kept per process; with several workers, scrape each of them.
+"""
+
+import threading
+
+from django.conf import settings
+from django.dispatch import Signal
+from django.http import Http404, HttpResponse
+
+# Upper bounds, in seconds, of the request duration histogram buckets.
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Sent for every measured request with ``measurement``, a dict holding view,
+# method, status, queries, db_time, serialize_time, render_time, size and
+# duration.
+request_measured = Signal()
+
+_lock = threading.Lock()
+_series = {}
+
+
+def observe(measurement):
+    key = (measurement["view"], measurement["method"])
+    with _lock:
+        series = _series.setdefault(
+            key,
+            {
+                "statuses": {},
+                "queries": 0,
+                "db_time": 0.0,
+                "serialize_time": 0.0,
+                "render_time": 0.0,
+                "size": 0,
+                "duration": 0.0,
+                "buckets": [0] * len(DURATION_BUCKETS),
+            },
+        )
+        status = measurement["status"]
+        series["statuses"][status] = series["statuses"].get(status, 0) + 1
+        for name in (
+            "queries",
+            "db_time",
+            "serialize_time",
+            "render_time",
+            "size",
+            "duration",
+        ):
+            series[name] += measurement[name] or 0
+        for index, bound in enumerate(DURATION_BUCKETS):
+            if measurement["duration"] <= bound:
+                series["buckets"][index] += 1
+    request_measured.send(sender=None, measurement=measurement)
+
+
+def reset():
+    with _lock:
+        _series.clear()
+
+
+def render():
+    """The collected series in the Prometheus text exposition format."""
+    with _lock:
+        series = {key: dict(values) for key, values in _series.items()}
+
+    lines = []
+
+    def family(name, kind, help_text):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    family("catalog_requests_total", "counter", "Requests by view, method and status.")
+    for (view, method), values in sorted(series.items()):
+        for status, count in sorted(values["statuses"].items()):
+            labels = _labels(view=view, method=method, status=status)
+            lines.append(f"catalog_requests_total{{{labels}}} {count}")
+
+    totals = [
+        ("catalog_db_queries_total", "queries", "SQL queries run by requests."),
+        ("catalog_db_seconds_total", "db_time", "Time spent in SQL queries."),
+        (
+            "catalog_serialize_seconds_total",
+            "serialize_time",
+            "Time spent in serializers.",
+        ),
+        ("catalog_render_seconds_total", "render_time", "Time spent rendering."),
+        ("catalog_response_bytes_total", "size", "Response body bytes."),
+    ]
+    for name, field, help_text in totals:
+        family(name, "counter", help_text)
+        for (view, method), values in sorted(series.items()):
+            labels = _labels(view=view, method=method)
+            lines.append(f"{name}{{{labels}}} {values[field]}")
+
+    name = "catalog_request_duration_seconds"
+    family(name, "histogram", "Request duration.")
+    for (view, method), values in sorted(series.items()):
+        labels = _labels(view=view, method=method)
+        for bound, count in zip(DURATION_BUCKETS, values["buckets"]):
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+        total = sum(values["statuses"].values())
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {total}')
+        lines.append(f"{name}_sum{{{labels}}} {values['duration']}")
+        lines.append(f"{name}_count{{{labels}}} {total}")
+    return "\n".join(lines) + "\n"
+
+
+def _labels(**labels):
+    return ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in labels.items()
+    )
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint; only answers METRICS_ALLOWED_IPS clients."""
+    if request.META.get("REMOTE_ADDR") not in settings.METRICS_ALLOWED_IPS:
+        raise Http404
+    return HttpResponse(render(), content_type="text/plain; version=0.0.4")
@@ -0,0 +1,173 @@
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+from . import metrics, replicas
+
+_serialization = ContextVar("serialization", default=None)
+
+
+class QueryRecorder:
+    """Database execute wrapper counting queries and the time spent in them."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+    @contextmanager
+    def installed(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+
+class SerializationRecorder:
+    """Time spent in the outermost serializer to_representation() calls."""
+
+    def __init__(self):
+        self.duration = 0.0
+        self.depth = 0
+
+    @contextmanager
+    def installed(self):
+        token = _serialization.set(self)
+        try:
+            yield self
+        finally:
+            _serialization.reset(token)
+
+
+@contextmanager
+def serializing():
+    """Count the block as serialization time of the request being measured."""
+    recorder = _serialization.get()
+    if recorder is None:
+        yield
+        return
+    recorder.depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.depth -= 1
+        if not recorder.depth:
+            recorder.duration += time.perf_counter() - started
+
+
+class InstrumentationMiddleware:
+    """
+    Measures each request: SQL query count and time, serialization time (see
+    InstrumentedSerializerMixin), render time, response size and total
+    duration, labelled with the URL name of the view (which
+    for viewsets includes the action, e.g. ``game-list``).
+
+    Measurements feed game_catalog.metrics. With ``INSTRUMENTATION_HEADERS``
+    (defaults to DEBUG) they are also returned as ``X-Query-Count`` and
+    ``Server-Timing`` response headers.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.headers = getattr(settings, "INSTRUMENTATION_HEADERS", settings.DEBUG)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with (
+            QueryRecorder().installed() as recorder,
+            SerializationRecorder().installed() as serialization,
+        ):
+            response = self.get_response(request)
+        return self.finish(request, response, recorder, serialization, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with (
+            QueryRecorder().installed() as recorder,
+            SerializationRecorder().installed() as serialization,
+        ):
+            response = await self.get_response(request)
+        return self.finish(request, response, recorder, serialization, started)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns; time that step.
+        started = time.perf_counter()
+
+        def rendered(response):
+            request._instrumentation_render_time = time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, recorder, serialization, started):
+        match = request.resolver_match
+        measurement = {
+            "view": (match.view_name or match._func_path) if match else "unmatched",
+            "method": request.method,
+            "status": response.status_code,
+            "queries": recorder.count,
+            "db_time": recorder.duration,
+            "serialize_time": serialization.duration,
+            "render_time": getattr(request, "_instrumentation_render_time", 0.0),
+            "size": None if response.streaming else len(response.content),
+            "duration": time.perf_counter() - started,
+        }
+        metrics.observe(measurement)
+        if self.headers:
+            response.headers["X-Query-Count"] = str(measurement["queries"])
+            response.headers["Server-Timing"] = ", ".join(
+                f"{name};dur={measurement[field] * 1000:.2f}"
+                for name, field in (
+                    ("db", "db_time"),
+                    ("serialize", "serialize_time"),
+                    ("render", "render_time"),
+                    ("total", "duration"),
+                )
+            )
+        return response
+
+
+class ReplicaMiddleware:
+    """Routes the reads of opted-in views to replicas; see game_catalog.replicas."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with replicas.replica_reads(False):
+            response = self.get_response(request)
+        return replicas.stick_to_primary(request, response)
+
+    async def __acall__(self, request):
+        with replicas.replica_reads(False):
+            response = await self.get_response(request)
+        return replicas.stick_to_primary(request, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        replicas.route_view(request, view_func)
@@ -1,3 +1,5 @@
+import uuid
+
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
@@ -6,6 +8,7 @@ from django.db import models
 class Genre(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -16,6 +19,14 @@ class Studio(models.Model):
     founded_date = models.DateField()
     description = models.TextField()
     country = models.CharField(max_length=100)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["country"], name="studio_country_idx"),
+            # Catalog imports look studios up by name.
+            models.Index(fields=["name"], name="studio_name_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -27,6 +38,20 @@ class Game(models.Model):
     release_date = models.DateField()
     genre = models.ManyToManyField(Genre)
     studio = models.ForeignKey(Studio, on_delete=models.CASCADE)
+    favorites_count = models.PositiveIntegerField(default=0, editable=False)
+    # Also touched when the embedded studio, genres or favorites count change,
+    # so it tracks the last change of the game's API representation.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["release_date", "id"], name="game_release_date_id_idx"
+            ),
+            models.Index(fields=["name", "id"], name="game_name_id_idx"),
+            # Serves Max(updated_at) for the conditional GET validators.
+            models.Index(fields=["updated_at"], name="game_updated_at_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -36,6 +61,8 @@ class CustomUser(AbstractUser):
     favorite_games = models.ManyToManyField(
         Game, blank=True, related_name="favorited_by"
     )
+    # Kept in step with favorite_games, like Game.favorites_count.
+    favorites_count = models.PositiveIntegerField(default=0, editable=False)
 
     def favorited(self, game):
         return self.favorite_games.filter(pk=game.pk).exists()
@@ -48,6 +75,124 @@ class Comment(models.Model):
     game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name="comments")
     text = models.TextField()
     post_date = models.DateTimeField(auto_now_add=True)
+    # Known before the row is inserted, so comments accepted by the
+    # write-behind buffer can be identified until they get an id.
+    uuid = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["post_date", "id"], name="comment_post_date_id_idx"),
+            models.Index(
+                fields=["game", "-post_date", "-id"], name="comment_game_feed_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"Comment by {self.user.username} on {self.post_date}: {self.text[:50]}"
+
+
+class LeaderboardEntry(models.Model):
+    """
+    Materialized leaderboard row, written by ``refresh_leaderboards``.
+
+    Entries without a genre rank all games; the others rank the games of one
+    genre. Only games with a positive score are stored.
+    """
+
+    FAVORITES = "favorites"
+    COMMENTS = "comments"
+    COMMENTS_7D = "comments_7d"
+    COMMENTS_30D = "comments_30d"
+    BOARD_CHOICES = [
+        (FAVORITES, "Most favorited"),
+        (COMMENTS, "Most commented"),
+        (COMMENTS_7D, "Most commented in the last 7 days"),
+        (COMMENTS_30D, "Most commented in the last 30 days"),
+    ]
+
+    board = models.CharField(max_length=20, choices=BOARD_CHOICES)
+    genre = models.ForeignKey(Genre, null=True, blank=True, on_delete=models.CASCADE)
+    game = models.ForeignKey(Game, on_delete=models.CASCADE)
+    score = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [
+            # Serves the keyset-paginated (-score, game_id) reads per board.
+            models.Index(
+                fields=["board", "genre", "-score", "game"], name="leaderboard_rank_idx"
+            ),
+            models.Index(fields=["game", "board"], name="leaderboard_game_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.board}: {self.game_id} ({self.score})"
+
+
+class LeaderboardRefresh(models.Model):
+    """Watermark of the last refresh of each leaderboard."""
+
+    board = models.CharField(
+        max_length=20, choices=LeaderboardEntry.BOARD_CHOICES, unique=True
+    )
+    refreshed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.board} refreshed at {self.refreshed_at}"
+
+
+class GameCommentMonth(models.Model):
+    """Comments posted on a game per calendar month, kept by game_catalog.stats."""
+
+    game = models.ForeignKey(
+        Game, on_delete=models.CASCADE, related_name="comment_months"
+    )
+    month = models.DateField()
+    comments_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["game", "month"], name="game_comment_month_unique"
+            )
+        ]
+
+
+class StudioStats(models.Model):
+    """Totals over the games of a studio, kept by game_catalog.stats."""
+
+    studio = models.OneToOneField(
+        Studio, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    games_count = models.PositiveIntegerField(default=0)
+    favorites_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+
+
+class StudioCommentMonth(models.Model):
+    studio = models.ForeignKey(
+        Studio, on_delete=models.CASCADE, related_name="comment_months"
+    )
+    month = models.DateField()
+    comments_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["studio", "month"], name="studio_comment_month_unique"
+            )
+        ]
+
+
+class StudioGenreCount(models.Model):
+    studio = models.ForeignKey(
+        Studio, on_delete=models.CASCADE, related_name="genre_counts"
+    )
+    genre = models.ForeignKey(Genre, on_delete=models.CASCADE)
+    games_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["studio", "genre"], name="studio_genre_count_unique"
+            )
+        ]
@@ -0,0 +1,262 @@
+import json
+from base64 import b64decode, b64encode
+from datetime import date, datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks on the full ordering key.
+
+    Unlike DRF's CursorPagination, which seeks on the first ordering field and
+    falls back to an offset for ties, the cursor here carries every ordering
+    value, so each page is a single indexed range scan regardless of depth.
+    The last ordering field must be unique.
+    """
+
+    ordering = ("id",)
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.paginate_rows(list(self.page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_queryset(queryset, request, view)
+        return self.paginate_rows([row async for row in queryset])
+
+    def page_queryset(self, queryset, request, view=None):
+        """Read the request and return the (unevaluated) rows of the page."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request, queryset.model)
+
+        queryset = queryset.order_by(*self.ordering)
+        reverse = self.cursor is not None and self.cursor["reverse"]
+        if reverse:
+            queryset = queryset.order_by(*(_invert(field) for field in self.ordering))
+        if self.cursor is not None:
+            queryset = queryset.filter(self.seek(self.cursor["position"], reverse))
+        # One extra row tells whether there is a next page.
+        return queryset[: self.page_size + 1]
+
+    def paginate_rows(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if self.cursor is not None and self.cursor["reverse"]:
+            rows.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = self.cursor is not None, has_more
+        self.page = rows
+        return rows
+
+    def get_ordering(self, request, queryset, view):
+        return self.ordering
+
+    def get_page_size(self, request):
+        return _page_size(self, request)
+
+    def seek(self, position, reverse):
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") != reverse else "gt"
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+        return condition
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            cursor = json.loads(b64decode(encoded.encode("ascii"), validate=True))
+            position, reverse = cursor["p"], bool(cursor.get("r", False))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            # Typed like the ordering fields, so that a tampered cursor cannot
+            # reach the database with values it would compare differently.
+            position = [
+                _ordering_field(model, field).to_python(_scalar(value))
+                for field, value in zip(self.ordering, position)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        return {"position": position, "reverse": reverse}
+
+    def encode_cursor(self, row, reverse):
+        position = [_cursor_value(row, field.lstrip("-")) for field in self.ordering]
+        payload = {"p": position}
+        if reverse:
+            payload["r"] = True
+        encoded = b64encode(json.dumps(payload, separators=(",", ":")).encode("ascii"))
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, encoded.decode("ascii")
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(
+                self.request.build_absolute_uri(), self.cursor_query_param
+            )
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_data(self, data):
+        return {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class RankedPagination(BasePagination):
+    """
+    Page-number pagination for ranked results that cannot be seeked by key.
+
+    The source only has to support slicing; one extra row is fetched instead
+    of running a COUNT to decide whether there is a next page.
+    """
+
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = "page_size"
+    page_query_param = "page"
+
+    def paginate_queryset(self, results, request, view=None):
+        self.request = request
+        self.page_size = _page_size(self, request)
+        try:
+            self.page_number = max(int(request.query_params[self.page_query_param]), 1)
+        except KeyError:
+            self.page_number = 1
+        except ValueError:
+            raise NotFound("Invalid page")
+
+        offset = (self.page_number - 1) * self.page_size
+        rows = list(results[offset : offset + self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[: self.page_size]
+        return self.page
+
+    def get_link(self, page_number):
+        url = self.request.build_absolute_uri()
+        if page_number == 1:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, page_number)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_link(self.page_number + 1) if self.has_next else None,
+                "previous": (
+                    self.get_link(self.page_number - 1) if self.page_number > 1 else None
+                ),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return KeysetPagination.get_paginated_response_schema(self, schema)
+
+
+class GamePagination(KeysetPagination):
+    ordering = ("release_date", "id")
+
+    def get_ordering(self, request, queryset, view):
+        # Follow a whitelisted ?ordering= from the view's OrderingFilter, with
+        # the id as tie-breaker so the key stays unique.
+        for backend in getattr(view, "filter_backends", ()):
+            if issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+                if ordering:
+                    last = ordering[-1]
+                    if last.lstrip("-") in ("id", "pk"):
+                        return tuple(ordering)
+                    return (*ordering, "-id" if last.startswith("-") else "id")
+        return self.ordering
+
+
+class CommentPagination(KeysetPagination):
+    ordering = ("post_date", "id")
+
+
+class GameCommentPagination(KeysetPagination):
+    ordering = ("-post_date", "-id")
+
+
+class LeaderboardPagination(KeysetPagination):
+    ordering = ("-score", "game_id")
+    page_size = 20
+    max_page_size = 100
+
+
+class UserPagination(KeysetPagination):
+    ordering = ("id",)
+
+
+def _invert(field):
+    return field[1:] if field.startswith("-") else f"-{field}"
+
+
+def _ordering_field(model, field):
+    name = field.lstrip("-")
+    return model._meta.pk if name == "pk" else model._meta.get_field(name)
+
+
+def _scalar(value):
+    if value is None or isinstance(value, (bool, list, dict)):
+        raise TypeError(f"{type(value).__name__} is not a cursor value")
+    return value
+
+
+def _cursor_value(row, name):
+    value = row[name] if isinstance(row, dict) else getattr(row, name)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _page_size(pagination, request):
+    try:
+        page_size = int(request.query_params[pagination.page_size_query_param])
+    except (KeyError, ValueError):
+        return pagination.page_size
+    return min(max(page_size, 1), pagination.max_page_size)
@@ -0,0 +1,93 @@
+"""
+Password hashing for registration.
+
+``PASSWORD_HASHER`` picks the hasher new passwords are stored with
+(``pbkdf2``, ``scrypt`` or ``argon2``, the latter needing argon2-cffi). The
+scrypt and argon2 hashers take their cost parameters from
+``PASSWORD_HASHER_PARAMS``. Every hash records its own parameters, so
+existing passwords keep verifying after a change and are rehashed with the
+new settings when their owner next logs in.
+
+With ``PASSWORD_HASHING_WORKERS`` set, hashes are computed in a process pool
+of that size, so a signup burst uses at most that many cores and leaves the
+web processes' CPU to other requests while the signup threads wait. At most
+``PASSWORD_HASHING_QUEUE`` hashes may be pending, and further signups get a
+503 instead of piling up behind them.
+"""
+
+import atexit
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+_lock = threading.Lock()
+_pool = None
+_slots = None
+
+
+class HashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many signups in progress, try again shortly."
+    default_code = "hashing_busy"
+
+
+class TunedHasherMixin:
+    def __init__(self):
+        params = getattr(settings, "PASSWORD_HASHER_PARAMS", {})
+        for name, value in params.get(self.algorithm, {}).items():
+            setattr(self, name, value)
+
+
+class ScryptPasswordHasher(TunedHasherMixin, hashers.ScryptPasswordHasher):
+    pass
+
+
+class Argon2PasswordHasher(TunedHasherMixin, hashers.Argon2PasswordHasher):
+    pass
+
+
+def make_password(raw_password):
+    """Hash a password with the preferred hasher, in the pool if configured."""
+    pool = _get_pool()
+    if pool is None:
+        return hashers.make_password(raw_password)
+    return _submit(pool, raw_password).result()
+
+
+def _submit(pool, raw_password):
+    if not _slots.acquire(blocking=False):
+        raise HashingBusy()
+    # By algorithm: the workers resolve it from their own PASSWORD_HASHERS.
+    algorithm = hashers.get_hasher().algorithm
+    future = pool.submit(hashers.make_password, raw_password, None, algorithm)
+    future.add_done_callback(lambda future: _slots.release())
+    return future
+
+
+def _get_pool():
+    global _pool, _slots
+    workers = getattr(settings, "PASSWORD_HASHING_WORKERS", 0)
+    if not workers:
+        return None
+    with _lock:
+        if _pool is None:
+            _slots = threading.BoundedSemaphore(
+                getattr(settings, "PASSWORD_HASHING_QUEUE", 64)
+            )
+            _pool = ProcessPoolExecutor(max_workers=workers, initializer=django.setup)
+    return _pool
+
+
+@atexit.register
+def shutdown():
+    """Stop the hashing pool; the next hash starts a new one."""
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
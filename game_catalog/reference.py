@@ -0,0 +1,100 @@
+"""
+In-process copy of the genres and studios.
+
+Both tables are small and change rarely, so every process keeps all of their
+rows in memory and the game lists take studios and genres from here instead
+of joining them: the game query reads only Game columns, plus one query for
+the genre ids of the page.
+
+Each copy is tagged with the catalog cache version of its resource, which
+the Genre and Studio signals bump on every write, and is reloaded on next use
+once that version moves. The default catalog cache is per process, so a
+version bump by another worker is not seen here; copies are therefore also
+reloaded once they are ``REFERENCE_DATA_MAX_AGE`` seconds old, which bounds
+how long a write made elsewhere can go unnoticed. warm() loads both when a
+worker starts.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError
+
+from . import cache
+from .models import Game, Genre, Studio
+
+GameGenre = Game.genre.through
+MODELS = {"genres": Genre, "studios": Studio}
+
+_lock = threading.Lock()
+_tables = {}
+
+
+def get(resource):
+    """Every row of ``resource`` (``genres`` or ``studios``) by primary key."""
+    version = cache.get_version(resource)
+    loaded = _tables.get(resource)
+    if not _current(loaded, version):
+        with _lock:
+            loaded = _tables.get(resource)
+            if not _current(loaded, version):
+                expires = time.monotonic() + getattr(
+                    settings, "REFERENCE_DATA_MAX_AGE", 5
+                )
+                rows = {obj.pk: obj for obj in MODELS[resource].objects.all()}
+                loaded = _tables[resource] = (version, expires, rows)
+    return loaded[2]
+
+
+def _current(loaded, version):
+    return (
+        loaded is not None and loaded[0] == version and loaded[1] > time.monotonic()
+    )
+
+
+def warm():
+    """Load the reference data ahead of the first request, if the database is up."""
+    try:
+        for resource in MODELS:
+            get(resource)
+    except DatabaseError:
+        # Not migrated yet, or unreachable; the first request loads it.
+        pass
+
+
+def attach(games, studio=True, genres=True):
+    """Set the studio and genres of already loaded ``games`` from memory."""
+    if studio:
+        studios = _rows("studios", {game.studio_id for game in games})
+        for game in games:
+            Game.studio.field.set_cached_value(game, studios.get(game.studio_id))
+    if genres:
+        links = {game.pk: [] for game in games}
+        for game_id, genre_id in (
+            GameGenre.objects.filter(game_id__in=links)
+            .order_by("pk")
+            .values_list("game_id", "genre_id")
+        ):
+            links[game_id].append(genre_id)
+        rows = _rows("genres", {pk for ids in links.values() for pk in ids})
+        for game in games:
+            # Stored the way prefetch_related() does, so game.genre.all() is
+            # served from it.
+            queryset = Genre.objects.all()
+            queryset._result_cache = [rows[pk] for pk in links[game.pk] if pk in rows]
+            queryset._prefetch_done = True
+            game._prefetched_objects_cache = {
+                **getattr(game, "_prefetched_objects_cache", {}),
+                "genre": queryset,
+            }
+
+
+def _rows(resource, ids):
+    rows = get(resource)
+    if not ids - {None} <= rows.keys():
+        # Created by another process since the copy was loaded.
+        with _lock:
+            _tables.pop(resource, None)
+        rows = get(resource)
+    return rows
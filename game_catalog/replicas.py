@@ -0,0 +1,124 @@
+"""
+Read-replica routing.
+
+Views opt in with ``replica_reads = True``. ReplicaMiddleware then lets the
+ORM reads of their GET/HEAD/OPTIONS requests go to one of the
+``DATABASE_READ_REPLICAS`` aliases. Everything else uses ``default``: other
+views, writes and raw SQL through ``django.db.connection``.
+
+The reads made while DRF authenticates the request stay on the primary, so
+that a user who was just deactivated or demoted cannot be served from a
+replica that has not caught up yet.
+
+A client that just made an unsafe request keeps its reads on the primary for
+``DATABASE_REPLICA_STICKINESS`` seconds, so it sees its own writes despite
+replication lag. Authenticated users are tracked by id in the catalog cache,
+which is shared by every process once it is configured that way; anonymous
+clients get a short-lived cookie instead.
+
+Reads from a replica may be stale, so the catalog cache is filled from the
+primary only; see game_catalog.cache.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from . import cache
+
+STICKY_COOKIE = "catalog_primary"
+
+# True, False or the request whose reads may go to a replica.
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Route the ORM reads made inside the block to a replica."""
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def reading_from_replica():
+    """Whether the ORM reads made now go to a replica."""
+    if not getattr(settings, "DATABASE_READ_REPLICAS", ()):
+        return False
+    state = _replica_reads.get()
+    if isinstance(state, bool):
+        return state
+    return _request_reads_from_replica(state)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if reading_from_replica():
+            return random.choice(settings.DATABASE_READ_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+
+def route_view(request, view_func):
+    """Send the view's reads to a replica if it and the request qualify."""
+    view_class = getattr(view_func, "cls", None) or getattr(
+        view_func, "view_class", None
+    )
+    if getattr(view_class, "replica_reads", False) and request.method in (
+        "GET",
+        "HEAD",
+        "OPTIONS",
+    ):
+        # Reset by the replica_reads() block around the request.
+        _replica_reads.set(request)
+
+
+def stick_to_primary(request, response):
+    """Keep the client's next reads on the primary after it wrote."""
+    if request.method in ("GET", "HEAD", "OPTIONS") or response.status_code >= 400:
+        return response
+    seconds = getattr(settings, "DATABASE_REPLICA_STICKINESS", 10)
+    user = _authenticated_user(request)
+    if user is not None:
+        cache.get_cache().set(_sticky_key(user.pk), True, timeout=seconds)
+    else:
+        response.set_cookie(
+            STICKY_COOKIE, "1", max_age=seconds, httponly=True, samesite="Lax"
+        )
+    return response
+
+
+def _request_reads_from_replica(request):
+    decision = request.__dict__.get("_replica_reads")
+    if decision is None:
+        if "auth" not in request.__dict__:
+            # DRF has not authenticated the request yet.
+            return False
+        user = _authenticated_user(request)
+        if user is not None:
+            decision = not cache.get_cache().get(_sticky_key(user.pk), False)
+        else:
+            decision = STICKY_COOKIE not in request.COOKIES
+        request._replica_reads = decision
+    return decision
+
+
+def _authenticated_user(request):
+    # DRF sets ``user`` and ``auth`` on the Django request once it has
+    # authenticated it; ``user`` alone may be the session middleware's.
+    if "auth" not in request.__dict__ or not request.user.is_authenticated:
+        return None
+    return request.user
+
+
+def _sticky_key(user_id):
+    return f"catalog:primary:{user_id}"
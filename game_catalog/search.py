@@ -0,0 +1,213 @@
+import re
+
+from django.db import connection
+from django.db.models import Q, QuerySet, prefetch_related_objects
+
+from .models import Game
+
+INDEX_TABLE = "game_catalog_gamesearch"
+REBUILD_CHUNK_SIZE = 2000
+
+
+class SqliteSearchBackend:
+    """FTS5 virtual table keyed by the game id (rowid), ranked with bm25."""
+
+    # bm25 weights for the name, studio, genres and description columns.
+    weights = (10.0, 5.0, 5.0, 1.0)
+
+    def create_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {INDEX_TABLE} USING fts5("
+                "name, studio, genres, description, "
+                "tokenize = 'unicode61 remove_diacritics 2')"
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {INDEX_TABLE}")
+
+    def index(self, documents):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {INDEX_TABLE} WHERE rowid = %s",
+                [(document[0],) for document in documents],
+            )
+            cursor.executemany(
+                f"INSERT INTO {INDEX_TABLE} (rowid, name, studio, genres, description) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                documents,
+            )
+
+    def remove(self, game_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {INDEX_TABLE} WHERE rowid = %s",
+                [(game_id,) for game_id in game_ids],
+            )
+
+    def search(self, terms, limit, offset):
+        match = " ".join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+        weights = ", ".join(map(str, self.weights))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {INDEX_TABLE} WHERE {INDEX_TABLE} MATCH %s "
+                f"ORDER BY bm25({INDEX_TABLE}, {weights}), rowid LIMIT %s OFFSET %s",
+                [match, limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresSearchBackend:
+    """Weighted tsvector side table with a GIN index, ranked with ts_rank."""
+
+    config = "simple"
+
+    def create_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {INDEX_TABLE} ("
+                "game_id bigint PRIMARY KEY "
+                "REFERENCES game_catalog_game (id) ON DELETE CASCADE, "
+                "document tsvector NOT NULL)"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {INDEX_TABLE}_document_idx "
+                f"ON {INDEX_TABLE} USING GIN (document)"
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {INDEX_TABLE}")
+
+    def index(self, documents):
+        vector = " || ".join(
+            f"setweight(to_tsvector('{self.config}', %s), '{weight}')"
+            for weight in "ABBD"
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {INDEX_TABLE} (game_id, document) VALUES (%s, {vector}) "
+                "ON CONFLICT (game_id) DO UPDATE SET document = EXCLUDED.document",
+                documents,
+            )
+
+    def remove(self, game_ids):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {INDEX_TABLE} WHERE game_id = ANY(%s)", [list(game_ids)]
+            )
+
+    def search(self, terms, limit, offset):
+        query = " & ".join(f"{term}:*" for term in terms)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT game_id FROM {INDEX_TABLE}, "
+                f"to_tsquery('{self.config}', %s) query "
+                "WHERE document @@ query "
+                "ORDER BY ts_rank(document, query) DESC, game_id LIMIT %s OFFSET %s",
+                [query, limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class DatabaseSearchBackend:
+    """Unindexed fallback for databases without a supported full-text engine."""
+
+    def create_index(self):
+        pass
+
+    def clear(self):
+        pass
+
+    def index(self, documents):
+        pass
+
+    def remove(self, game_ids):
+        pass
+
+    def search(self, terms, limit, offset):
+        condition = Q()
+        for term in terms:
+            condition &= (
+                Q(name__icontains=term)
+                | Q(description__icontains=term)
+                | Q(studio__name__icontains=term)
+                | Q(genre__name__icontains=term)
+            )
+        games = Game.objects.filter(condition).distinct().order_by("id")
+        return list(games.values_list("id", flat=True)[offset : offset + limit])
+
+
+BACKENDS = {
+    "sqlite": SqliteSearchBackend,
+    "postgresql": PostgresSearchBackend,
+}
+
+
+def get_backend():
+    return BACKENDS.get(connection.vendor, DatabaseSearchBackend)()
+
+
+def parse_terms(query):
+    return re.findall(r"\w+", query)
+
+
+def index_games(games):
+    """Reindex ``games``, a Game queryset or game ids, a chunk at a time."""
+    if not isinstance(games, QuerySet):
+        games = list(games)
+        if not games:
+            return
+        games = Game.objects.filter(pk__in=games)
+    _index_chunks(get_backend(), games)
+
+
+def remove_games(game_ids):
+    game_ids = list(game_ids)
+    if game_ids:
+        get_backend().remove(game_ids)
+
+
+def rebuild():
+    backend = get_backend()
+    backend.create_index()
+    backend.clear()
+    return _index_chunks(backend, Game.objects.all())
+
+
+def _index_chunks(backend, games):
+    total, last_id = 0, 0
+    while True:
+        chunk = list(
+            games.filter(pk__gt=last_id).order_by("pk")[:REBUILD_CHUNK_SIZE]
+        )
+        if not chunk:
+            return total
+        backend.index(list(_documents(chunk)))
+        total += len(chunk)
+        last_id = chunk[-1].pk
+
+
+def _documents(games):
+    games = list(games)
+    prefetch_related_objects(games, "studio", "genre")
+    for game in games:
+        genres = " ".join(genre.name for genre in game.genre.all())
+        yield game.pk, game.name, game.studio.name, genres, game.description
+
+
+class SearchResults:
+    """Lazily ranked games; slicing runs one index query plus one fetch."""
+
+    def __init__(self, query, queryset):
+        self.terms = parse_terms(query)
+        self.queryset = queryset
+
+    def __getitem__(self, page):
+        if not self.terms:
+            return []
+        limit = page.stop - page.start
+        game_ids = get_backend().search(self.terms, limit, page.start)
+        games = self.queryset.in_bulk(game_ids)
+        return [games[game_id] for game_id in game_ids if game_id in games]
@@ -1,9 +1,207 @@
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
-from .models import Genre, Studio, Game, Comment, CustomUser
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.validators import UniqueValidator
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
+from . import bulk, passwords, reference
+from .authentication import CatalogRefreshToken
+from .middleware import serializing
+from .models import Genre, Studio, Game, Comment, CustomUser, LeaderboardEntry
 
-class RegisterSerializer(serializers.ModelSerializer):
+
+class InstrumentedSerializerMixin:
+    """
+    Reports the time spent in to_representation() as the serialization time
+    of the request, measured by InstrumentationMiddleware. Nested calls are
+    counted once, as part of the outermost one; with ``many=True`` that is
+    once per item.
+    """
+
+    def to_representation(self, instance):
+        with serializing():
+            return super().to_representation(instance)
+
+
+class SparseFieldsetsMixin:
+    """
+    Lets read requests shape the top-level serializer with query parameters.
+
+    ``?fields=a,b`` keeps only the named fields. ``?expand=x`` swaps a field
+    for its entry in ``expandable_fields``, usually a fuller nested
+    serializer. Without ``?fields``, ``Meta.default_fields`` (if set) is used.
+    Nested serializers and write requests are left alone.
+    """
+
+    expandable_fields = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get("request")
+        if request is None or request.method not in SAFE_METHODS:
+            return fields
+        if not self._is_root:
+            return fields
+
+        for name in _param_set(request, "expand") & self.expandable_fields.keys():
+            fields[name] = self.expandable_fields[name]()
+        requested = _param_set(request, "fields") or getattr(
+            self.Meta, "default_fields", None
+        )
+        if requested:
+            fields = {
+                name: field for name, field in fields.items() if name in requested
+            }
+        return fields
+
+    @property
+    def _is_root(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+
+def _param_set(request, name):
+    return {
+        value.strip()
+        for param in request.query_params.getlist(name)
+        for value in param.split(",")
+        if value.strip()
+    }
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Resolves against the lookups primed by BulkListSerializer, when present."""
+
+    def to_internal_value(self, data):
+        lookups = self.context.get("bulk_lookups", {})
+        lookup = lookups.get(self.get_queryset().model)
+        if lookup is None:
+            return super().to_internal_value(data)
+        pk = _as_pk(data)
+        if pk is None:
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if pk not in lookup:
+            self.fail("does_not_exist", pk_value=data)
+        return lookup[pk]
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    Validates a list of items as one batch and writes it with bulk queries.
+
+    Related primary keys are resolved with one query per related model and
+    unique fields are checked with one query per field, instead of once per
+    item. Errors are reported per item index. For updates, pass the instances
+    to change and give every item its ``id``.
+    """
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            message = self.error_messages["not_a_list"].format(
+                input_type=type(data).__name__
+            )
+            raise ValidationError({"non_field_errors": [message]})
+        if not data:
+            raise ValidationError({"non_field_errors": [self.error_messages["empty"]]})
+        if self.max_length is not None and len(data) > self.max_length:
+            message = self.error_messages["max_length"].format(
+                max_length=self.max_length
+            )
+            raise ValidationError({"non_field_errors": [message]})
+
+        self.context["bulk_lookups"] = self.prime_lookups(data)
+        unique = self.detach_unique_validators()
+        instances = {obj.pk: obj for obj in self.instance or ()}
+        self.item_instances = [
+            instances.get(_as_pk(item.get("id")) if isinstance(item, dict) else None)
+            for item in data
+        ]
+
+        validated, errors = [], {}
+        for index, (item, instance) in enumerate(zip(data, self.item_instances)):
+            self.child.instance = instance
+            try:
+                if self.instance is not None and instance is None:
+                    raise ValidationError({"id": ["No object with this id."]})
+                validated.append(self.child.run_validation(item))
+            except ValidationError as exc:
+                validated.append(None)
+                errors[index] = exc.detail
+        self.child.instance = None
+        self.check_unique(unique, validated, errors)
+        if errors:
+            raise ValidationError(errors)
+        return validated
+
+    def prime_lookups(self, data):
+        lookups = {}
+        for name, field in self.child.fields.items():
+            many = isinstance(field, serializers.ManyRelatedField)
+            relation = field.child_relation if many else field
+            if field.read_only:
+                continue
+            if not isinstance(relation, BulkPrimaryKeyRelatedField):
+                continue
+            pks = set()
+            for item in data:
+                value = item.get(name) if isinstance(item, dict) else None
+                values = value if many and isinstance(value, list) else [value]
+                pks.update(pk for pk in map(_as_pk, values) if pk is not None)
+            queryset = relation.get_queryset()
+            lookups.setdefault(queryset.model, {}).update(queryset.in_bulk(pks))
+        return lookups
+
+    def detach_unique_validators(self):
+        unique = {}
+        for name, field in self.child.fields.items():
+            checks = [v for v in field.validators if isinstance(v, UniqueValidator)]
+            if checks:
+                field.validators = [v for v in field.validators if v not in checks]
+                unique[name] = (field.source, checks[0])
+        return unique
+
+    def check_unique(self, unique, validated, errors):
+        for name, (source, validator) in unique.items():
+            first_index = {}
+            for index, attrs in enumerate(validated):
+                if attrs is None or source not in attrs:
+                    continue
+                if attrs[source] in first_index:
+                    errors[index] = {name: ["Duplicate value within this batch."]}
+                else:
+                    first_index[attrs[source]] = index
+            taken = dict(
+                validator.queryset.filter(
+                    **{f"{source}__in": list(first_index)}
+                ).values_list(source, "pk")
+            )
+            for value, index in first_index.items():
+                instance = self.item_instances[index]
+                if value in taken and taken[value] != getattr(instance, "pk", None):
+                    errors[index] = {name: [validator.message]}
+
+    def create(self, validated_data):
+        return bulk.create_objects(self.child.Meta.model, validated_data)
+
+    def update(self, instance, validated_data):
+        return bulk.update_objects(
+            self.child.Meta.model, self.item_instances, validated_data
+        )
+
+
+def _as_pk(value):
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class RegisterSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=8)
     email = serializers.EmailField(required=False, allow_blank=True, default="")
     first_name = serializers.CharField(required=False, allow_blank=True, default="")
@@ -13,32 +211,67 @@ class RegisterSerializer(serializers.ModelSerializer):
         model = CustomUser
         fields = ["username", "first_name", "last_name", "email", "password"]
 
+    def create(self, validated_data):
+        # Hash first, so that the user is written by a single INSERT. Views
+        # that queue the save hash up front and pass password_hash instead.
+        password = validated_data.pop("password")
+        password_hash = validated_data.pop("password_hash", None)
+        user = CustomUser(**validated_data)
+        user.password = password_hash or passwords.make_password(password)
+        user.save()
+        return user
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = CatalogRefreshToken
 
-class GenreSerializer(serializers.ModelSerializer):
+
+class GenreSerializer(
+    InstrumentedSerializerMixin, SparseFieldsetsMixin, serializers.ModelSerializer
+):
     class Meta:
         model = Genre
-        fields = "__all__"
+        exclude = ["updated_at"]
+
+
+class GenreShortSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Genre
+        fields = ["id", "name"]
 
 
-class StudioSerializer(serializers.ModelSerializer):
+class StudioSerializer(
+    InstrumentedSerializerMixin, SparseFieldsetsMixin, serializers.ModelSerializer
+):
     class Meta:
         model = Studio
-        fields = "__all__"
+        exclude = ["updated_at"]
+
+
+class StudioShortSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Studio
+        fields = ["id", "name"]
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(
+    InstrumentedSerializerMixin, SparseFieldsetsMixin, serializers.ModelSerializer
+):
     user = serializers.PrimaryKeyRelatedField(read_only=True)
 
     class Meta:
         model = Comment
-        fields = ["id", "game", "user", "text", "post_date"]
+        fields = ["id", "uuid", "game", "user", "text", "post_date"]
         read_only_fields = ["user", "post_date"]
 
 
-class GameSerializer(serializers.ModelSerializer):
+class GameSerializer(
+    InstrumentedSerializerMixin, SparseFieldsetsMixin, serializers.ModelSerializer
+):
     studio = StudioSerializer(read_only=True)
     genre = GenreSerializer(many=True, read_only=True)
-    in_favorites = serializers.SerializerMethodField()
+    in_favorites = serializers.IntegerField(source="favorites_count", read_only=True)
+    is_favorited = serializers.SerializerMethodField()
 
     class Meta:
         model = Game
@@ -50,24 +283,91 @@ class GameSerializer(serializers.ModelSerializer):
             "genre",
             "studio",
             "in_favorites",
+            "is_favorited",
         ]
 
-    @extend_schema_field(serializers.IntegerField)
-            "comments",
+    @extend_schema_field(serializers.BooleanField)
+    def get_is_favorited(self, obj):
+        return obj.pk in self.context.get("favorite_ids", ())
+
+
+class GameListSerializer(GameSerializer):
+    """
+    Card-sized game representation used by list endpoints.
+
+    Studio and genres are reduced to ids and names and the description is left
+    out unless asked for with ``?fields=`` / ``?expand=``.
+    """
+
+    studio = StudioShortSerializer(read_only=True)
+    genre = GenreShortSerializer(many=True, read_only=True)
+
+    expandable_fields = {
+        "studio": lambda: StudioSerializer(read_only=True),
+        "genre": lambda: GenreSerializer(many=True, read_only=True),
+    }
+
+    class Meta(GameSerializer.Meta):
+        default_fields = [
+            "id",
+            "name",
+            "release_date",
+            "genre",
+            "studio",
+            "in_favorites",
+            "is_favorited",
         ]
 
-    @extend_schema_field(serializers.IntegerField)
-    def get_in_favorites(self, obj):
-        return obj.favorited_by.count()
+    def optimize_queryset(self, queryset):
+        """Narrow the SQL to the columns the selected fields render."""
+        fields = self.fields
+        # Ordering keys are read by the keyset pagination.
+        columns = ["id", "name", "release_date"]
+        if "description" in fields:
+            columns.append("description")
+        if "in_favorites" in fields:
+            columns.append("favorites_count")
+
+        if "studio" in fields:
+            columns.append("studio")
+        # Studio and genres are attached from memory by attach_related().
+        queryset = queryset.select_related(None).prefetch_related(None)
+        return queryset.only(*columns)
+
+    def attach_related(self, games):
+        """Give games loaded through optimize_queryset() their studio and genres."""
+        reference.attach(
+            games, studio="studio" in self.fields, genres="genre" in self.fields
+        )
 
 
-class GameWriteSerializer(serializers.ModelSerializer):
+class GameShortSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Game
+        fields = ["id", "name", "release_date"]
+
+
+class LeaderboardEntrySerializer(
+    InstrumentedSerializerMixin, serializers.ModelSerializer
+):
+    game = GameShortSerializer(read_only=True)
+
+    class Meta:
+        model = LeaderboardEntry
+        fields = ["score", "game"]
+
+
+class GameWriteSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
+    serializer_related_field = BulkPrimaryKeyRelatedField
+
     class Meta:
         model = Game
         fields = "__all__"
 
 
-class UserExtendedInfoSerializer(serializers.ModelSerializer):
+class UserExtendedInfoSerializer(
+    InstrumentedSerializerMixin, SparseFieldsetsMixin, serializers.ModelSerializer
+):
     class Meta:
         model = CustomUser
         fields = [
@@ -77,16 +377,49 @@ class UserExtendedInfoSerializer(serializers.ModelSerializer):
             "last_name",
             "email",
             "is_staff",
+            "favorites_count",
             "favorite_games",
         ]
+        # The favorites themselves are listed by /users/{id}/favorites/.
+        extra_kwargs = {"favorite_games": {"write_only": True}}
 
 
-class UserShortInfoSerializer(serializers.ModelSerializer):
+class UserShortInfoSerializer(
+    InstrumentedSerializerMixin, SparseFieldsetsMixin, serializers.ModelSerializer
+):
     class Meta:
         model = CustomUser
-        fields = ["username", "favorite_games"]
+        fields = ["username", "favorites_count"]
 
 
-class ToggleFavoriteResponseSerializer(serializers.Serializer):
+class FavoriteStateSerializer(InstrumentedSerializerMixin, serializers.Serializer):
     is_favorite = serializers.BooleanField()
+
+
+class ToggleFavoriteResponseSerializer(FavoriteStateSerializer):
     user = UserShortInfoSerializer()
+
+
+class MonthlyCommentsSerializer(serializers.Serializer):
+    month = serializers.DateField()
+    comments = serializers.IntegerField()
+
+
+class GameStatsSerializer(InstrumentedSerializerMixin, serializers.Serializer):
+    favorites = serializers.IntegerField()
+    comments = serializers.IntegerField()
+    comments_by_month = MonthlyCommentsSerializer(many=True)
+
+
+class GenreShareSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    games = serializers.IntegerField()
+
+
+class StudioStatsSerializer(InstrumentedSerializerMixin, serializers.Serializer):
+    games = serializers.IntegerField()
+    favorites = serializers.IntegerField()
+    comments = serializers.IntegerField()
+    comments_by_month = MonthlyCommentsSerializer(many=True)
+    genres = GenreShareSerializer(many=True)
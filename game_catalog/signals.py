@@ -0,0 +1,235 @@
+from django.db import transaction
+from django.db.models import F, QuerySet
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import actions, authentication, cache, search, stats
+from .models import Comment, CustomUser, Game, Genre, Studio
+
+Favorite = CustomUser.favorite_games.through
+
+CACHED_RESOURCES = {Game: "games", Genre: "genres", Studio: "studios"}
+
+
+@receiver(post_save, sender=Game)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Studio)
+@receiver(post_delete, sender=Game)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Studio)
+def invalidate_catalog_cache(sender, **kwargs):
+    cache.invalidate(CACHED_RESOURCES[sender])
+
+
+def create_search_index(sender, using, **kwargs):
+    # Connected in GameCatalogConfig.ready(); the index table is raw SQL
+    # (an FTS5 virtual table on sqlite), so it is not part of the models.
+    search.get_backend().create_index()
+
+
+@receiver(post_save, sender=Game)
+def index_game(sender, instance, **kwargs):
+    search.index_games([instance.pk])
+
+
+@receiver(post_delete, sender=Game)
+def unindex_game(sender, instance, **kwargs):
+    search.remove_games([instance.pk])
+
+
+@receiver(m2m_changed, sender=Game.genre.through)
+def touch_game_genres(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ("post_add", "post_remove", "pre_clear"):
+        if not reverse:
+            touch_games(Game.objects.filter(pk=instance.pk))
+        elif action == "pre_clear":
+            # Remember the games while the links exist.
+            touch_games(Game.objects.filter(pk__in=_game_ids(genre=instance)))
+        elif pk_set:
+            touch_games(Game.objects.filter(pk__in=pk_set))
+    if action.startswith("post_"):
+        cache.invalidate("games")
+
+
+@receiver(post_save, sender=Studio)
+def touch_studio_games(sender, instance, created, **kwargs):
+    if not created:
+        touch_games(Game.objects.filter(studio=instance))
+
+
+@receiver(post_save, sender=Genre)
+def touch_genre_games(sender, instance, created, **kwargs):
+    if not created:
+        touch_games(Game.objects.filter(genre=instance))
+
+
+@receiver(pre_delete, sender=Genre)
+def touch_deleted_genre_games(sender, instance, **kwargs):
+    # Remember the games while the links exist.
+    touch_games(Game.objects.filter(pk__in=_game_ids(genre=instance)))
+
+
+@receiver(m2m_changed, sender=Favorite)
+def update_favorites_count(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "post_add" and pk_set:
+        # Django only reports the rows that were actually inserted on add.
+        if reverse:
+            _bump(Game.objects.filter(pk=instance.pk), len(pk_set))
+            actions.bump_user_favorites(list(pk_set), 1)
+        else:
+            _bump(Game.objects.filter(pk__in=pk_set), 1)
+            actions.bump_user_favorites([instance.pk], len(pk_set))
+    elif action == "pre_remove" and pk_set:
+        # pk_set holds every requested id on remove, so find the existing rows
+        # while they are still there; the removal runs in the same transaction.
+        if reverse:
+            user_ids = list(
+                Favorite.objects.filter(
+                    game_id=instance.pk, customuser_id__in=pk_set
+                ).values_list("customuser_id", flat=True)
+            )
+            _bump(Game.objects.filter(pk=instance.pk), -len(user_ids))
+            actions.bump_user_favorites(user_ids, -1)
+        else:
+            game_ids = list(
+                Favorite.objects.filter(
+                    customuser_id=instance.pk, game_id__in=pk_set
+                ).values_list("game_id", flat=True)
+            )
+            _bump(Game.objects.filter(pk__in=game_ids), -1)
+            actions.bump_user_favorites([instance.pk], -len(game_ids))
+    elif action == "pre_clear":
+        if reverse:
+            games = Game.objects.filter(pk=instance.pk)
+            count = games.values_list("favorites_count", flat=True).first()
+            stats.favorites_changed(games, -(count or 0))
+            games.update(favorites_count=0, updated_at=timezone.now())
+            cache.invalidate("games")
+            release_game_favorites(Game, instance)
+        else:
+            _bump(_favorites_of(instance), -1)
+            CustomUser.objects.filter(pk=instance.pk).update(favorites_count=0)
+            cache.invalidate_users([instance.pk])
+
+
+@receiver(pre_delete, sender=CustomUser)
+def release_user_favorites(sender, instance, **kwargs):
+    # The through rows are removed by cascade, which does not send m2m_changed.
+    _bump(_favorites_of(instance), -1)
+
+
+@receiver(pre_delete, sender=Game)
+def release_game_favorites(sender, instance, **kwargs):
+    # As for users: the game's favorites go without m2m_changed.
+    user_ids = list(
+        Favorite.objects.filter(game_id=instance.pk).values_list(
+            "customuser_id", flat=True
+        )
+    )
+    actions.bump_user_favorites(user_ids, -1)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def forget_user_state(sender, instance, **kwargs):
+    authentication.forget_user(instance.pk)
+    cache.invalidate_users([instance.pk])
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    if created:
+        stats.comments_changed(instance, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, origin=None, **kwargs):
+    # Comments deleted along with their game were subtracted by
+    # release_game_stats; with their studio, the rollups go as well.
+    if not _deleted_with(origin, Game, Studio):
+        stats.comments_changed(instance, -1)
+
+
+@receiver(pre_save, sender=Game)
+def remember_game_studio(sender, instance, **kwargs):
+    if not instance._state.adding:
+        instance._previous_studio_id = (
+            Game.objects.filter(pk=instance.pk)
+            .values_list("studio_id", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Game)
+def count_game(sender, instance, created, **kwargs):
+    previous = instance.__dict__.pop("_previous_studio_id", instance.studio_id)
+    if created:
+        stats.games_added([instance.pk])
+    elif previous != instance.studio_id:
+        stats.refresh_studios([previous, instance.studio_id])
+
+
+@receiver(pre_delete, sender=Game)
+def release_game_stats(sender, instance, origin=None, **kwargs):
+    if not _deleted_with(origin, Studio):
+        stats.game_removed(instance)
+
+
+@receiver(m2m_changed, sender=Game.genre.through)
+def count_game_genres(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "post_add" and pk_set:
+        stats.genre_links_changed(_genre_links(instance, reverse, pk_set), 1)
+    elif action == "pre_remove" and pk_set:
+        stats.genre_links_changed(_genre_links(instance, reverse, pk_set), -1)
+    elif action == "pre_clear":
+        stats.genre_links_changed(_genre_links(instance, reverse, None), -1)
+
+
+def _genre_links(instance, reverse, pk_set):
+    owner, other = ("genre_id", "game_id") if reverse else ("game_id", "genre_id")
+    links = Game.genre.through.objects.filter(**{owner: instance.pk})
+    if pk_set is not None:
+        links = links.filter(**{f"{other}__in": pk_set})
+    return links
+
+
+def _deleted_with(origin, *models):
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(model, models)
+
+
+def _favorites_of(user):
+    return Game.objects.filter(
+        pk__in=Favorite.objects.filter(customuser_id=user.pk).values("game_id")
+    )
+
+
+def _bump(games, delta):
+    if delta:
+        games.update(
+            favorites_count=F("favorites_count") + delta, updated_at=timezone.now()
+        )
+        stats.favorites_changed(games, delta)
+        cache.invalidate("games")
+
+
+def touch_games(games):
+    # Keeps Game.updated_at and the search index in step with what the game
+    # representation embeds. The update is a single statement whatever the
+    # number of games; the reindex runs in chunks once the write commits,
+    # when the changed rows (and removed genre links) are final.
+    games.update(updated_at=timezone.now())
+    transaction.on_commit(lambda: search.index_games(games))
+
+
+def _game_ids(**filters):
+    return list(
+        Game.objects.filter(**filters).values_list("pk", flat=True).distinct()
+    )
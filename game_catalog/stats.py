@@ -0,0 +1,320 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, DateField, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from .models import (
+    Comment,
+    Game,
+    GameCommentMonth,
+    Studio,
+    StudioCommentMonth,
+    StudioGenreCount,
+    StudioStats,
+)
+
+GameGenre = Game.genre.through
+
+BATCH_SIZE = 1000
+
+# Rollup tables with their key and counter columns.
+ROLLUPS = {
+    GameCommentMonth: (("game_id", "month"), ("comments_count",)),
+    StudioStats: (
+        ("studio_id",),
+        ("games_count", "favorites_count", "comments_count"),
+    ),
+    StudioCommentMonth: (("studio_id", "month"), ("comments_count",)),
+    StudioGenreCount: (("studio_id", "genre_id"), ("games_count",)),
+}
+
+
+def month_of(moment):
+    # Same bucket as TruncMonth, which truncates in the current time zone.
+    return timezone.localtime(moment).date().replace(day=1)
+
+
+# Incremental maintenance, called from signals and the bulk write helpers.
+
+
+def comments_changed(comment, delta):
+    _comments_changed([comment], delta)
+
+
+def comments_added(comments):
+    """Count new comments that were inserted without signals (bulk_create)."""
+    _comments_changed(comments, 1)
+
+
+def _comments_changed(comments, delta):
+    studios = dict(
+        Game.objects.filter(
+            pk__in={comment.game_id for comment in comments}
+        ).values_list("pk", "studio_id")
+    )
+    game_months, studio_months, studio_totals = Counter(), Counter(), Counter()
+    for comment in comments:
+        studio_id = studios[comment.game_id]
+        month = month_of(comment.post_date)
+        game_months[comment.game_id, month] += delta
+        studio_months[studio_id, month] += delta
+        studio_totals[(studio_id,)] += delta
+    for model, counts in (
+        (GameCommentMonth, game_months),
+        (StudioCommentMonth, studio_months),
+        (StudioStats, studio_totals),
+    ):
+        _add(model, {key: {"comments_count": n} for key, n in counts.items()})
+
+
+def games_added(game_ids):
+    _games_changed(game_ids, 1)
+
+
+def game_removed(game):
+    """Subtract a game about to be deleted, along with its comments."""
+    _games_changed([game.pk], -1)
+    months = dict(
+        GameCommentMonth.objects.filter(game_id=game.pk).values_list(
+            "month", "comments_count"
+        )
+    )
+    _add(
+        StudioCommentMonth,
+        {
+            (game.studio_id, month): {"comments_count": -count}
+            for month, count in months.items()
+        },
+    )
+    _add(StudioStats, {(game.studio_id,): {"comments_count": -sum(months.values())}})
+
+
+def _games_changed(game_ids, sign):
+    totals = (
+        Game.objects.filter(pk__in=game_ids)
+        .values_list("studio")
+        .annotate(games=Count("pk"), favorites=Sum("favorites_count"))
+        .order_by()
+    )
+    _add(
+        StudioStats,
+        {
+            (studio_id,): {
+                "games_count": sign * games,
+                "favorites_count": sign * favorites,
+            }
+            for studio_id, games, favorites in totals
+        },
+    )
+    genre_links_changed(GameGenre.objects.filter(game_id__in=game_ids), sign)
+
+
+def genre_links_changed(links, delta):
+    """Count the existing Game.genre rows in ``links`` ``delta`` times."""
+    counts = (
+        links.values_list("game__studio", "genre").annotate(n=Count("pk")).order_by()
+    )
+    _add(
+        StudioGenreCount,
+        {
+            (studio_id, genre_id): {"games_count": delta * n}
+            for studio_id, genre_id, n in counts
+        },
+    )
+
+
+def favorites_changed(games, delta):
+    """Follow a change of ``delta`` to the favorites count of each of ``games``."""
+    if not delta:
+        return
+    per_studio = (
+        games.filter(studio=OuterRef("studio"))
+        .order_by()
+        .values("studio")
+        .annotate(n=Count("pk"))
+        .values("n")
+    )
+    StudioStats.objects.filter(studio__in=games.values("studio")).update(
+        favorites_count=F("favorites_count") + delta * Subquery(per_studio)
+    )
+
+
+def refresh_studio_favorites():
+    totals = (
+        Game.objects.filter(studio=OuterRef("studio"))
+        .order_by()
+        .values("studio")
+        .annotate(total=Sum("favorites_count"))
+        .values("total")
+    )
+    StudioStats.objects.update(favorites_count=Coalesce(Subquery(totals), 0))
+
+
+def refresh_studios(studio_ids):
+    """Recompute every rollup of the given studios from the source tables."""
+    studio_ids = set(studio_ids) - {None}
+    if studio_ids:
+        with transaction.atomic():
+            _write(_expected(studio_ids), studio_ids)
+
+
+def _add(model, changes):
+    """
+    Add ``{key: {counter: delta}}`` to rollup rows. Rows are created when a
+    delta is positive; conflicting inserts are ignored so concurrent writers
+    both end up incrementing the same row.
+    """
+    keys, _ = ROLLUPS[model]
+    changes = {
+        key: {name: delta for name, delta in deltas.items() if delta}
+        for key, deltas in changes.items()
+    }
+    changes = {key: deltas for key, deltas in changes.items() if deltas}
+    missing = [
+        model(**dict(zip(keys, key)))
+        for key, deltas in changes.items()
+        if any(delta > 0 for delta in deltas.values())
+    ]
+    if missing:
+        model.objects.bulk_create(missing, ignore_conflicts=True)
+    for key, deltas in changes.items():
+        model.objects.filter(**dict(zip(keys, key))).update(
+            **{name: F(name) + delta for name, delta in deltas.items()}
+        )
+
+
+# Full rebuild and consistency check.
+
+
+def rebuild():
+    """Recompute all rollup tables; returns the number of rows per table."""
+    with transaction.atomic():
+        return _write(_expected(), None)
+
+
+def check():
+    """
+    Compare the rollup tables with the source tables and return the rows
+    that differ per table as ``(key, expected, stored)``.
+    """
+    problems = {}
+    for model, expected in _expected().items():
+        keys, counters = ROLLUPS[model]
+        expected = {key: values for key, values in expected.items() if any(values)}
+        stored = {
+            row[: len(keys)]: row[len(keys) :]
+            for row in model.objects.values_list(*keys, *counters)
+            if any(row[len(keys) :])
+        }
+        differing = [
+            (key, expected.get(key), stored.get(key))
+            for key in expected.keys() | stored.keys()
+            if expected.get(key) != stored.get(key)
+        ]
+        if differing:
+            problems[model._meta.model_name] = differing
+    return problems
+
+
+def _expected(studio_ids=None):
+    games = Game.objects.all()
+    comments = Comment.objects.annotate(
+        month=TruncMonth("post_date", output_field=DateField())
+    )
+    links = GameGenre.objects.all()
+    if studio_ids is not None:
+        games = games.filter(studio__in=studio_ids)
+        comments = comments.filter(game__studio__in=studio_ids)
+        links = links.filter(game__studio__in=studio_ids)
+
+    game_months = _counts(comments.values_list("game", "month"))
+    studio_months = _counts(comments.values_list("game__studio", "month"))
+    totals = {
+        (studio_id,): [games_count, favorites or 0, 0]
+        for studio_id, games_count, favorites in games.values_list("studio")
+        .annotate(Count("pk"), Sum("favorites_count"))
+        .order_by()
+    }
+    for (studio_id, _), (count,) in studio_months.items():
+        totals[(studio_id,)][2] += count
+    return {
+        GameCommentMonth: game_months,
+        StudioStats: {key: tuple(values) for key, values in totals.items()},
+        StudioCommentMonth: studio_months,
+        StudioGenreCount: _counts(links.values_list("game__studio", "genre")),
+    }
+
+
+def _counts(rows):
+    return {
+        row[:-1]: (row[-1],) for row in rows.annotate(n=Count("pk")).order_by()
+    }
+
+
+def _write(expected, studio_ids):
+    written = {}
+    for model, rows in expected.items():
+        keys, counters = ROLLUPS[model]
+        stored = model.objects.all()
+        if studio_ids is not None:
+            lookup = "game__studio__in" if model is GameCommentMonth else "studio__in"
+            stored = stored.filter(**{lookup: studio_ids})
+        stored.delete()
+        model.objects.bulk_create(
+            [
+                model(**dict(zip(keys, key)), **dict(zip(counters, values)))
+                for key, values in rows.items()
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        written[model._meta.model_name] = len(rows)
+    return written
+
+
+# Reads.
+
+
+def game_stats(game_id):
+    favorites = Game.objects.values_list("favorites_count", flat=True).get(pk=game_id)
+    months = _months(GameCommentMonth.objects.filter(game_id=game_id))
+    return {
+        "favorites": favorites,
+        "comments": sum(month["comments"] for month in months),
+        "comments_by_month": months,
+    }
+
+
+def studio_stats(studio_id):
+    totals = StudioStats.objects.filter(studio_id=studio_id).first()
+    if totals is None:
+        if not Studio.objects.filter(pk=studio_id).exists():
+            raise Studio.DoesNotExist
+        totals = StudioStats(studio_id=studio_id)
+    genres = (
+        StudioGenreCount.objects.filter(studio_id=studio_id, games_count__gt=0)
+        .order_by("-games_count", "genre__name")
+        .values_list("genre_id", "genre__name", "games_count")
+    )
+    return {
+        "games": totals.games_count,
+        "favorites": totals.favorites_count,
+        "comments": totals.comments_count,
+        "comments_by_month": _months(
+            StudioCommentMonth.objects.filter(studio_id=studio_id)
+        ),
+        "genres": [
+            {"id": genre_id, "name": name, "games": games}
+            for genre_id, name, games in genres
+        ],
+    }
+
+
+def _months(rows):
+    return [
+        {"month": month, "comments": comments}
+        for month, comments in rows.filter(comments_count__gt=0)
+        .order_by("month")
+        .values_list("month", "comments_count")
+    ]
@@ -0,0 +1,120 @@
+"""
+Pytest plugin asserting per-endpoint SQL query and time budgets.
+
+Every request measured by InstrumentationMiddleware for the named view (its
+URL name, e.g. ``game-list``) must stay within the budget, and the view must
+be requested at least once. Budgets apply to a whole test with a marker::
+
+    @pytest.mark.budget("game-list", queries=3, ms=500)
+    def test_game_list(api_client): ...
+
+or to a block with the ``budget`` fixture::
+
+    with budget("game-detail", queries=2):
+        api_client.get(url)
+
+``--budget-report`` prints the worst query count and duration seen per view
+over the session, which helps picking budgets.
+"""
+
+from contextlib import contextmanager
+
+import pytest
+
+from game_catalog import metrics
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--budget-report",
+        action="store_true",
+        help="Report the worst query count and duration per endpoint.",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "budget(view, queries=None, ms=None): per-request query count and time "
+        "budget for an endpoint, checked at the end of the test.",
+    )
+    if config.getoption("--budget-report"):
+        config._budget_worst = {}
+
+        def record(sender, measurement, **kwargs):
+            key = (measurement["view"], measurement["method"])
+            queries, duration = config._budget_worst.get(key, (0, 0.0))
+            config._budget_worst[key] = (
+                max(queries, measurement["queries"]),
+                max(duration, measurement["duration"]),
+            )
+
+        config._budget_receiver = record
+        metrics.request_measured.connect(record, weak=False)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    worst = getattr(config, "_budget_worst", None)
+    if worst is None:
+        return
+    terminalreporter.section("endpoint budgets")
+    for (view, method), (queries, duration) in sorted(worst.items()):
+        terminalreporter.write_line(
+            f"{method:7} {view:40} {queries:4} queries {duration * 1000:9.1f} ms"
+        )
+
+
+@contextmanager
+def recording():
+    """Collect the measurements of the requests made inside the block."""
+    seen = []
+
+    def record(sender, measurement, **kwargs):
+        seen.append(measurement)
+
+    metrics.request_measured.connect(record, weak=False)
+    try:
+        yield seen
+    finally:
+        metrics.request_measured.disconnect(record)
+
+
+def enforce(view, measurements, queries=None, ms=None):
+    requests = [m for m in measurements if m["view"] == view]
+    if not requests:
+        pytest.fail(f"Budget for {view!r} set, but the endpoint was not requested.")
+    for measurement in requests:
+        if queries is not None and measurement["queries"] > queries:
+            pytest.fail(
+                f"{measurement['method']} {view} ran {measurement['queries']} "
+                f"queries, budget is {queries}."
+            )
+        took = measurement["duration"] * 1000
+        if ms is not None and took > ms:
+            pytest.fail(
+                f"{measurement['method']} {view} took {took:.1f} ms, "
+                f"budget is {ms} ms."
+            )
+
+
+@pytest.fixture
+def budget():
+    @contextmanager
+    def check(view, queries=None, ms=None):
+        with recording() as measurements:
+            yield
+        enforce(view, measurements, queries=queries, ms=ms)
+
+    return check
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    markers = list(item.iter_markers("budget"))
+    if not markers:
+        return (yield)
+    with recording() as measurements:
+        result = yield
+    for marker in markers:
+        enforce(*marker.args, measurements, **marker.kwargs)
+    return result
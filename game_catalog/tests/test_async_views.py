@@ -0,0 +1,63 @@
+from django.urls import reverse
+from rest_framework.test import APIClient
+import pytest
+
+from game_catalog.models import Comment
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.mark.parametrize(
+    "sync_name, async_name",
+    [
+        ("genre-list", "async-genre-list"),
+        ("studio-list", "async-studio-list"),
+        ("game-list", "async-game-list"),
+    ],
+)
+def test_async_lists_match_sync_views(api_client, game, sync_name, async_name):
+    sync = api_client.get(reverse(sync_name), {"fields": "id,name"})
+    response = api_client.get(reverse(async_name), {"fields": "id,name"})
+    assert response.status_code == 200
+    assert response.json() == sync.json()
+
+
+def test_async_game_list_filters_and_paginates(api_client, user, game, access_token):
+    user.favorite_games.add(game)
+    auth = {"HTTP_AUTHORIZATION": f"Bearer {access_token(user)}"}
+    params = {"ordering": "-name", "page_size": 1, "released_after": "2000-01-01"}
+
+    sync = api_client.get(reverse("game-list"), params, **auth).json()
+    data = api_client.get(reverse("async-game-list"), params, **auth).json()
+    assert data == sync
+    assert data["results"][0]["is_favorited"] is True
+
+    response = api_client.get(reverse("async-game-list"), {"released_after": "x"})
+    assert response.status_code == 400
+    assert "released_after" in response.json()
+
+
+def test_async_game_detail(api_client, game):
+    url = reverse("async-game-detail", kwargs={"pk": game.id})
+    sync = api_client.get(reverse("game-detail", kwargs={"pk": game.id}))
+    assert api_client.get(url).json() == sync.json()
+
+    response = api_client.get(reverse("async-game-detail", kwargs={"pk": 999}))
+    assert response.status_code == 404
+
+
+def test_async_game_comments(api_client, user, game, access_token):
+    Comment.objects.create(user=user, game=game, text="Async")
+    url = reverse("async-game-comments", kwargs={"pk": game.id})
+    assert api_client.get(url).status_code == 401
+
+    auth = {"HTTP_AUTHORIZATION": f"Bearer {access_token(user)}"}
+    sync = api_client.get(reverse("game-comments", kwargs={"pk": game.id}), **auth)
+    response = api_client.get(url, **auth)
+    assert response.json() == sync.json()
+    assert response.json()["results"][0]["text"] == "Async"
@@ -0,0 +1,119 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from game_catalog.models import Comment
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+def bearer(token):
+    return {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+
+def test_obtained_tokens_carry_claims(api_client, user):
+    response = api_client.post(
+        reverse("token_obtain_pair"),
+        {"username": "testuser123", "password": "password123"},
+    )
+    access = AccessToken(response.json()["access"])
+    assert access["username"] == "testuser123"
+    assert access["is_staff"] is False
+
+    response = api_client.post(
+        reverse("token_refresh"), {"refresh": response.json()["refresh"]}
+    )
+    assert AccessToken(response.json()["access"])["username"] == "testuser123"
+
+
+def test_authentication_needs_no_query_once_cached(
+    api_client, user, game, access_token, django_assert_num_queries
+):
+    url = reverse("game-comments", kwargs={"pk": game.pk})
+    Comment.objects.create(user=user, game=game, text="First")
+    auth = bearer(access_token(user))
+    api_client.get(url, **auth)
+
+    # Only the comments page.
+    with django_assert_num_queries(1):
+        response = api_client.get(url, **auth)
+    assert response.status_code == 200
+
+
+def test_comment_create_and_owner_check_do_not_load_users(
+    api_client, user, game, access_token
+):
+    auth = bearer(access_token(user))
+    with CaptureQueriesContext(connection) as context:
+        response = api_client.post(
+            reverse("comment-list-create"), {"game": game.pk, "text": "Nice"}, **auth
+        )
+        assert response.status_code == 201
+        comment_url = reverse("comment-detail", kwargs={"pk": response.json()["id"]})
+        assert api_client.delete(comment_url, **auth).status_code == 204
+
+    assert response.json()["user"] == user.pk
+    # Loading a user row would read its password hash.
+    assert not any('"password"' in query["sql"] for query in context.captured_queries)
+
+
+def test_lazy_user_loads_for_full_profile(api_client, user, access_token):
+    response = api_client.get(reverse("customuser-me"), **bearer(access_token(user)))
+    assert response.status_code == 200
+    assert response.json()["email"] == user.email
+
+
+def test_renamed_user_is_shown_with_the_new_name(
+    api_client, user, game, access_token
+):
+    auth = bearer(access_token(user))
+    user.username = "renamed"
+    user.save()
+
+    response = api_client.get(reverse("customuser-me"), **auth)
+    assert response.json()["username"] == "renamed"
+    url = reverse("game-toggle-favorite", kwargs={"pk": game.pk})
+    response = api_client.post(url, **auth)
+    assert response.json()["user"]["username"] == "renamed"
+
+
+def test_tokens_without_claims_still_work(api_client, user):
+    token = AccessToken.for_user(user)
+    response = api_client.get(reverse("customuser-me"), **bearer(token))
+    assert response.json()["username"] == "testuser123"
+
+
+def test_deactivated_user_is_rejected(api_client, user, access_token):
+    auth = bearer(access_token(user))
+    assert api_client.get(reverse("customuser-me"), **auth).status_code == 200
+
+    user.is_active = False
+    user.save()
+    response = api_client.get(reverse("customuser-me"), **auth)
+    assert response.status_code == 401
+    assert response.json()["code"] == "user_inactive"
+
+
+def test_deleted_user_is_rejected(api_client, user, access_token):
+    auth = bearer(access_token(user))
+    user.delete()
+    response = api_client.get(reverse("customuser-me"), **auth)
+    assert response.status_code == 401
+    assert response.json()["code"] == "user_not_found"
+
+
+def test_demoted_admin_loses_access(api_client, admin_user, access_token):
+    auth = bearer(access_token(admin_user))
+    assert api_client.get(reverse("cache-stats"), **auth).status_code == 200
+
+    admin_user.is_staff = False
+    admin_user.save()
+    assert api_client.get(reverse("cache-stats"), **auth).status_code == 403
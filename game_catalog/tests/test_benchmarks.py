@@ -0,0 +1,80 @@
+import pytest
+
+from benchmarks import compare, generate, run
+from benchmarks.scenarios import context, scenarios, uncovered
+from game_catalog.models import Comment, Game
+
+pytestmark = pytest.mark.django_db
+
+SMALL = {
+    "genres": 3,
+    "studios": 2,
+    "games": 20,
+    "users": 5,
+    "favorites": 30,
+    "comments": 40,
+}
+
+
+@pytest.fixture
+def dataset():
+    generate.generate(SMALL, seed=1)
+    return context()
+
+
+def test_generate():
+    generate.generate(SMALL, seed=1)
+    assert Game.objects.count() == 20
+    assert Comment.objects.count() == 40
+    assert Game.objects.filter(favorites_count__gt=0).exists()
+
+
+def test_every_route_has_a_scenario(dataset):
+    assert uncovered(scenarios(dataset)) == []
+
+
+def test_scenarios_succeed(dataset):
+    headers = {
+        role: {"Authorization": f"Bearer {token}"}
+        for role, token in run.tokens(dataset).items()
+    }
+    headers[None] = {}
+    for scenario in scenarios(dataset):
+        if scenario.route in ("register", "token_obtain_pair"):
+            continue  # Password hashing, slow by design.
+        result = run.run_client(scenario, headers[scenario.user], 1, 0)
+        assert result["errors"] == 0, scenario.name
+    assert Game.objects.count() == 20
+
+
+def test_deep_scenarios_start_halfway(dataset, client):
+    [deep] = [s for s in scenarios(dataset) if s.name == "games deep"]
+    ids = list(Game.objects.order_by("release_date", "id").values_list("pk", flat=True))
+
+    response = client.get(deep.path)
+
+    assert response.json()["results"][0]["id"] == ids[len(ids) // 2 + 1]
+
+
+def test_compare_flags_regressions():
+    def results(p95, queries):
+        return {
+            "meta": {"commit": "x", "dataset": {}},
+            "results": [
+                {
+                    "scenario": "games",
+                    "mode": "client",
+                    "rps": 100.0,
+                    "errors": 0,
+                    "p95_ms": p95,
+                    "queries": queries,
+                    "bytes": 10,
+                }
+            ],
+        }
+
+    changes = compare.compare(results(10.0, 3), results(10.5, 3), threshold=10)
+    assert not any(regressed for *_, regressed in changes)
+    changes = compare.compare(results(10.0, 3), results(20.0, 4), threshold=10)
+    regressed = {metric for _, metric, _, _, bad in changes if bad}
+    assert regressed == {"p95_ms", "queries"}
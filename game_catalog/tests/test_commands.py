@@ -0,0 +1,119 @@
+import gzip
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from game_catalog import search
+from game_catalog.models import (
+    Comment,
+    CustomUser,
+    Game,
+    LeaderboardEntry,
+    StudioStats,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+def test_rebuild_favorites_count(user, game):
+    user.favorite_games.add(game)
+    Game.objects.update(favorites_count=42)
+    CustomUser.objects.update(favorites_count=42)
+
+    out = StringIO()
+    call_command("rebuild_favorites_count", stdout=out)
+
+    game.refresh_from_db()
+    user.refresh_from_db()
+    assert game.favorites_count == 1
+    assert user.favorites_count == 1
+    assert "1 games" in out.getvalue()
+
+
+def test_rebuild_search_index(game):
+    search.get_backend().clear()
+    call_command("rebuild_search_index", stdout=StringIO())
+
+    assert search.get_backend().search(["fortnite"], 10, 0) == [game.id]
+
+
+def test_export_catalog(game, tmp_path):
+    out = StringIO()
+    call_command("export_catalog", stdout=out)
+    assert json.loads(out.getvalue())["name"] == game.name
+
+    path = tmp_path / "games.csv.gz"
+    call_command(
+        "export_catalog", str(path), format="csv", gzip=True, stderr=StringIO()
+    )
+    assert gzip.decompress(path.read_bytes()).decode().startswith("id,name,")
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_import_catalog_round_trip(game, studio, genre, tmp_path, workers):
+    path = tmp_path / "games.ndjson.gz"
+    call_command("export_catalog", str(path), gzip=True, stderr=StringIO())
+    Game.objects.all().delete()
+
+    out = StringIO()
+    call_command("import_catalog", str(path), workers=workers, stdout=out)
+
+    imported = Game.objects.get()
+    assert imported.name == game.name
+    assert imported.studio == studio
+    assert list(imported.genre.all()) == [genre]
+    assert "Imported 1 games, rejected 0 rows" in out.getvalue()
+
+
+def test_import_catalog_upserts_and_logs_errors(studio, tmp_path):
+    path = tmp_path / "games.csv"
+    path.write_text(
+        "id,name,description,release_date,studio_id,studio_name,studio_country,"
+        "studio_founded_date,genres\n"
+        f"1,Quake,,1996-06-22,1,{studio.name},Finland,{studio.founded_date},FPS|New\n"
+        f"2,Broken,,not-a-date,1,{studio.name},Finland,{studio.founded_date},FPS\n"
+    )
+    errors = tmp_path / "errors.ndjson"
+
+    call_command(
+        "import_catalog", str(path), errors=str(errors), batch_size=1, stdout=StringIO()
+    )
+
+    game = Game.objects.get()
+    assert game.studio == studio
+    studio.refresh_from_db()
+    assert studio.country == "Finland"
+    assert sorted(game.genre.values_list("name", flat=True)) == ["FPS", "New"]
+    logged = json.loads(errors.read_text())
+    assert logged["line"] == 3
+    assert "release_date" in logged["errors"]
+
+
+def test_refresh_leaderboards_incrementally(user, game, genre):
+    Comment.objects.create(user=user, game=game, text="First")
+    call_command("refresh_leaderboards", stdout=StringIO())
+
+    Comment.objects.create(user=user, game=game, text="Second")
+    out = StringIO()
+    call_command("refresh_leaderboards", board=["comments"], stdout=out)
+
+    entries = LeaderboardEntry.objects.filter(board="comments", game=game)
+    assert set(entries.values_list("genre", "score")) == {(None, 2), (genre.id, 2)}
+    assert LeaderboardEntry.objects.filter(board="comments_7d", score=1).count() == 2
+    assert "comments: rescored 1 games" in out.getvalue()
+
+
+def test_rebuild_and_check_stats(user, game):
+    Comment.objects.create(user=user, game=game, text="First")
+    StudioStats.objects.update(comments_count=5)
+
+    with pytest.raises(CommandError):
+        call_command("check_stats", stdout=StringIO())
+
+    call_command("rebuild_stats", stdout=StringIO())
+    out = StringIO()
+    call_command("check_stats", stdout=out)
+    assert "consistent" in out.getvalue()
+    assert StudioStats.objects.get().comments_count == 1
@@ -0,0 +1,139 @@
+import json
+
+from django.db import OperationalError
+from django.urls import reverse
+from rest_framework.test import APIClient
+import pytest
+
+from game_catalog import comment_buffer, stats
+from game_catalog.models import Comment, StudioStats
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def write_behind(settings):
+    settings.COMMENT_WRITE_BEHIND = True
+    # Flushed by the tests themselves, inside the test transaction.
+    settings.COMMENT_FLUSH_INTERVAL = 60_000
+    yield
+    comment_buffer.shutdown()
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def post(client, game, text):
+    return client.post(reverse("comment-list-create"), {"game": game.pk, "text": text})
+
+
+def test_post_is_accepted_and_inserted_on_flush(write_behind, client, user, game):
+    response = post(client, game, "Later")
+
+    assert response.status_code == 202
+    assert response.data["id"] is None
+    # Set by the insert.
+    assert response.data["post_date"] is None
+    assert not Comment.objects.exists()
+
+    assert comment_buffer.flush() == 1
+    comment = Comment.objects.get()
+    assert str(comment.uuid) == response.data["uuid"]
+    assert (comment.user, comment.game, comment.text) == (user, game, "Later")
+    assert stats.check() == {}
+    assert StudioStats.objects.get(studio=game.studio).comments_count == 1
+
+
+def test_author_sees_pending_comments(write_behind, client, user, admin_user, game):
+    Comment.objects.create(user=user, game=game, text="Saved")
+    post(client, game, "Pending")
+
+    feed = client.get(reverse("game-comments", args=[game.pk])).data["results"]
+    assert [row["text"] for row in feed] == ["Pending", "Saved"]
+    feed = client.get(reverse("comment-list-create")).data["results"]
+    assert [row["text"] for row in feed] == ["Saved", "Pending"]
+
+    other = APIClient()
+    other.force_authenticate(admin_user)
+    feed = other.get(reverse("game-comments", args=[game.pk])).data["results"]
+    assert [row["text"] for row in feed] == ["Saved"]
+
+    comment_buffer.flush()
+    feed = client.get(reverse("game-comments", args=[game.pk])).data["results"]
+    assert [row["text"] for row in feed] == ["Pending", "Saved"]
+    assert feed[0]["id"] is not None
+
+
+def test_shutdown_flushes(write_behind, client, user, game):
+    post(client, game, "First")
+    post(client, game, "Second")
+
+    comment_buffer.shutdown()
+
+    assert Comment.objects.count() == 2
+    assert comment_buffer.pending(user.pk) == []
+
+
+def test_shutdown_retries_a_failed_flush(write_behind, client, game, monkeypatch):
+    insert = comment_buffer._insert
+    calls = []
+
+    def flaky(comments):
+        calls.append(len(comments))
+        if len(calls) == 1:
+            raise OperationalError("database is locked")
+        return insert(comments)
+
+    monkeypatch.setattr(comment_buffer, "_insert", flaky)
+    monkeypatch.setattr(comment_buffer, "SHUTDOWN_RETRY_DELAY", 0)
+    post(client, game, "Retried")
+
+    comment_buffer.shutdown()
+
+    assert calls == [1, 1]
+    assert Comment.objects.get().text == "Retried"
+
+
+def test_shutdown_logs_comments_it_cannot_insert(
+    write_behind, client, user, game, monkeypatch, caplog
+):
+    def broken(comments):
+        raise OperationalError("disk I/O error")
+
+    monkeypatch.setattr(comment_buffer, "_insert", broken)
+    monkeypatch.setattr(comment_buffer, "SHUTDOWN_RETRY_DELAY", 0)
+    response = post(client, game, "Lost")
+
+    comment_buffer.shutdown()
+
+    [record] = [r for r in caplog.records if "not inserted" in r.getMessage()]
+    payload = json.loads(record.args[0])
+    assert payload == {
+        "uuid": response.data["uuid"],
+        "user": user.pk,
+        "game": game.pk,
+        "text": "Lost",
+    }
+    assert comment_buffer.pending(user.pk) == []
+
+
+def test_comments_on_deleted_games_are_dropped(write_behind, client, game):
+    post(client, game, "Orphan")
+    game.delete()
+    assert comment_buffer.flush() == 0
+
+
+def test_invalid_comment_is_rejected(write_behind, client):
+    response = client.post(reverse("comment-list-create"), {"game": 0, "text": "x"})
+    assert response.status_code == 400
+
+
+def test_disabled_by_default(settings, client, game):
+    settings.COMMENT_WRITE_BEHIND = False
+    response = post(client, game, "Now")
+    assert response.status_code == 201
+    assert Comment.objects.get().uuid is not None
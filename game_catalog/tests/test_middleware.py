@@ -0,0 +1,98 @@
+import time
+
+from django.urls import reverse
+from rest_framework import serializers
+from rest_framework.test import APIClient
+import pytest
+
+from game_catalog import metrics, reference
+from game_catalog.tests.budgets import enforce, recording
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def test_debug_headers(settings, game):
+    settings.INSTRUMENTATION_HEADERS = True
+    reference.warm()
+    response = APIClient().get(reverse("game-list"))
+
+    assert response["X-Query-Count"] == "3"
+    timings = dict(
+        part.split(";dur=") for part in response["Server-Timing"].split(", ")
+    )
+    assert set(timings) == {"db", "serialize", "render", "total"}
+    assert float(timings["total"]) >= float(timings["db"])
+
+
+def test_serialization_time_is_the_serializers_own(settings, genre, monkeypatch):
+    settings.INSTRUMENTATION_HEADERS = True
+    to_representation = serializers.ModelSerializer.to_representation
+
+    def slow(self, instance):
+        time.sleep(0.05)
+        return to_representation(self, instance)
+
+    monkeypatch.setattr(serializers.ModelSerializer, "to_representation", slow)
+    with recording() as measurements:
+        response = APIClient().get(reverse("genre-list"))
+
+    [measurement] = measurements
+    assert measurement["serialize_time"] >= 0.05
+    assert measurement["render_time"] < 0.05
+    assert "serialize;dur=" in response["Server-Timing"]
+
+
+def test_no_debug_headers_by_default(settings, genre):
+    settings.INSTRUMENTATION_HEADERS = False
+    response = APIClient().get(reverse("genre-list"))
+    assert "X-Query-Count" not in response
+
+
+def test_metrics_endpoint(settings, genre):
+    settings.METRICS_ALLOWED_IPS = ["127.0.0.1"]
+    client = APIClient()
+    client.get(reverse("genre-list"))
+
+    response = client.get(reverse("metrics"))
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain")
+    body = response.content.decode()
+    labels = 'view="genre-list",method="GET"'
+    assert f'catalog_requests_total{{{labels},status="200"}} 1' in body
+    assert f"catalog_db_queries_total{{{labels}}} 2" in body
+    assert f"catalog_request_duration_seconds_count{{{labels}}} 1" in body
+
+    remote = client.get(reverse("metrics"), REMOTE_ADDR="10.1.2.3")
+    assert remote.status_code == 404
+
+
+def test_metrics_endpoint_is_closed_behind_a_local_proxy(settings):
+    # A reverse proxy on the same host forwards every client from loopback.
+    settings.METRICS_ALLOWED_IPS = []
+    response = APIClient().get(
+        reverse("metrics"), REMOTE_ADDR="127.0.0.1", HTTP_X_FORWARDED_FOR="203.0.113.9"
+    )
+    assert response.status_code == 404
+
+
+def test_budget_is_enforced(genre):
+    with recording() as measurements:
+        APIClient().get(reverse("genre-list"))
+
+    enforce("genre-list", measurements, queries=2)
+    with pytest.raises(pytest.fail.Exception, match="ran 2 queries, budget is 1"):
+        enforce("genre-list", measurements, queries=1)
+    with pytest.raises(pytest.fail.Exception, match="not requested"):
+        enforce("game-list", measurements, queries=10)
+
+
+def test_budget_fixture(budget, genre):
+    with budget("genre-list", queries=2, ms=5000):
+        APIClient().get(reverse("genre-list"))
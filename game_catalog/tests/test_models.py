@@ -1,6 +1,7 @@
 import pytest
 
-from game_catalog.models import Comment
+from game_catalog import stats
+from game_catalog.models import Comment, Game, Genre, Studio
 
 pytestmark = pytest.mark.django_db
 
@@ -25,3 +26,91 @@ def test_user_is_favorite(user, game):
 def test_comment_creation(user, game):
     comment = Comment.objects.create(user=user, game=game, text="Great game!")
     assert str(comment).startswith(f"Comment by {user.username}")
+
+
+def test_favorites_count_follows_favorites(user, admin_user, game):
+    user.favorite_games.add(game)
+    game.favorited_by.add(admin_user)
+    user.favorite_games.add(game)
+    game.refresh_from_db()
+    assert game.favorites_count == 2
+
+    user.favorite_games.remove(game)
+    user.favorite_games.remove(game)
+    game.refresh_from_db()
+    assert game.favorites_count == 1
+
+    game.favorited_by.clear()
+    game.refresh_from_db()
+    assert game.favorites_count == 0
+
+
+def test_user_favorites_count_follows_favorites(user, admin_user, game, studio):
+    other = Game.objects.create(
+        name="Other", description="", release_date="2020-01-01", studio=studio
+    )
+    user.favorite_games.add(game, other)
+    game.favorited_by.add(admin_user)
+    user.refresh_from_db()
+    admin_user.refresh_from_db()
+    assert (user.favorites_count, admin_user.favorites_count) == (2, 1)
+
+    user.favorite_games.remove(other, other)
+    game.favorited_by.remove(admin_user)
+    user.refresh_from_db()
+    admin_user.refresh_from_db()
+    assert (user.favorites_count, admin_user.favorites_count) == (1, 0)
+
+    game.favorited_by.add(admin_user)
+    game.delete()
+    user.refresh_from_db()
+    admin_user.refresh_from_db()
+    assert (user.favorites_count, admin_user.favorites_count) == (0, 0)
+
+    user.favorite_games.add(other)
+    user.favorite_games.clear()
+    user.refresh_from_db()
+    assert user.favorites_count == 0
+
+
+def test_favorites_count_released_on_user_delete(user, game):
+    user.favorite_games.add(game)
+    user.delete()
+    game.refresh_from_db()
+    assert game.favorites_count == 0
+
+
+def test_stats_rollups_follow_changes(user, admin_user, game, genre, studio):
+    other = Studio.objects.create(
+        name="Other", founded_date="2000-01-01", description="", country="Japan"
+    )
+    rpg = Genre.objects.create(name="RPG", description="")
+    assert stats.check() == {}
+
+    Comment.objects.create(user=user, game=game, text="One")
+    Comment.objects.create(user=admin_user, game=game, text="Two")
+    user.favorite_games.add(game)
+    admin_user.favorite_games.add(game)
+    game.genre.add(rpg)
+    rpg.game_set.remove(game)
+    assert stats.check() == {}
+    assert stats.studio_stats(studio.id)["comments"] == 2
+    assert stats.studio_stats(studio.id)["favorites"] == 2
+
+    game.refresh_from_db()
+    game.studio = other
+    game.save()
+    assert stats.check() == {}
+    assert stats.studio_stats(other.id)["games"] == 1
+
+    admin_user.delete()
+    game.genre.clear()
+    assert stats.check() == {}
+    assert stats.game_stats(game.id)["comments"] == 1
+
+    Game.objects.create(
+        name="New", description="", release_date="2020-01-01", studio=other
+    ).delete()
+    game.delete()
+    assert stats.check() == {}
+    assert stats.studio_stats(other.id)["games"] == 0
@@ -0,0 +1,90 @@
+import threading
+
+import pytest
+from django.contrib.auth.hashers import check_password, identify_hasher
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from game_catalog import passwords
+from game_catalog.models import CustomUser
+
+pytestmark = pytest.mark.django_db
+
+SIGNUP = {"username": "newplayer", "password": "correct-horse-battery"}
+
+
+@pytest.fixture(autouse=True)
+def fast_hashing(settings):
+    settings.PASSWORD_HASHERS = ["game_catalog.passwords.ScryptPasswordHasher"]
+    settings.PASSWORD_HASHER_PARAMS = {"scrypt": {"work_factor": 2**10}}
+    yield
+    passwords.shutdown()
+
+
+def test_register_inserts_the_user_once():
+    with CaptureQueriesContext(connection) as context:
+        response = APIClient().post(reverse("register"), SIGNUP)
+
+    assert response.status_code == 201
+    assert "password" not in response.json()
+    writes = [
+        query["sql"]
+        for query in context.captured_queries
+        if query["sql"].startswith(("INSERT", "UPDATE"))
+    ]
+    assert len(writes) == 1
+    user = CustomUser.objects.get(username="newplayer")
+    assert user.check_password("correct-horse-battery")
+
+
+def test_hasher_parameters_come_from_settings():
+    encoded = passwords.make_password("secret")
+    decoded = identify_hasher(encoded).decode(encoded)
+    assert decoded["algorithm"] == "scrypt"
+    assert decoded["work_factor"] == 2**10
+    assert check_password("secret", encoded)
+
+
+def test_hashing_in_a_process_pool(settings):
+    settings.PASSWORD_HASHING_WORKERS = 1
+    response = APIClient().post(reverse("register"), SIGNUP)
+
+    assert response.status_code == 201
+    assert passwords._pool is not None
+    assert CustomUser.objects.get(username="newplayer").check_password(
+        "correct-horse-battery"
+    )
+
+
+def test_full_hashing_queue_rejects_signups(settings):
+    settings.PASSWORD_HASHING_WORKERS = 1
+    settings.PASSWORD_HASHING_QUEUE = 0
+    response = APIClient().post(reverse("register"), SIGNUP)
+
+    assert response.status_code == 503
+    assert response.json()["detail"].startswith("Too many signups")
+    assert not CustomUser.objects.filter(username="newplayer").exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_hashing_stays_off_the_write_queue(settings, monkeypatch):
+    settings.SQLITE_WRITE_QUEUE = True
+    make_password = passwords.make_password
+    seen = []
+
+    def spy(raw_password):
+        seen.append(
+            (
+                threading.current_thread().name,
+                transaction.get_connection().in_atomic_block,
+            )
+        )
+        return make_password(raw_password)
+
+    monkeypatch.setattr(passwords, "make_password", spy)
+    response = APIClient().post(reverse("register"), SIGNUP)
+
+    assert response.status_code == 201
+    assert seen == [(threading.current_thread().name, False)]
@@ -0,0 +1,83 @@
+import itertools
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from game_catalog import reference
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != "sqlite", reason="Plans are checked with SQLite"
+    ),
+]
+
+FILTERS = {
+    "genre": "1,2",
+    "studio": "1",
+    "country": "Japan",
+    "released_after": "2015-01-01",
+    "released_before": "2020-01-01",
+}
+ORDERINGS = [None, "release_date", "-release_date", "name", "-name"]
+
+
+def filter_combinations():
+    for size in range(len(FILTERS) + 1):
+        for names in itertools.combinations(FILTERS, size):
+            for ordering in ORDERINGS:
+                params = {name: FILTERS[name] for name in names}
+                if ordering:
+                    params["ordering"] = ordering
+                yield params
+
+
+def query_plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def assert_indexed(sql, filtered=True):
+    plan = query_plan(sql)
+    # "SCAN <table>" without "USING ... INDEX" reads every row of the table.
+    assert not [
+        step for step in plan if step.startswith("SCAN") and "INDEX" not in step
+    ], (sql, plan)
+    if filtered:
+        # "SCAN ... USING INDEX" still walks the whole index; a filter has to
+        # narrow the rows with an index search.
+        assert not [step for step in plan if step.startswith("SCAN")], (sql, plan)
+        assert any(
+            re.match(r"SEARCH \S+ USING (COVERING )?INDEX", step) for step in plan
+        ), (sql, plan)
+
+
+@pytest.mark.parametrize("params", list(filter_combinations()), ids=str)
+def test_game_list_filters_use_indexes(params, game):
+    # Genres and studios are read whole, once per process.
+    reference.warm()
+    with CaptureQueriesContext(connection) as context:
+        response = APIClient().get(reverse("game-list"), params)
+    assert response.status_code == 200
+
+    # Only the unfiltered listing may walk an ordering index end to end.
+    filtered = any(name in params for name in FILTERS)
+    for query in context.captured_queries:
+        if query["sql"].startswith("SELECT"):
+            assert_indexed(query["sql"], filtered)
+
+
+@pytest.mark.parametrize("params", [{}, {"genre": "1"}, {"board": "comments_7d"}])
+def test_game_leaderboard_uses_index(params, game):
+    with CaptureQueriesContext(connection) as context:
+        response = APIClient().get(reverse("game-leaderboard"), params)
+    assert response.status_code == 200
+
+    for query in context.captured_queries:
+        if query["sql"].startswith("SELECT"):
+            assert_indexed(query["sql"])
@@ -0,0 +1,80 @@
+import time
+
+from django.urls import reverse
+from rest_framework.test import APIClient
+import pytest
+
+from game_catalog import reference
+from game_catalog.models import Game, Genre, Studio
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def warm(game):
+    reference.warm()
+
+
+def first_game(user=None, **params):
+    client = APIClient()
+    if user is not None:
+        # Authenticated lists skip the response cache.
+        client.force_authenticate(user)
+    return client.get(reverse("game-list"), params).json()["results"][0]
+
+
+def test_list_reads_studio_and_genres_from_memory(
+    warm, game, genre, studio, django_assert_num_queries
+):
+    with django_assert_num_queries(3):
+        item = first_game()
+    assert item["studio"] == {"id": studio.id, "name": studio.name}
+    assert item["genre"] == [{"id": genre.id, "name": genre.name}]
+
+
+def test_changes_reload_the_reference_data(
+    warm, game, genre, studio, django_capture_on_commit_callbacks
+):
+    studio.name = "Renamed"
+    with django_capture_on_commit_callbacks(execute=True):
+        studio.save()
+        rpg = Genre.objects.create(name="RPG", description="")
+        game.genre.add(rpg)
+
+    item = first_game()
+    assert item["studio"]["name"] == "Renamed"
+    assert [entry["name"] for entry in item["genre"]] == ["Action", "RPG"]
+
+
+def test_unknown_rows_reload_the_reference_data(warm, game):
+    # bulk_create sends no signals, like a write made by another process.
+    [studio] = Studio.objects.bulk_create(
+        [Studio(name="New", founded_date="2000-01-01", description="", country="")]
+    )
+    Game.objects.filter(pk=game.pk).update(studio=studio)
+    assert first_game()["studio"]["name"] == "New"
+
+
+def test_writes_by_other_processes_are_seen_after_max_age(
+    warm, game, studio, user, settings, monkeypatch
+):
+    # update() sends no signals, so this process's version does not move.
+    Studio.objects.filter(pk=studio.pk).update(name="Renamed elsewhere")
+    assert first_game(user)["studio"]["name"] == studio.name
+
+    later = time.monotonic() + settings.REFERENCE_DATA_MAX_AGE + 1
+    monkeypatch.setattr(reference.time, "monotonic", lambda: later)
+    assert first_game(user)["studio"]["name"] == "Renamed elsewhere"
+
+
+def test_unrequested_relations_are_not_loaded(warm, game, django_assert_num_queries):
+    # Validators aggregate and games.
+    with django_assert_num_queries(2):
+        item = first_game(fields="id,name")
+    assert set(item) == {"id", "name"}
+
+
+def test_expanded_relations_come_from_memory(warm, game, studio):
+    item = first_game(expand="studio,genre")
+    assert item["studio"]["description"] == studio.description
+    assert item["genre"][0]["description"] == "Action games"
@@ -0,0 +1,115 @@
+from django.urls import reverse
+from rest_framework.test import APIClient
+import pytest
+
+from game_catalog import cache
+from game_catalog.models import CustomUser, Genre
+from game_catalog.replicas import STICKY_COOKIE
+
+pytestmark = pytest.mark.django_db(databases=["default", "replica"])
+
+
+@pytest.fixture
+def replica(settings):
+    settings.DATABASE_READ_REPLICAS = ["replica"]
+    Genre.objects.using("replica").create(
+        name="Replicated", description="Only on the replica"
+    )
+
+
+def names(response):
+    return [genre["name"] for genre in response.data]
+
+
+def test_safe_reads_use_replica(replica, user):
+    Genre.objects.create(name="Primary only", description="Not replicated")
+    client = APIClient()
+    client.force_authenticate(user)
+
+    response = client.get(reverse("genre-list"))
+
+    assert names(response) == ["Replicated"]
+
+
+def test_cached_responses_are_rendered_from_primary(replica):
+    Genre.objects.create(name="Primary only", description="Not replicated")
+
+    response = APIClient().get(reverse("genre-list"))
+
+    assert names(response) == ["Primary only"]
+    assert names(APIClient().get(reverse("genre-list"))) == ["Primary only"]
+
+
+def test_cached_validators_are_not_used_on_replica(replica, settings, user, game):
+    client = APIClient()
+    client.force_authenticate(user)
+    settings.DATABASE_READ_REPLICAS = []
+    first = client.get(reverse("game-list"))
+    settings.DATABASE_READ_REPLICAS = ["replica"]
+
+    response = client.get(
+        reverse("game-list"), HTTP_IF_NONE_MATCH=first.headers["ETag"]
+    )
+
+    # The replica has no games, so nothing matches the primary's validators.
+    assert response.status_code == 200
+    assert response.data["results"] == []
+
+
+def test_reads_stay_on_primary_after_write(replica, admin_user):
+    client = APIClient()
+    client.force_authenticate(admin_user)
+
+    response = client.post(
+        reverse("genre-list"), {"name": "Written", "description": "New"}
+    )
+
+    assert response.status_code == 201
+    # Users are kept on the primary by id, wherever their next request lands.
+    assert STICKY_COOKIE not in response.cookies
+    assert cache.get_cache().get(f"catalog:primary:{admin_user.pk}")
+    assert Genre.objects.using("default").filter(name="Written").exists()
+    assert not Genre.objects.using("replica").filter(name="Written").exists()
+    assert names(client.get(reverse("genre-list"))) == ["Written"]
+
+    other = APIClient()
+    other.force_authenticate(CustomUser.objects.create(username="other"))
+    assert names(other.get(reverse("genre-list"))) == ["Replicated"]
+
+
+def test_anonymous_writer_sticks_with_a_cookie(replica):
+    response = APIClient().post(
+        reverse("register"), {"username": "newuser", "password": "secret123"}
+    )
+
+    assert response.status_code == 201
+    assert STICKY_COOKIE in response.cookies
+
+
+def test_failed_write_does_not_stick(replica, user):
+    client = APIClient()
+    client.force_authenticate(user)
+
+    response = client.post(
+        reverse("genre-list"), {"name": "Denied", "description": "New"}
+    )
+
+    assert response.status_code == 403
+    assert STICKY_COOKIE not in response.cookies
+
+
+def test_views_without_opt_in_use_primary(replica, user):
+    CustomUser.objects.using("replica").create(username="replicated")
+    client = APIClient()
+    client.force_authenticate(user)
+
+    response = client.get(reverse("customuser-list"))
+
+    usernames = [row["username"] for row in response.data["results"]]
+    assert usernames == [user.username]
+
+
+def test_primary_without_replicas(settings, genre):
+    settings.DATABASE_READ_REPLICAS = []
+    response = APIClient().get(reverse("genre-list"))
+    assert names(response) == [genre.name]
@@ -25,11 +25,17 @@ def test_game_serializer_output(game):
             "country": game.studio.country,
         },
         "in_favorites": game.favorited_by.count(),
+        "is_favorited": False,
     }
 
     assert serializer.data == expected
 
 
+def test_game_serializer_is_favorited_from_context(game):
+    serializer = GameSerializer(game, context={"favorite_ids": {game.id}})
+    assert serializer.data["is_favorited"] is True
+
+
 class RegisterSerializerTestCase(TestCase):
     def test_register_serializer_valid(self):
         """Test valid data for RegisterSerializer"""
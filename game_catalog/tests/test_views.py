@@ -1,7 +1,21 @@
+import csv
+import gzip
+import json
+import time
+from base64 import b64encode
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
 from rest_framework.test import APIClient
 import pytest
 
+from game_catalog import leaderboards, reference, search
+from game_catalog.models import Comment, Game, Genre, Studio
+from game_catalog.views import GameViewSet
+
 pytestmark = pytest.mark.django_db
 
 
@@ -27,12 +41,616 @@ def test_genre_list(api_client, genre, paths):
     ]
 
 
+def test_genre_list_served_from_cache_until_write(
+    api_client,
+    genre,
+    paths,
+    django_assert_num_queries,
+    django_capture_on_commit_callbacks,
+):
+    api_client.get(paths["genre_list"])
+    with django_assert_num_queries(0):
+        response = api_client.get(paths["genre_list"])
+    assert response.json()[0]["name"] == "Action"
+
+    genre.name = "Adventure"
+    with django_capture_on_commit_callbacks() as callbacks:
+        genre.save()
+    # The cache is only invalidated once the write is committed.
+    assert api_client.get(paths["genre_list"]).json()[0]["name"] == "Action"
+
+    for callback in callbacks:
+        callback()
+    response = api_client.get(paths["genre_list"])
+    assert response.json()[0]["name"] == "Adventure"
+
+
+def test_game_cache_invalidated_by_studio_change(
+    api_client, game, paths, django_capture_on_commit_callbacks
+):
+    api_client.get(paths["game_detail"])
+    game.studio.name = "Renamed"
+    with django_capture_on_commit_callbacks(execute=True):
+        game.studio.save()
+
+    response = api_client.get(paths["game_detail"])
+    assert response.json()["studio"]["name"] == "Renamed"
+
+
+def test_game_detail_conditional_get(
+    api_client,
+    user,
+    game,
+    paths,
+    django_assert_num_queries,
+    django_capture_on_commit_callbacks,
+):
+    first = api_client.get(paths["game_detail"])
+    assert first.headers["Last-Modified"]
+
+    with django_assert_num_queries(0):
+        response = api_client.get(
+            paths["game_detail"], HTTP_IF_NONE_MATCH=first.headers["ETag"]
+        )
+    assert response.status_code == 304
+
+    with django_capture_on_commit_callbacks(execute=True):
+        user.favorite_games.add(game)
+    response = api_client.get(
+        paths["game_detail"], HTTP_IF_NONE_MATCH=first.headers["ETag"]
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != first.headers["ETag"]
+
+
+def test_game_list_conditional_get_skips_serialization(
+    api_client, user, game, access_token, django_assert_num_queries
+):
+    url = reverse("game-list")
+    auth = {"HTTP_AUTHORIZATION": f"Bearer {access_token(user)}"}
+    etag = api_client.get(url, **auth).headers["ETag"]
+
+    # The validators are memoized per catalog version and the user state is
+    # cached since the first request.
+    with django_assert_num_queries(0):
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag, **auth)
+    assert response.status_code == 304
+
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+
+
+def test_cache_stats(api_client, admin_user, paths, access_token):
+    api_client.get(paths["genre_list"])
+    api_client.get(paths["genre_list"])
+
+    response = api_client.get(
+        reverse("cache-stats"), HTTP_AUTHORIZATION=f"Bearer {access_token(admin_user)}"
+    )
+    assert response.json()["genres"] == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+
+
+@pytest.mark.budget("game-detail", queries=3)
 def test_game_detail(api_client, game, paths):
     response = api_client.get(paths["game_detail"])
     assert response.status_code == 200
     assert response.json()["name"] == game.name
 
 
+@pytest.mark.budget("game-list", queries=3)
+def test_game_list_has_no_last_modified(
+    api_client, game, django_capture_on_commit_callbacks
+):
+    older = Game.objects.create(
+        name="Older", description="", release_date="2000-01-01", studio=game.studio
+    )
+    Game.objects.filter(pk=older.pk).update(updated_at="2001-01-01T00:00Z")
+    reference.warm()
+    first = api_client.get(reverse("game-list"))
+    assert "Last-Modified" not in first.headers
+
+    with django_capture_on_commit_callbacks(execute=True):
+        older.delete()
+    response = api_client.get(
+        reverse("game-list"), HTTP_IF_MODIFIED_SINCE=http_date(time.time())
+    )
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()["results"]] == [game.id]
+
+
+def test_game_list_query_count_is_constant(
+    api_client,
+    user,
+    game,
+    django_assert_num_queries,
+    django_capture_on_commit_callbacks,
+):
+    user.favorite_games.add(game)
+    reference.warm()
+    # Validators aggregate, games and genre ids; studios and genres are in memory.
+    with django_assert_num_queries(3):
+        api_client.get(reverse("game-list"))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        for index in range(5):
+            extra = Game.objects.create(
+                name=f"Game {index}",
+                description="",
+                release_date="2020-01-01",
+                studio=game.studio,
+            )
+            extra.genre.set(game.genre.all())
+            user.favorite_games.add(extra)
+
+    with django_assert_num_queries(3):
+        response = api_client.get(reverse("game-list"))
+    assert [item["in_favorites"] for item in response.json()["results"]] == [1] * 6
+
+
+def test_game_list_is_favorited_adds_one_query(
+    api_client, user, game, access_token, django_assert_num_queries
+):
+    other = Game.objects.create(
+        name="Other", description="", release_date="2020-01-01", studio=game.studio
+    )
+    user.favorite_games.add(game)
+    auth = {"HTTP_AUTHORIZATION": f"Bearer {access_token(user)}"}
+    reference.warm()
+
+    # User lookup, validators, games, genre ids and the favorite ids of the page.
+    with django_assert_num_queries(5):
+        response = api_client.get(reverse("game-list"), **auth)
+
+    flags = {item["id"]: item["is_favorited"] for item in response.json()["results"]}
+    assert flags == {game.id: True, other.id: False}
+
+    response = api_client.get(reverse("game-detail", kwargs={"pk": game.id}), **auth)
+    assert response.json()["is_favorited"] is True
+
+
+def test_game_list_keyset_pagination(api_client, game):
+    for index in range(4):
+        Game.objects.create(
+            name=f"Game {index}",
+            description="",
+            release_date=game.release_date,
+            studio=game.studio,
+        )
+    expected = list(
+        Game.objects.order_by("release_date", "id").values_list("id", flat=True)
+    )
+
+    seen = []
+    url = f"{reverse('game-list')}?page_size=2"
+    while url:
+        page = api_client.get(url).json()
+        seen.extend(item["id"] for item in page["results"])
+        last_page, url = page, page["next"]
+    assert seen == expected
+
+    previous = api_client.get(last_page["previous"]).json()
+    assert [item["id"] for item in previous["results"]] == expected[2:4]
+
+
+def test_game_list_filters(api_client, game, genre):
+    rpg = Genre.objects.create(name="RPG", description="")
+    japanese = Studio.objects.create(
+        name="Square", founded_date="1986-09-01", description="", country="Japan"
+    )
+    recent = Game.objects.create(
+        name="FF XV", description="", release_date="2016-11-29", studio=japanese
+    )
+    recent.genre.add(rpg)
+    old = Game.objects.create(
+        name="FF VII", description="", release_date="1997-01-31", studio=japanese
+    )
+    old.genre.add(rpg, genre)
+
+    def ids(**params):
+        response = api_client.get(reverse("game-list"), params)
+        return [item["id"] for item in response.json()["results"]]
+
+    assert ids(genre=rpg.id, country="Japan", released_after="2015-01-01") == [
+        recent.id
+    ]
+    assert ids(genre=f"{rpg.id},{genre.id}") == [old.id, recent.id, game.id]
+    assert ids(studio=game.studio.id) == [game.id]
+    assert ids(released_before="2000-01-01") == [old.id]
+    assert ids(ordering="-name", country="Japan") == [recent.id, old.id]
+
+
+def test_game_list_rejects_malformed_filters(api_client):
+    assert api_client.get(reverse("game-list"), {"genre": "rpg"}).status_code == 400
+    response = api_client.get(reverse("game-list"), {"released_after": "2015"})
+    assert response.status_code == 400
+
+
+def test_game_list_keyset_follows_ordering(api_client, game):
+    for name in ["Alpha", "Zulu", "Mike"]:
+        Game.objects.create(
+            name=name, description="", release_date="2020-01-01", studio=game.studio
+        )
+    names = []
+    url = f"{reverse('game-list')}?ordering=-name&page_size=1"
+    while url:
+        page = api_client.get(url).json()
+        names.extend(item["name"] for item in page["results"])
+        url = page["next"]
+    assert names == ["Zulu", "Mike", "Fortnite", "Alpha"]
+
+
+def test_game_list_compact_by_default(api_client, game, genre, studio):
+    reference.warm()
+    with CaptureQueriesContext(connection) as context:
+        response = api_client.get(reverse("game-list"))
+
+    assert response.json()["results"] == [
+        {
+            "id": game.id,
+            "name": game.name,
+            "release_date": "2017-07-25",
+            "genre": [{"id": genre.id, "name": genre.name}],
+            "studio": {"id": studio.id, "name": studio.name},
+            "in_favorites": 0,
+            "is_favorited": False,
+        }
+    ]
+    sql = [query["sql"] for query in context.captured_queries]
+    assert not any('"description"' in statement for statement in sql)
+
+
+def test_game_list_fields_and_expand(api_client, game, studio):
+    response = api_client.get(
+        reverse("game-list"), {"fields": "id,description,studio", "expand": "studio"}
+    )
+
+    assert response.json()["results"] == [
+        {
+            "id": game.id,
+            "description": game.description,
+            "studio": {
+                "id": studio.id,
+                "name": studio.name,
+                "founded_date": "1991-01-01",
+                "description": studio.description,
+                "country": studio.country,
+            },
+        }
+    ]
+
+
+def test_genre_list_fields(api_client, genre, paths):
+    response = api_client.get(paths["genre_list"], {"fields": "name"})
+    assert response.json() == [{"name": genre.name}]
+
+
+def test_game_list_invalid_cursor(api_client):
+    response = api_client.get(reverse("game-list"), {"cursor": "not-a-cursor"})
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize(
+    "position",
+    [
+        ["July 2017", 1],
+        [{"date": "2017-07-25"}, 1],
+        ["2017-07-25", [1]],
+        ["2017-07-25", "one"],
+        [None, 1],
+    ],
+)
+def test_game_list_cursor_with_wrong_types(api_client, game, position):
+    cursor = b64encode(json.dumps({"p": position}).encode()).decode()
+    response = api_client.get(reverse("game-list"), {"cursor": cursor})
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Invalid cursor"}
+
+
+def test_game_list_cursor_values_are_coerced(api_client, game):
+    cursor = b64encode(json.dumps({"p": ["2000-01-01", "0"]}).encode()).decode()
+    response = api_client.get(reverse("game-list"), {"cursor": cursor})
+    assert [item["id"] for item in response.json()["results"]] == [game.id]
+
+
+def test_game_comment_feed(
+    api_client, user, game, access_token, django_assert_num_queries
+):
+    other = Game.objects.create(
+        name="Other", description="", release_date="2020-01-01", studio=game.studio
+    )
+    Comment.objects.create(user=user, game=other, text="Elsewhere")
+    comments = [
+        Comment.objects.create(user=user, game=game, text=str(i)) for i in range(3)
+    ]
+    url = reverse("game-comments", kwargs={"pk": game.id})
+    auth = {"HTTP_AUTHORIZATION": f"Bearer {access_token(user)}"}
+
+    with django_assert_num_queries(2):
+        first = api_client.get(url, {"page_size": 2}, **auth).json()
+    second = api_client.get(first["next"], **auth).json()
+
+    results = first["results"] + second["results"]
+    assert [item["id"] for item in results] == [c.id for c in reversed(comments)]
+    assert second["next"] is None
+
+
+def test_game_comment_feed_unknown_game(api_client, user, access_token):
+    response = api_client.get(
+        reverse("game-comments", kwargs={"pk": 999}),
+        HTTP_AUTHORIZATION=f"Bearer {access_token(user)}",
+    )
+    assert response.status_code == 404
+
+
+def test_game_search_follows_deleted_genres_on_commit(
+    api_client, game, genre, django_capture_on_commit_callbacks
+):
+    # The fixture's genre link is indexed on commit, which tests never reach.
+    search.index_games([game.pk])
+    url = reverse("game-search")
+    with django_capture_on_commit_callbacks() as callbacks:
+        genre.delete()
+    results = api_client.get(url, {"q": "action"}).json()["results"]
+    assert [item["id"] for item in results] == [game.id]
+
+    for callback in callbacks:
+        callback()
+    assert api_client.get(url, {"q": "action"}).json()["results"] == []
+
+
+def test_game_search_ranks_and_follows_related_changes(
+    api_client, game, studio, django_capture_on_commit_callbacks
+):
+    other = Game.objects.create(
+        name="Unreal Tournament",
+        description="Arena shooter in the spirit of Fortnite",
+        release_date="1999-11-30",
+        studio=studio,
+    )
+    url = reverse("game-search")
+
+    results = api_client.get(url, {"q": "fortnite"}).json()["results"]
+    assert [item["id"] for item in results] == [game.id, other.id]
+
+    studio.name = "Psyonix"
+    with django_capture_on_commit_callbacks(execute=True):
+        studio.save()
+    results = api_client.get(url, {"q": "psyon"}).json()["results"]
+    assert {item["id"] for item in results} == {game.id, other.id}
+
+    with django_capture_on_commit_callbacks(execute=True):
+        game.delete()
+    results = api_client.get(url, {"q": "fortnite"}).json()["results"]
+    assert [item["id"] for item in results] == [other.id]
+
+
+def test_game_search_paginates(api_client, game):
+    for index in range(3):
+        Game.objects.create(
+            name=f"Fortnite {index}",
+            description="",
+            release_date="2020-01-01",
+            studio=game.studio,
+        )
+    page = api_client.get(reverse("game-search"), {"q": "fortnite", "page_size": 3})
+    assert len(page.json()["results"]) == 3
+
+    last = api_client.get(page.json()["next"]).json()
+    assert len(last["results"]) == 1
+    assert last["next"] is None
+
+
+def test_game_search_requires_query(api_client):
+    response = api_client.get(reverse("game-search"))
+    assert response.status_code == 400
+
+
+def test_bulk_create_games(
+    api_client, admin_user, genre, studio, access_token, django_assert_max_num_queries
+):
+    rpg = Genre.objects.create(name="RPG", description="")
+    items = [
+        {
+            "name": f"Game {index}",
+            "description": "Imported",
+            "release_date": "2020-01-01",
+            "studio": studio.id,
+            "genre": [genre.id, rpg.id],
+        }
+        for index in range(50)
+    ]
+
+    with django_assert_max_num_queries(20):
+        response = api_client.post(
+            reverse("game-bulk"),
+            items,
+            format="json",
+            HTTP_AUTHORIZATION=f"Bearer {access_token(admin_user)}",
+        )
+
+    assert response.status_code == 201
+    assert len(response.json()["ids"]) == 50
+    assert Game.genre.through.objects.filter(genre=rpg).count() == 50
+    results = api_client.get(reverse("game-search"), {"q": "game 7"}).json()["results"]
+    assert results[0]["name"] == "Game 7"
+
+
+def test_bulk_create_reports_errors_per_item(
+    api_client, admin_user, genre, access_token
+):
+    items = [
+        {"name": "Puzzle", "description": "Imported"},
+        {"name": "Action", "description": "Imported"},
+        {"name": "Puzzle", "description": "Imported"},
+        {"description": "Imported"},
+    ]
+
+    response = api_client.post(
+        reverse("genre-bulk"),
+        items,
+        format="json",
+        HTTP_AUTHORIZATION=f"Bearer {access_token(admin_user)}",
+    )
+
+    assert response.status_code == 400
+    assert set(response.json()) == {"1", "2", "3"}
+    assert "name" in response.json()["1"]
+    assert not Genre.objects.filter(name="Puzzle").exists()
+
+
+def test_bulk_update_and_delete_games(api_client, admin_user, game, access_token):
+    rpg = Genre.objects.create(name="RPG", description="")
+    auth = {"HTTP_AUTHORIZATION": f"Bearer {access_token(admin_user)}"}
+
+    response = api_client.patch(
+        reverse("game-bulk"),
+        [{"id": game.id, "name": "Renamed", "genre": [rpg.id]}, {"id": 999}],
+        format="json",
+        **auth,
+    )
+    assert response.status_code == 400
+    assert list(response.json()) == ["1"]
+
+    response = api_client.patch(
+        reverse("game-bulk"),
+        [{"id": game.id, "name": "Renamed", "genre": [rpg.id]}],
+        format="json",
+        **auth,
+    )
+    assert response.status_code == 200
+    game.refresh_from_db()
+    assert game.name == "Renamed"
+    assert list(game.genre.all()) == [rpg]
+
+    response = api_client.delete(
+        reverse("game-bulk"), {"ids": [game.id, 999]}, format="json", **auth
+    )
+    assert response.json() == {"deleted": [game.id], "not_found": [999]}
+    assert not Game.objects.exists()
+
+
+def test_bulk_update_accepts_string_ids(api_client, admin_user, game, access_token):
+    auth = {"HTTP_AUTHORIZATION": f"Bearer {access_token(admin_user)}"}
+
+    response = api_client.patch(
+        reverse("game-bulk"),
+        [{"id": str(game.id), "name": "Renamed"}],
+        format="json",
+        **auth,
+    )
+    assert response.status_code == 200
+    assert response.json() == {"ids": [game.id]}
+    game.refresh_from_db()
+    assert game.name == "Renamed"
+
+
+def test_bulk_delete_over_the_limit_is_rejected(
+    api_client, admin_user, game, access_token, monkeypatch
+):
+    monkeypatch.setattr(GameViewSet, "bulk_max_items", 2)
+    auth = {"HTTP_AUTHORIZATION": f"Bearer {access_token(admin_user)}"}
+
+    response = api_client.delete(
+        reverse("game-bulk"), {"ids": [game.id, 998, 999]}, format="json", **auth
+    )
+    assert response.status_code == 400
+    assert list(response.json()) == ["ids"]
+    assert Game.objects.exists()
+
+
+def test_game_and_studio_stats(api_client, user, game, genre, studio):
+    Comment.objects.create(user=user, game=game, text="Nice")
+    user.favorite_games.add(game)
+    month = timezone.now().date().replace(day=1).isoformat()
+
+    response = api_client.get(reverse("game-stats", kwargs={"pk": game.id}))
+    assert response.json() == {
+        "favorites": 1,
+        "comments": 1,
+        "comments_by_month": [{"month": month, "comments": 1}],
+    }
+
+    response = api_client.get(reverse("studio-stats", kwargs={"pk": studio.id}))
+    assert response.json() == {
+        "games": 1,
+        "favorites": 1,
+        "comments": 1,
+        "comments_by_month": [{"month": month, "comments": 1}],
+        "genres": [{"id": genre.id, "name": genre.name, "games": 1}],
+    }
+    response = api_client.get(reverse("studio-stats", kwargs={"pk": 999}))
+    assert response.status_code == 404
+
+
+def test_game_leaderboard(api_client, user, game, genre, studio):
+    other = Game.objects.create(
+        name="Other", description="", release_date="2020-01-01", studio=studio
+    )
+    user.favorite_games.add(game, other)
+    admin = type(user).objects.create_user(username="fan", password="password123")
+    admin.favorite_games.add(other)
+    leaderboards.refresh()
+
+    response = api_client.get(reverse("game-leaderboard"), {"page_size": 1})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["results"] == [
+        {
+            "score": 2,
+            "game": {"id": other.id, "name": "Other", "release_date": "2020-01-01"},
+        }
+    ]
+    response = api_client.get(data["next"])
+    assert [entry["game"]["id"] for entry in response.json()["results"]] == [game.id]
+
+    response = api_client.get(reverse("game-leaderboard"), {"genre": genre.id})
+    assert [entry["score"] for entry in response.json()["results"]] == [1]
+
+    response = api_client.get(reverse("game-leaderboard"), {"board": "nope"})
+    assert response.status_code == 400
+
+
+def test_export_streams_ndjson_and_resumes(
+    api_client, user, game, studio, genre, access_token
+):
+    later = Game.objects.create(
+        name="Later", description="", release_date="2020-01-01", studio=studio
+    )
+    auth = {"HTTP_AUTHORIZATION": f"Bearer {access_token(user)}"}
+
+    response = api_client.get(reverse("game-export"), **auth)
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/x-ndjson"
+    lines = b"".join(response.streaming_content).splitlines()
+    rows = [json.loads(line) for line in lines]
+    assert [row["id"] for row in rows] == [game.id, later.id]
+    assert rows[0]["genres"] == [genre.name]
+    assert rows[0]["studio"]["name"] == studio.name
+
+    response = api_client.get(reverse("game-export"), {"after_id": game.id}, **auth)
+    rows = b"".join(response.streaming_content).splitlines()
+    assert [json.loads(line)["id"] for line in rows] == [later.id]
+
+
+def test_export_csv_gzip(api_client, user, game, genre, access_token):
+    response = api_client.get(
+        reverse("game-export"),
+        {"output": "csv"},
+        HTTP_ACCEPT_ENCODING="gzip, deflate",
+        HTTP_AUTHORIZATION=f"Bearer {access_token(user)}",
+    )
+    assert response["Content-Encoding"] == "gzip"
+    body = gzip.decompress(b"".join(response.streaming_content)).decode()
+    header, row = csv.reader(body.splitlines())
+    assert header[0] == "id"
+    assert row[0] == str(game.id)
+    assert row[-1] == genre.name
+
+
+def test_export_requires_authentication(api_client):
+    assert api_client.get(reverse("game-export")).status_code == 401
+
+
 def test_add_to_favorites(api_client, user, game, paths, access_token):
     token = access_token(user)
 
@@ -59,6 +677,54 @@ def test_remove_from_favorites(api_client, user, game, paths, access_token):
     assert game not in user.favorite_games.all()
 
 
+def test_toggle_favorite_compact(api_client, user, game, paths, access_token):
+    token = access_token(user)
+
+    with CaptureQueriesContext(connection) as context:
+        response = api_client.post(
+            f"{paths['toggle_favorite']}?compact=true",
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+
+    statements = [
+        query["sql"]
+        for query in context.captured_queries
+        if "SAVEPOINT" not in query["sql"]
+    ]
+    # User lookup, then DELETE, counter UPDATE, studio stats UPDATE, INSERT and
+    # the user's counter UPDATE.
+    assert len(statements) == 6
+    assert response.json() == {"is_favorite": True}
+    game.refresh_from_db()
+    assert game.favorites_count == 1
+
+
+def test_toggle_favorite_unknown_game(api_client, user, access_token):
+    response = api_client.post(
+        reverse("game-toggle-favorite", kwargs={"pk": 999}),
+        HTTP_AUTHORIZATION=f"Bearer {access_token(user)}",
+    )
+    assert response.status_code == 404
+
+
+def test_put_and_delete_favorite_are_idempotent(api_client, user, game, access_token):
+    url = reverse("game-favorite", kwargs={"pk": game.id})
+    auth = {"HTTP_AUTHORIZATION": f"Bearer {access_token(user)}"}
+
+    for _ in range(2):
+        response = api_client.put(url, **auth)
+        assert response.json() == {"is_favorite": True}
+    game.refresh_from_db()
+    assert game.favorites_count == 1
+
+    for _ in range(2):
+        response = api_client.delete(url, **auth)
+        assert response.json() == {"is_favorite": False}
+    game.refresh_from_db()
+    assert game.favorites_count == 0
+    assert not user.favorited(game)
+
+
 def test_toggle_favorite_unauthorized(api_client, paths):
     response = api_client.post(paths["toggle_favorite"])
 
@@ -73,3 +739,71 @@ def test_toggle_favorite_invalid_token(api_client, paths):
 
     assert response.status_code == 401
     assert response.json()["detail"] == "Given token not valid for any token type"
+
+
+def test_user_list_shows_favorites_count(
+    api_client, user, admin_user, game, access_token, django_assert_num_queries
+):
+    user.favorite_games.add(game)
+    auth = {"HTTP_AUTHORIZATION": f"Bearer {access_token(admin_user)}"}
+
+    # User state, then the page of users.
+    with django_assert_num_queries(2):
+        response = api_client.get(reverse("customuser-list"), **auth)
+
+    rows = {row["username"]: row for row in response.json()["results"]}
+    assert rows[user.username]["favorites_count"] == 1
+    assert "favorite_games" not in rows[user.username]
+
+
+def test_user_favorites(api_client, user, admin_user, game, studio, access_token):
+    other = Game.objects.create(
+        name="Other", description="", release_date="2020-01-01", studio=studio
+    )
+    user.favorite_games.add(game, other)
+    auth = {"HTTP_AUTHORIZATION": f"Bearer {access_token(admin_user)}"}
+    path = reverse("customuser-favorites", kwargs={"pk": user.pk})
+
+    response = api_client.get(f"{path}?page_size=1", **auth)
+    assert [item["id"] for item in response.json()["results"]] == [game.id]
+    response = api_client.get(response.json()["next"], **auth)
+    assert [item["id"] for item in response.json()["results"]] == [other.id]
+    assert response.json()["results"][0]["is_favorited"] is False
+
+    empty = api_client.get(
+        reverse("customuser-favorites", kwargs={"pk": admin_user.pk}), **auth
+    )
+    assert empty.json()["results"] == []
+    missing = api_client.get(
+        reverse("customuser-favorites", kwargs={"pk": 999}), **auth
+    )
+    assert missing.status_code == 404
+
+
+def test_me_is_cached_until_favorites_change(
+    api_client,
+    user,
+    game,
+    paths,
+    access_token,
+    django_assert_num_queries,
+    django_capture_on_commit_callbacks,
+):
+    auth = {"HTTP_AUTHORIZATION": f"Bearer {access_token(user)}"}
+    api_client.get(reverse("customuser-me"), **auth)
+
+    # The user state is cached as well.
+    with django_assert_num_queries(0):
+        response = api_client.get(reverse("customuser-me"), **auth)
+    assert response.json()["favorites_count"] == 0
+
+    with django_capture_on_commit_callbacks(execute=True):
+        api_client.post(paths["toggle_favorite"], **auth)
+    response = api_client.get(reverse("customuser-me"), **auth)
+    assert response.json()["favorites_count"] == 1
+
+    user.email = "new@example.com"
+    with django_capture_on_commit_callbacks(execute=True):
+        user.save()
+    response = api_client.get(reverse("customuser-me"), **auth)
+    assert response.json()["email"] == "new@example.com"
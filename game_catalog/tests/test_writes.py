@@ -0,0 +1,130 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIClient
+import pytest
+
+from game_catalog import actions, writes
+from game_catalog.models import Comment, CustomUser, Genre
+
+
+@pytest.fixture
+def queue_on(settings):
+    settings.SQLITE_WRITE_QUEUE = True
+
+
+def current_thread():
+    return threading.current_thread().name
+
+
+@pytest.mark.django_db
+def test_runs_inline_inside_a_transaction(queue_on):
+    assert writes.run(current_thread) == threading.current_thread().name
+
+
+@pytest.mark.django_db
+def test_runs_inline_when_disabled(settings):
+    settings.SQLITE_WRITE_QUEUE = False
+    assert writes.run(current_thread) == threading.current_thread().name
+
+
+@pytest.mark.django_db(transaction=True)
+def test_runs_on_the_writer(queue_on):
+    assert writes.run(current_thread) == "catalog-writer"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_writes_are_batched(queue_on, monkeypatch, game):
+    batches = []
+    run_batch = writes._run_batch
+
+    def record(batch):
+        batches.append(len(batch))
+        run_batch(batch)
+
+    monkeypatch.setattr(writes, "_run_batch", record)
+    users = [CustomUser.objects.create(username=f"fan{n}") for n in range(8)]
+    release = threading.Event()
+
+    with ThreadPoolExecutor(len(users) + 1) as threads:
+        # Keep the writer busy so the favorites queue up behind it.
+        blocker = threads.submit(writes.run, release.wait)
+        while not batches:
+            time.sleep(0.01)
+        results = [
+            threads.submit(writes.run, actions.toggle_favorite, user, game.pk)
+            for user in users
+        ]
+        while writes._jobs.qsize() < len(users):
+            time.sleep(0.01)
+        release.set()
+        assert blocker.result()
+        assert all(result.result() for result in results)
+
+    assert batches == [1, 8]
+    game.refresh_from_db()
+    assert game.favorites_count == 8
+
+
+@pytest.mark.django_db(transaction=True)
+def test_failing_job_does_not_undo_the_batch(queue_on):
+    def fail():
+        Genre.objects.create(name="Rolled back", description="")
+        raise ValueError("broken")
+
+    with pytest.raises(ValueError):
+        writes.run(fail)
+    writes.run(Genre.objects.create, name="Kept", description="")
+
+    assert list(Genre.objects.values_list("name", flat=True)) == ["Kept"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_views_write_through_the_queue(queue_on, user, game):
+    client = APIClient()
+    client.force_authenticate(user)
+
+    response = client.post(reverse("game-toggle-favorite", args=[game.pk]))
+    assert response.data["is_favorite"] is True
+    response = client.post(
+        reverse("comment-list-create"), {"game": game.pk, "text": "Queued"}
+    )
+    assert response.status_code == 201
+    assert Comment.objects.get().user == user
+
+    response = client.post(reverse("game-toggle-favorite", args=[0]))
+    assert response.status_code == 404
+    assert not connection.in_atomic_block
+
+
+@pytest.mark.django_db(transaction=True)
+def test_catalog_writes_go_through_the_queue(queue_on, monkeypatch, admin_user):
+    queued = []
+    run_batch = writes._run_batch
+
+    def record(batch):
+        queued.extend(func for _, func, *_ in batch)
+        run_batch(batch)
+
+    monkeypatch.setattr(writes, "_run_batch", record)
+    client = APIClient()
+    client.force_authenticate(admin_user)
+
+    response = client.post(reverse("genre-list"), {"name": "RPG", "description": "-"})
+    url = reverse("genre-detail", args=[response.data["id"]])
+    client.patch(url, {"description": "Role-playing"})
+    client.delete(url)
+    response = client.post(
+        reverse("genre-bulk"), [{"name": "Puzzle", "description": "-"}], format="json"
+    )
+    client.delete(reverse("genre-bulk"), {"ids": response.data["ids"]}, format="json")
+    APIClient().post(
+        reverse("register"), {"username": "newuser", "password": "secret123"}
+    )
+
+    assert len(queued) == 6
+    assert not Genre.objects.exists()
+    assert CustomUser.objects.filter(username="newuser").exists()
@@ -1,7 +1,15 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from .async_views import (
+    AsyncGameCommentListView,
+    AsyncGameDetailView,
+    AsyncGameListView,
+    AsyncGenreListView,
+    AsyncStudioListView,
+)
 from .views import (
+    CacheStatsView,
     CommentDetailView,
     CommentListCreateView,
     GameViewSet,
@@ -20,4 +28,17 @@ urlpatterns = [
     path("", include(router.urls)),
     path("comments/", CommentListCreateView.as_view(), name="comment-list-create"),
     path("comments/<int:pk>/", CommentDetailView.as_view(), name="comment-detail"),
+    path("cache/stats/", CacheStatsView.as_view(), name="cache-stats"),
+    # Native async twins of the read endpoints, for ASGI deployments.
+    path("async/genres/", AsyncGenreListView.as_view(), name="async-genre-list"),
+    path("async/studios/", AsyncStudioListView.as_view(), name="async-studio-list"),
+    path("async/games/", AsyncGameListView.as_view(), name="async-game-list"),
+    path(
+        "async/games/<int:pk>/", AsyncGameDetailView.as_view(), name="async-game-detail"
+    ),
+    path(
+        "async/games/<int:pk>/comments/",
+        AsyncGameCommentListView.as_view(),
+        name="async-game-comments",
+    ),
 ]
@@ -1,53 +1,221 @@
-from rest_framework import generics, status, viewsets 
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from rest_framework import generics, serializers, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.filters import OrderingFilter
 from rest_framework.generics import CreateAPIView
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
-from drf_spectacular.utils import OpenApiResponse, extend_schema, extend_schema_view
+from drf_spectacular.utils import (
+    OpenApiParameter,
+    OpenApiResponse,
+    extend_schema,
+    extend_schema_view,
+)
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from . import actions
+from . import (
+    actions,
+    bulk,
+    cache,
+    comment_buffer,
+    export,
+    passwords,
+    search,
+    stats,
+    writes,
+)
+from .conditional import ConditionalGetMixin
 from .custom_permissions import IsAdminOrReadOnly, IsOwnerOrAdmin
-from .models import Comment, CustomUser, Game, Genre, Studio
+from .filters import GameFilterBackend
+from .models import Comment, CustomUser, Game, Genre, LeaderboardEntry, Studio
+from .pagination import (
+    CommentPagination,
+    GameCommentPagination,
+    GamePagination,
+    LeaderboardPagination,
+    RankedPagination,
+    UserPagination,
+)
 from .serializers import (
+    BulkListSerializer,
     CommentSerializer,
+    FavoriteStateSerializer,
+    GameListSerializer,
     GameSerializer,
+    GameStatsSerializer,
     GameWriteSerializer,
     GenreSerializer,
+    LeaderboardEntrySerializer,
     RegisterSerializer,
     StudioSerializer,
+    StudioStatsSerializer,
     ToggleFavoriteResponseSerializer,
     UserExtendedInfoSerializer,
     UserShortInfoSerializer,
+    _as_pk,
 )
 
 
-class RegisterView(CreateAPIView):
+class QueuedWritesMixin:
+    """Runs the create, update and destroy writes through game_catalog.writes."""
+
+    def perform_create(self, serializer):
+        writes.run(super().perform_create, serializer)
+
+    def perform_update(self, serializer):
+        writes.run(super().perform_update, serializer)
+
+    def perform_destroy(self, instance):
+        writes.run(super().perform_destroy, instance)
+
+
+class RegisterView(QueuedWritesMixin, CreateAPIView):
     permission_classes = [AllowAny]
     serializer_class = RegisterSerializer
 
     def perform_create(self, serializer):
-        user = serializer.save()
-        user.set_password(user.password)
-        user.save()
-        return user
+        # Hash on the request thread: only the INSERT belongs on the write queue.
+        password_hash = passwords.make_password(serializer.validated_data["password"])
+        writes.run(serializer.save, password_hash=password_hash)
+
+
+BULK_MAX_ITEMS = 10000
+
+
+class BulkDeleteSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=BULK_MAX_ITEMS
+    )
+
+    def __init__(self, *args, max_length=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if max_length is not None:
+            self.fields["ids"] = serializers.ListField(
+                child=serializers.IntegerField(),
+                allow_empty=False,
+                max_length=max_length,
+            )
+
+
+class BulkModelMixin:
+    """
+    Adds ``/bulk/`` to a model viewset: POST a list to create, PATCH a list of
+    objects with ids to update, DELETE ``{"ids": [...]}`` to delete.
 
+    Each call is validated as a batch and written in one transaction; invalid
+    items are reported by their index and nothing is written.
+    """
 
-class GenreViewSet(viewsets.ModelViewSet):
+    bulk_max_items = BULK_MAX_ITEMS
+
+    def get_bulk_serializer(self, instance=None, **kwargs):
+        context = self.get_serializer_context()
+        child = self.get_serializer_class()(
+            context=context, partial=kwargs.get("partial", False)
+        )
+        return BulkListSerializer(
+            instance,
+            child=child,
+            context=context,
+            max_length=self.bulk_max_items,
+            **kwargs,
+        )
+
+    @extend_schema(
+        description=(
+            "Create (POST), update (PATCH, items carry their id) or delete (DELETE, "
+            '{"ids": [...]}) many objects in one transaction. Admins only.'
+        ),
+    )
+    @action(detail=False, methods=["post", "patch", "delete"])
+    def bulk(self, request):
+        model = self.get_queryset().model
+        if request.method == "DELETE":
+            serializer = BulkDeleteSerializer(
+                data=request.data, max_length=self.bulk_max_items
+            )
+            serializer.is_valid(raise_exception=True)
+            ids = serializer.validated_data["ids"]
+            deleted, not_found = writes.run(bulk.delete_objects, model, ids)
+            return Response({"deleted": deleted, "not_found": not_found})
+
+        instances = None
+        if request.method == "PATCH":
+            items = request.data if isinstance(request.data, list) else []
+            ids = {_as_pk(item.get("id")) for item in items if isinstance(item, dict)}
+            ids.discard(None)
+            instances = list(model.objects.in_bulk(ids).values())
+        serializer = self.get_bulk_serializer(
+            instances, data=request.data, partial=instances is not None
+        )
+        serializer.is_valid(raise_exception=True)
+
+        def save():
+            with transaction.atomic():
+                return serializer.save()
+
+        objs = writes.run(save)
+        created = instances is None
+        return Response(
+            {"ids": [obj.pk for obj in objs]},
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+
+class GenreViewSet(
+    QueuedWritesMixin,
+    BulkModelMixin,
+    ConditionalGetMixin,
+    cache.CachedResponseMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     permission_classes = [IsAdminOrReadOnly]
+    cache_resource = "genres"
+    replica_reads = True
 
 
-class StudioViewSet(viewsets.ModelViewSet):
+class StudioViewSet(
+    QueuedWritesMixin,
+    BulkModelMixin,
+    ConditionalGetMixin,
+    cache.CachedResponseMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Studio.objects.all()
     serializer_class = StudioSerializer
     permission_classes = [IsAdminOrReadOnly]
+    cache_resource = "studios"
+    replica_reads = True
+    lookup_value_regex = r"\d+"
+
+    @extend_schema(
+        description=(
+            "Game count, total favorites, comments per month and genre mix of a "
+            "studio's games. Read-only for everyone."
+        ),
+        responses=StudioStatsSerializer,
+    )
+    @action(detail=True, methods=["get"])
+    def stats(self, request, pk=None):
+        try:
+            data = stats.studio_stats(pk)
+        except Studio.DoesNotExist:
+            raise NotFound()
+        return Response(StudioStatsSerializer(data).data)
 
 
 @extend_schema_view(
     list=extend_schema(
-        description="Retrieve a list of all games. Read-only for everyone.",
-        responses=GameSerializer,
+        description=(
+            "Retrieve a list of games, optionally filtered by genre, studio, studio "
+            "country and release date range. Games are rendered compactly; use "
+            "?fields= and ?expand=studio,genre to pick fields. Read-only for everyone."
+        ),
+        responses=GameListSerializer,
     ),
     retrieve=extend_schema(
         description="Retrieve details of a specific game. Read-only for everyone.",
@@ -73,59 +241,283 @@ class StudioViewSet(viewsets.ModelViewSet):
         responses=OpenApiResponse(description="No content"),
     ),
 )
-class GameViewSet(viewsets.ModelViewSet):
+class GameViewSet(
+    QueuedWritesMixin,
+    BulkModelMixin,
+    ConditionalGetMixin,
+    cache.CachedResponseMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Game.objects.select_related("studio").prefetch_related("genre")
     permission_classes = [IsAdminOrReadOnly]
+    pagination_class = GamePagination
+    filter_backends = [GameFilterBackend, OrderingFilter]
+    # Every ordering field is covered by an (<field>, id) index on Game.
+    ordering_fields = ["release_date", "name"]
+    ordering = ["release_date"]
+    cache_resource = "games"
+    replica_reads = True
+    lookup_value_regex = r"\d+"
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ["list", "search"]:
+            queryset = GameListSerializer(
+                context=self.get_serializer_context()
+            ).optimize_queryset(queryset)
+        return queryset
 
     def get_serializer_class(self):
-        if self.action in ["create", "update", "partial_update"]:
+        if self.action in ["create", "update", "partial_update", "bulk"]:
             return GameWriteSerializer
+        if self.action in ["list", "search"]:
+            return GameListSerializer
         return GameSerializer
 
+    def get_serializer(self, *args, **kwargs):
+        if args and self.action in ["list", "retrieve", "search"]:
+            games = args[0] if kwargs.get("many") else [args[0]]
+            kwargs["context"] = {
+                **self.get_serializer_context(),
+                "favorite_ids": actions.favorite_game_ids(self.request.user, games),
+            }
+        serializer = super().get_serializer(*args, **kwargs)
+        if args and self.action in ["list", "search"]:
+            serializer.child.attach_related(args[0])
+        return serializer
+
+    @extend_schema(
+        description="Full-text search over game, studio and genre names and game descriptions, best matches first.",
+        parameters=[OpenApiParameter("q", str, required=True)],
+        responses=GameListSerializer(many=True),
+    )
+    @action(detail=False, methods=["get"], pagination_class=RankedPagination)
+    def search(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            raise ValidationError({"q": ["This query parameter is required."]})
+        return self.cached_response(self.search_results, request, query)
+
+    def search_results(self, request, query):
+        page = self.paginate_queryset(
+            search.SearchResults(query, self.get_queryset())
+        )
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @extend_schema(
+        description="Favorites and comments per month of a game. Read-only for everyone.",
+        responses=GameStatsSerializer,
+    )
+    @action(detail=True, methods=["get"])
+    def stats(self, request, pk=None):
+        try:
+            data = stats.game_stats(pk)
+        except Game.DoesNotExist:
+            raise NotFound()
+        return Response(GameStatsSerializer(data).data)
+
+    @extend_schema(
+        description=(
+            "Most favorited or most commented games, all-time or over the last 7 "
+            "or 30 days, optionally within one genre. Served from precomputed "
+            "rankings refreshed by the refresh_leaderboards command."
+        ),
+        parameters=[
+            OpenApiParameter(
+                "board",
+                str,
+                enum=[choice for choice, _ in LeaderboardEntry.BOARD_CHOICES],
+            ),
+            OpenApiParameter("genre", int),
+        ],
+        responses=LeaderboardEntrySerializer(many=True),
+    )
+    @action(detail=False, methods=["get"], pagination_class=LeaderboardPagination)
+    def leaderboard(self, request):
+        board = request.query_params.get("board", LeaderboardEntry.FAVORITES)
+        if board not in dict(LeaderboardEntry.BOARD_CHOICES):
+            raise ValidationError({"board": ["Unknown leaderboard."]})
+        entries = LeaderboardEntry.objects.filter(board=board)
+        if request.query_params.get("genre"):
+            try:
+                entries = entries.filter(genre_id=int(request.query_params["genre"]))
+            except ValueError:
+                raise ValidationError({"genre": ["Expected a genre id."]})
+        else:
+            entries = entries.filter(genre__isnull=True)
+
+        entries = entries.select_related("game").only(
+            "score", "game__id", "game__name", "game__release_date"
+        )
+        page = self.paginate_queryset(entries)
+        serializer = LeaderboardEntrySerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     @extend_schema(
-        description="Toggle a game in or out of the user's favorites list. Requires authentication.",
+        description=(
+            "Stream every game with its studio and genres, in id order, as NDJSON "
+            "(default) or CSV. Gzip-compressed when the client accepts it. Pass "
+            "?after_id= to resume an interrupted export. Requires authentication."
+        ),
+        parameters=[
+            OpenApiParameter("output", str, enum=sorted(export.WRITERS)),
+            OpenApiParameter("after_id", int),
+        ],
+        responses={200: OpenApiResponse(description="NDJSON or CSV stream")},
+    )
+    @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
+    def export(self, request):
+        # Not "format": DRF reserves that one for picking a renderer.
+        export_format = request.query_params.get("output", "ndjson")
+        if export_format not in export.WRITERS:
+            choices = ", ".join(sorted(export.WRITERS))
+            raise ValidationError({"output": [f"Expected one of: {choices}."]})
+        try:
+            after_id = int(request.query_params.get("after_id", 0))
+        except ValueError:
+            raise ValidationError({"after_id": ["Expected a game id."]})
+        compress = "gzip" in request.headers.get("Accept-Encoding", "")
+
+        response = StreamingHttpResponse(
+            export.stream(export_format, after_id=after_id, compress=compress),
+            content_type=export.CONTENT_TYPES[export_format],
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="games.{export_format}"'
+        )
+        response["Vary"] = "Accept-Encoding"
+        if compress:
+            response["Content-Encoding"] = "gzip"
+        return response
+
+    @extend_schema(
+        description=(
+            "Toggle a game in or out of the user's favorites list. Requires authentication. "
+            "Pass ?compact=true to receive only the new state."
+        ),
         request=None,
+        parameters=[OpenApiParameter("compact", bool, required=False)],
         responses={
             200: ToggleFavoriteResponseSerializer,
         },
     )
     @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
     def toggle_favorite(self, request, pk=None):
-        game = self.get_object()
         user = request.user
+        try:
+            is_favorite = writes.run(actions.toggle_favorite, user, pk)
+        except Game.DoesNotExist:
+            raise NotFound()
 
-        actions.toggle_favorite(user, game)
+        if request.query_params.get("compact", "").lower() in ("1", "true"):
+            serializer = FavoriteStateSerializer({"is_favorite": is_favorite})
+        else:
+            response_data = {"is_favorite": is_favorite, "user": user}
+            serializer = ToggleFavoriteResponseSerializer(response_data)
+        return Response(serializer.data, status=status.HTTP_200_OK)
 
-        response_data = {"is_favorite": user.favorited(game), "user": user}
+    @extend_schema(
+        description=(
+            "Idempotently add (PUT) or remove (DELETE) a game from the user's favorites. "
+            "Requires authentication."
+        ),
+        request=None,
+        responses={200: FavoriteStateSerializer},
+    )
+    @action(detail=True, methods=["put", "delete"], permission_classes=[IsAuthenticated])
+    def favorite(self, request, pk=None):
+        try:
+            is_favorite = writes.run(
+                actions.set_favorite, request.user, pk, request.method == "PUT"
+            )
+        except Game.DoesNotExist:
+            raise NotFound()
 
-        serializer = ToggleFavoriteResponseSerializer(response_data)
+        serializer = FavoriteStateSerializer({"is_favorite": is_favorite})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @extend_schema(
+        description="List the comments on a game, newest first. Requires authentication.",
+        responses=CommentSerializer(many=True),
+    )
+    @action(
+        detail=True,
+        methods=["get"],
+        permission_classes=[IsAuthenticated],
+        pagination_class=GameCommentPagination,
+    )
+    def comments(self, request, pk=None):
+        page = self.paginate_queryset(Comment.objects.filter(game_id=pk))
+        if not page and not Game.objects.filter(pk=pk).exists():
+            raise NotFound()
+        if not self.paginator.has_previous:
+            page = comment_buffer.overlay(
+                page, request.user, game_id=pk, newest_first=True
+            )
+        serializer = CommentSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
 
 class CommentListCreateView(generics.ListCreateAPIView):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CommentPagination
+    replica_reads = True
+
+    @extend_schema(
+        description=(
+            "Post a comment. With write-behind enabled the comment is accepted "
+            "with 202 and inserted shortly after; its uuid identifies it until "
+            "then, and its id and post_date are null."
+        ),
+        responses={201: CommentSerializer, 202: CommentSerializer},
+    )
+    def create(self, request, *args, **kwargs):
+        if not comment_buffer.enabled():
+            return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        comment = comment_buffer.add(
+            Comment(user_id=request.user.pk, **serializer.validated_data)
+        )
+        return Response(
+            self.get_serializer(comment).data, status=status.HTTP_202_ACCEPTED
+        )
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        writes.run(serializer.save, user_id=self.request.user.pk)
+
+    def paginate_queryset(self, queryset):
+        # The author's buffered comments are the newest, so the last page.
+        page = super().paginate_queryset(queryset)
+        if page is not None and not self.paginator.has_next:
+            page = comment_buffer.overlay(page, self.request.user)
+        return page
 
 
 class CommentDetailView(generics.RetrieveDestroyAPIView):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
+    replica_reads = True
 
     def get_permissions(self):
         if self.request.method == "GET":
             return [IsAuthenticated()]
         return [IsAuthenticated(), IsOwnerOrAdmin()]
 
+    def perform_destroy(self, instance):
+        writes.run(instance.delete)
+
 
-class UserViewSet(viewsets.ModelViewSet):
-    queryset = CustomUser.objects.prefetch_related("favorite_games")
+class UserViewSet(QueuedWritesMixin, viewsets.ModelViewSet):
+    queryset = CustomUser.objects.all()
+    pagination_class = UserPagination
+    lookup_value_regex = r"\d+"
 
     def get_permissions(self):
-        if self.action in ["me", "list", "retrieve"]:
+        if self.action in ["me", "list", "retrieve", "favorites"]:
             return [IsAuthenticated()]
         return [IsAdminUser()]
 
@@ -134,7 +526,44 @@ class UserViewSet(viewsets.ModelViewSet):
             return UserExtendedInfoSerializer
         return UserShortInfoSerializer
 
+    @extend_schema(responses=UserExtendedInfoSerializer)
     @action(detail=False, methods=["get"])
     def me(self, request):
-        serializer = UserExtendedInfoSerializer(request.user)
-        return Response(serializer.data)
+        # Cached until the user or their favorites change.
+        key = cache.user_key(request.user.pk)
+        data = cache.get_cache().get(key)
+        if data is None:
+            data = dict(UserExtendedInfoSerializer(request.user).data)
+            cache.get_cache().set(key, data)
+        return Response(data)
+
+    @extend_schema(
+        description="The games a user has favorited. Requires authentication.",
+        responses=GameListSerializer(many=True),
+    )
+    @action(detail=True, methods=["get"], pagination_class=GamePagination)
+    def favorites(self, request, pk=None):
+        games = GameListSerializer(
+            context=self.get_serializer_context()
+        ).optimize_queryset(Game.objects.filter(favorited_by=pk))
+        page = self.paginate_queryset(games)
+        if not page and not CustomUser.objects.filter(pk=pk).exists():
+            raise NotFound()
+        context = {
+            **self.get_serializer_context(),
+            "favorite_ids": actions.favorite_game_ids(request.user, page),
+        }
+        serializer = GameListSerializer(page, many=True, context=context)
+        serializer.child.attach_related(page)
+        return self.get_paginated_response(serializer.data)
+
+
+class CacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        description="Hit and miss counters of the catalog response cache. Admins only.",
+        responses={200: OpenApiResponse(description="Counters per cached resource")},
+    )
+    def get(self, request):
+        return Response(cache.stats())
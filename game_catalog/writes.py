@@ -0,0 +1,104 @@
+"""
+Single-writer queue for SQLite.
+
+SQLite runs one write transaction at a time. With ``SQLITE_WRITE_QUEUE`` on,
+the write paths of the catalog views hand their work to one thread per
+process instead of competing for the database lock. That thread runs
+whatever is queued, up to ``SQLITE_WRITE_BATCH`` jobs, in one transaction,
+each job in its own savepoint, so a burst of writes costs a single commit and
+a failing job only rolls back its own changes. Callers wait for their job to
+be committed and get its result or exception back.
+
+Work submitted while a transaction is open runs inline: the writer could not
+see its uncommitted rows and would wait for the lock that transaction holds.
+"""
+
+import atexit
+import queue
+import threading
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+_lock = threading.Lock()
+_jobs = queue.SimpleQueue()
+_writer = None
+
+
+def run(func, *args, **kwargs):
+    """Call ``func`` through the write queue, if enabled, and return its result."""
+    if (
+        not getattr(settings, "SQLITE_WRITE_QUEUE", False)
+        or transaction.get_connection().in_atomic_block
+    ):
+        return func(*args, **kwargs)
+    future = Future()
+    _start()
+    _jobs.put((future, func, args, kwargs))
+    return future.result()
+
+
+def _start():
+    global _writer
+    with _lock:
+        if _writer is None:
+            _writer = threading.Thread(
+                target=_write, name="catalog-writer", daemon=True
+            )
+            _writer.start()
+
+
+def _write():
+    stopping = False
+    while not stopping:
+        batch = []
+        job = _jobs.get()
+        limit = getattr(settings, "SQLITE_WRITE_BATCH", 64)
+        while job is not None:
+            batch.append(job)
+            if len(batch) >= limit:
+                break
+            try:
+                job = _jobs.get_nowait()
+            except queue.Empty:
+                break
+        else:
+            stopping = True
+        if batch:
+            _run_batch(batch)
+    connections[DEFAULT_DB_ALIAS].close()
+
+
+def _run_batch(batch):
+    outcomes = []
+    try:
+        with transaction.atomic():
+            for future, func, args, kwargs in batch:
+                try:
+                    with transaction.atomic():
+                        outcomes.append((future, func(*args, **kwargs), None))
+                except Exception as error:
+                    outcomes.append((future, None, error))
+    except Exception as error:
+        # The commit itself failed; start over with a fresh connection.
+        connections[DEFAULT_DB_ALIAS].close()
+        for future, *_ in batch:
+            future.set_exception(error)
+        return
+    for future, result, error in outcomes:
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+
+@atexit.register
+def shutdown():
+    """Let the writer finish the queued jobs and stop."""
+    global _writer
+    with _lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        _jobs.put(None)
+        writer.join()